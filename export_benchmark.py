@@ -0,0 +1,441 @@
+"""Banco de pruebas de rendimiento de la exportación con una conexión sintética que imita a pyodbc"""
+
+import argparse
+import datetime
+import decimal
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from export_engine import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_CACHE_MB,
+    MAESTROS_TABLES,
+    RELACIONES_TABLES,
+    TABLE_ROW_SOURCES,
+    ExportEngine,
+    SanitizerCache,
+    _TableOutput,
+    build_batch_formatter,
+    build_row_formatter,
+    get_query_for_table,
+    get_text_sanitizer,
+)
+
+BENCHMARK_SIZES = (10_000, 1_000_000, 10_000_000)
+BENCHMARK_SEED = 1234
+BENCHMARK_POOL_ROWS = 4096
+BENCHMARK_STAGES = ("fetch", "sanitize", "format", "write")
+# Tablas donde se compara el camino por filas con el camino por columnas (opción columnar)
+PATH_TABLES = ("Artículos", "Proveedores")
+
+# Textos con tildes, ñ, apóstrofos, controles y espacios raros como los que llegan de las sucursales
+SAMPLE_TEXTS = (
+    "Acetaminofén 500 mg tabletas",
+    "Ibuprofeno suspensión pediátrica 100 ml",
+    "Niño's Vitaminas masticables",
+    "Pañales ajustables etapa 3",
+    "Loratadina jarabe\x01 120 ml",
+    "Crema humectante\taloe vera",
+    "Jeringa 5 ml c/aguja 21G x 1½\"",
+    "Alcohol isopropílico 70% — 1 L",
+    "Guantes de látex talla M ´caja´",
+    "Café descafeinado ‘premium’",
+    "Solución salina 0,9 % ampolla\x0b",
+    "AMOXICILINA + ÁCIDO CLAVULÁNICO 875/125",
+    "Vitamina C 1 g efervescente naranja",
+    "Protector solar FPS 50 · 200 g",
+    "Cepillo dental suave",
+    "Champú anticaspa 400 ml",
+)
+
+# Tipos de columna sintéticos: código único, texto, texto o literal 'NULL', entero, bit y decimal
+TABLE_COLUMNS = {
+    "Artículos": ["code", "text", "text", "text", "text", "int", "int", "text_null", "bit"],
+    "Categoría": ["code", "text"],
+    "Control Sanitario": ["code", "text"],
+    "Marcas": ["code", "text", "text_null"],
+    "Usos": ["code", "text"],
+    "Proveedores": ["code", "text", "text_null", "text", "text", "text", "text", "text_null", "int", "int", "int"],
+    "Principios Activos": ["code", "text", "bit"],
+    "Bancos": ["code", "text", "text", "int", "int"],
+    "Forma de Pago": ["code", "text", "text", "int", "int", "bit", "decimal", "bit", "decimal", "text", "bit"],
+    "Artículos - Categorías": ["code", "ref"],
+    "Artículos - Códigos de Barras": ["code", "barcode", "bit"],
+    "Artículos - Componentes": ["code", "ref"],
+    "Artículos - Control Sanitario": ["code", "ref"],
+    "Artículos - Marcas": ["code", "ref"],
+    "Artículos - Principio Activo": ["code", "ref"],
+    "Artículos - Unidades de Medida": ["code", "ref", "ref", "int", "ref", "int"],
+    "Artículos - Usos": ["code", "ref"],
+    "Artículos - Impuesto": ["code", "decimal", "decimal"],
+    "Artículos - Atributos (Medicina)": ["code"],
+    "Artículos - Atributos (Genérico)": ["code"],
+}
+
+# Peso relativo de filas por tabla: los maestros pequeños casi no cuentan
+TABLE_WEIGHTS = {
+    "Artículos": 10,
+    "Categoría": 0.01,
+    "Control Sanitario": 0.01,
+    "Marcas": 0.1,
+    "Usos": 0.01,
+    "Proveedores": 0.5,
+    "Principios Activos": 0.5,
+    "Bancos": 0.01,
+    "Forma de Pago": 0.01,
+    "Artículos - Categorías": 10,
+    "Artículos - Códigos de Barras": 15,
+    "Artículos - Componentes": 12,
+    "Artículos - Control Sanitario": 10,
+    "Artículos - Marcas": 10,
+    "Artículos - Principio Activo": 12,
+    "Artículos - Unidades de Medida": 12,
+    "Artículos - Usos": 10,
+    "Artículos - Impuesto": 10,
+    "Artículos - Atributos (Medicina)": 4,
+    "Artículos - Atributos (Genérico)": 2,
+}
+
+_COLUMN_TYPES = {
+    "code": str,
+    "ref": str,
+    "barcode": str,
+    "text": str,
+    "text_null": str,
+    "int": int,
+    "bit": bool,
+    "decimal": decimal.Decimal,
+}
+
+
+def _sample_value(kind, rng):
+    if kind == "text":
+        return None if rng.random() < 0.05 else rng.choice(SAMPLE_TEXTS)
+    if kind == "text_null":
+        return "NULL" if rng.random() < 0.3 else rng.choice(SAMPLE_TEXTS)
+    if kind == "ref":
+        return f"R{rng.randrange(5000):05d}"
+    if kind == "barcode":
+        return str(rng.randrange(10**12, 10**13))
+    if kind == "int":
+        return None if rng.random() < 0.05 else rng.randrange(100000)
+    if kind == "bit":
+        return rng.random() < 0.5
+    if kind == "decimal":
+        return None if rng.random() < 0.05 else decimal.Decimal(rng.randrange(100000)) / 100
+    return None
+
+
+class FakeCursor:
+    """Cursor sintético con la API de pyodbc usada por la exportación"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self._columns = None
+        self._pool = None
+        self._remaining = 0
+        self._produced = 0
+        self._estimates = None
+
+    def execute(self, query, *params):
+        table = self.connection.tables_by_query.get(query)
+        self._produced = 0
+        if table is None and "sys.partitions" in query:
+            # Estimación de filas: las cantidades sintéticas exactas, por tabla base
+            self._estimates = [(source, self.connection.source_rows.get(source, 0)) for source in params]
+            self.description = [("name", str, None, None, None, None, True), ("rows", int, None, None, None, None, True)]
+            self._remaining = 0
+            return self
+        if table is None:
+            # USE y cualquier otra consulta: resultado vacío
+            self.description = None
+            self._remaining = 0
+            return self
+        self._columns = TABLE_COLUMNS[table]
+        self._pool = self.connection.pool(table)
+        self._remaining = self.connection.rows_per_table[table]
+        self.description = [
+            (f"columna{index + 1}" if index else "Codigo", _COLUMN_TYPES[kind], None, None, None, None, True)
+            for index, kind in enumerate(self._columns)
+        ]
+        return self
+
+    def fetchmany(self, size=1):
+        count = min(size, self._remaining)
+        if count <= 0:
+            return []
+        pool = self._pool
+        pool_size = len(pool)
+        start = self._produced
+        # La primera columna es única por fila, como CodigoArticulo; el resto se recicla del pool
+        rows = [(f"A{number:08d}",) + pool[number % pool_size] for number in range(start, start + count)]
+        self._produced += count
+        self._remaining -= count
+        return rows
+
+    def fetchall(self):
+        if self._estimates is not None:
+            rows, self._estimates = self._estimates, None
+            return rows
+        return self.fetchmany(self._remaining)
+
+    def nextset(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Conexión sintética: cada consulta de get_query_for_table devuelve filas realistas de su tabla"""
+
+    def __init__(self, rows_per_table, seed=BENCHMARK_SEED):
+        self.rows_per_table = rows_per_table
+        self.tables_by_query = {get_query_for_table(table): table for table in rows_per_table}
+        self.source_rows = {}
+        for table, rows in rows_per_table.items():
+            source = TABLE_ROW_SOURCES[table]
+            self.source_rows[source] = max(rows, self.source_rows.get(source, 0))
+        self.seed = seed
+        self._pools = {}
+
+    def pool(self, table):
+        if table not in self._pools:
+            rng = random.Random(f"{self.seed}:{table}")
+            kinds = TABLE_COLUMNS[table][1:]
+            self._pools[table] = [
+                tuple(_sample_value(kind, rng) for kind in kinds) for _ in range(BENCHMARK_POOL_ROWS)
+            ]
+        return self._pools[table]
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+def rows_per_table(total_rows, tables):
+    weight = sum(TABLE_WEIGHTS[table] for table in tables)
+    return {table: max(1, round(total_rows * TABLE_WEIGHTS[table] / weight)) for table in tables}
+
+
+class _PassThroughSanitizer:
+    """Sanitizador nulo: permite medir el formateo sin el costo de la sanitización"""
+
+    @staticmethod
+    def sanitize(value):
+        if value is None:
+            return ""
+        return value if type(value) is str else str(value)
+
+
+def measure_stages(connection, tables, folder, batch_size=EXPORT_BATCH_SIZE):
+    """Recorre cada tabla midiendo por separado lectura, sanitización, formateo y escritura"""
+    sanitizer = get_text_sanitizer()
+    timings = dict.fromkeys(BENCHMARK_STAGES, 0.0)
+    rows_total = 0
+    clock = time.perf_counter
+    os.makedirs(folder, exist_ok=True)
+
+    for table in tables:
+        cursor = connection.cursor()
+        cursor.execute(get_query_for_table(table))
+        format_row = build_row_formatter(cursor.description, _PassThroughSanitizer)
+        text_columns = [index for index, column in enumerate(cursor.description) if column[1] is str]
+        output = _TableOutput(table, folder)
+        try:
+            while True:
+                started = clock()
+                rows = cursor.fetchmany(batch_size)
+                timings["fetch"] += clock() - started
+                if not rows:
+                    break
+
+                started = clock()
+                sanitize = sanitizer.sanitize
+                for row in rows:
+                    for index in text_columns:
+                        sanitize(row[index])
+                timings["sanitize"] += clock() - started
+
+                started = clock()
+                lines = list(map(format_row, rows))
+                timings["format"] += clock() - started
+
+                started = clock()
+                output.write(lines)
+                timings["write"] += clock() - started
+                rows_total += len(rows)
+
+            started = clock()
+            output.commit()
+            timings["write"] += clock() - started
+        except BaseException:
+            output.discard()
+            raise
+        finally:
+            cursor.close()
+
+    return rows_total, timings
+
+
+def compare_paths(total_rows, seed=BENCHMARK_SEED, batch_size=EXPORT_BATCH_SIZE):
+    """Formatea los mismos lotes por filas (con la caché del motor) y por columnas; verifica que coincidan"""
+    counts = {table: max(1, total_rows // len(PATH_TABLES)) for table in PATH_TABLES}
+    connection = FakeConnection(counts, seed)
+    sanitizer = get_text_sanitizer()
+    clock = time.perf_counter
+    results = {}
+    for table in PATH_TABLES:
+        cursor = connection.cursor()
+        cursor.execute(get_query_for_table(table))
+        cache = SanitizerCache(sanitizer, EXPORT_CACHE_MB * 1024 * 1024)
+        format_row = build_row_formatter(cursor.description, sanitizer, cache)
+        format_batch = build_batch_formatter(cursor.description, sanitizer)
+        row_seconds = columnar_seconds = 0.0
+        identical = True
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            started = clock()
+            by_row = list(map(format_row, rows))
+            row_seconds += clock() - started
+            started = clock()
+            by_column = format_batch(rows)
+            columnar_seconds += clock() - started
+            identical = identical and by_row == by_column
+        results[table] = {
+            "rows": counts[table],
+            "row": round(row_seconds, 4),
+            "columnar": round(columnar_seconds, 4),
+            "speedup": round(row_seconds / columnar_seconds, 2) if columnar_seconds else None,
+            "identical": identical,
+        }
+    return results
+
+
+def run_benchmark(total_rows, tables, folder, end_to_end=True, seed=BENCHMARK_SEED, processes=0):
+    counts = rows_per_table(total_rows, tables)
+    rows, stages = measure_stages(FakeConnection(counts, seed), tables, os.path.join(folder, "etapas"))
+    result = {
+        "size": total_rows,
+        "rows": rows,
+        "stages": {stage: round(seconds, 4) for stage, seconds in stages.items()},
+        "stages_rows_per_second": round(rows / sum(stages.values())) if rows else 0,
+        "paths": compare_paths(total_rows, seed),
+    }
+
+    if end_to_end:
+        options = {"parallel_tables": 1, "share_scans": False, "save_metrics": False, "sanitize_processes": processes}
+        engine = ExportEngine("", options=options, connection=FakeConnection(counts, seed))
+        started = time.perf_counter()
+        engine.run(tables, os.path.join(folder, "completo"))
+        elapsed = time.perf_counter() - started
+        result["end_to_end"] = round(elapsed, 4)
+        result["end_to_end_rows_per_second"] = round(rows / elapsed) if elapsed else 0
+    return result
+
+
+def compare_results(previous, current, tolerance):
+    """Compara dos corridas por tamaño; devuelve las regresiones mayores que `tolerance` (fracción)"""
+    regressions = []
+    previous_by_size = {result["size"]: result for result in previous["results"]}
+    for result in current["results"]:
+        before = previous_by_size.get(result["size"])
+        if before is None:
+            continue
+        metrics = [(f"stages.{stage}", before["stages"].get(stage), result["stages"][stage]) for stage in BENCHMARK_STAGES]
+        if "end_to_end" in result and "end_to_end" in before:
+            metrics.append(("end_to_end", before["end_to_end"], result["end_to_end"]))
+        for name, old, new in metrics:
+            if not old:
+                continue
+            change = (new - old) / old
+            print(f"  {result['size']:>10} filas  {name:<16} {old:9.3f} s → {new:9.3f} s  ({change:+.1%})")
+            if change > tolerance:
+                regressions.append((result["size"], name, change))
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Mide el rendimiento de la exportación sin SQL Server.")
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=list(BENCHMARK_SIZES), help="Filas totales por corrida (10k, 1M y 10M por defecto)"
+    )
+    parser.add_argument("--output", "-o", default=None, help="Archivo JSON de resultados (por defecto benchmark_<fecha>.json)")
+    parser.add_argument("--compare", default=None, help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Regresión permitida en %% antes de fallar (10 por defecto)")
+    parser.add_argument("--stages-only", action="store_true", help="No ejecuta la exportación completa con ExportEngine")
+    parser.add_argument(
+        "--processes", type=int, default=0, help="Procesos de sanitización en la exportación completa (0 = en el mismo proceso)"
+    )
+    parser.add_argument("--seed", type=int, default=BENCHMARK_SEED, help="Semilla de los datos sintéticos")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    tables = MAESTROS_TABLES + RELACIONES_TABLES
+
+    started_at = datetime.datetime.now()
+    report = {
+        "created": started_at.isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "processes": args.processes,
+        "results": [],
+    }
+
+    folder = tempfile.mkdtemp(prefix="benchmark_exportacion_")
+    try:
+        # La construcción de las tablas del sanitizador no forma parte de ninguna etapa
+        get_text_sanitizer()
+        for total_rows in args.rows:
+            result = run_benchmark(total_rows, tables, folder, not args.stages_only, args.seed, args.processes)
+            report["results"].append(result)
+            stages = ", ".join(f"{stage} {seconds:.3f} s" for stage, seconds in result["stages"].items())
+            line = f"⏱️ {result['rows']} filas: {stages} ({result['stages_rows_per_second']} filas/s)"
+            if "end_to_end" in result:
+                line += f"; completo {result['end_to_end']:.3f} s ({result['end_to_end_rows_per_second']} filas/s)"
+            print(line)
+            for table, path in result["paths"].items():
+                check = "idéntico" if path["identical"] else "❌ DISTINTO"
+                print(
+                    f"   {table}: por filas {path['row']:.3f} s, por columnas {path['columnar']:.3f} s "
+                    f"(×{path['speedup']}, {check})"
+                )
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    output = args.output or f"benchmark_{started_at:%Y%m%d_%H%M%S}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ Resultados guardados en {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"Comparación con {args.compare}:")
+        regressions = compare_results(previous, report, args.tolerance / 100)
+        if regressions:
+            print(f"❌ {len(regressions)} medición(es) más lentas que la tolerancia de {args.tolerance:g}%")
+            return 1
+        print("✅ Sin regresiones")
+    if any(not path["identical"] for result in report["results"] for path in result["paths"].values()):
+        print("❌ El camino por columnas no produce las mismas líneas que el camino por filas")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Exportación reanudable: consultas por páginas ordenadas por clave (keyset) y punto de control por página"""
+
+import datetime
+import hashlib
+import json
+import os
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+
+def checkpoint_path(filepath):
+    return os.path.splitext(filepath)[0] + CHECKPOINT_SUFFIX
+
+
+def keyset_predicate(keys, values):
+    """(k1 > ?) OR (k1 = ? AND k2 > ?) …: las filas que siguen a `values` en el orden de `keys`"""
+    clauses = []
+    params = []
+    for position, key in enumerate(keys):
+        terms = [f"{previous} = ?" for previous in keys[:position]] + [f"{key} > ?"]
+        clauses.append("(" + " AND ".join(terms) + ")")
+        params.extend(values[: position + 1])
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def keyset_page_query(spec, page_size, after=None):
+    """Consulta y parámetros de la página que sigue a la clave `after` (None = primera página)"""
+    if after is None:
+        condition, params = "", []
+    else:
+        predicate, params = keyset_predicate(spec["keys"], after)
+        condition = f"{spec['filter']} {predicate}"
+    return spec["query"].format(page=int(page_size), after=condition), params
+
+
+def _key_value(value):
+    # Los códigos llegan como texto o enteros; el resto se guarda como texto y SQL Server lo convierte
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+class KeysetCheckpoint:
+    """Última clave confirmada de una tabla, con las filas y los bytes ya escritos en su temporal"""
+
+    def __init__(self, table, filepath, spec):
+        self.table = table
+        self.filepath = filepath
+        self.path = checkpoint_path(filepath)
+        self.temp_path = filepath + ".tmp"
+        # Si cambia la consulta o la clave, el punto de control anterior no sirve
+        self.fingerprint = hashlib.blake2b(
+            json.dumps([spec["query"], list(spec["keys"]), list(spec["positions"])]).encode("utf-8"),
+            digest_size=8,
+        ).hexdigest()
+
+    def load(self):
+        """Devuelve {"after", "rows", "size"} si hay una exportación a medias reanudable, o None"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+            if (
+                state.get("version") != CHECKPOINT_VERSION
+                or state.get("table") != self.table
+                or state.get("fingerprint") != self.fingerprint
+                or os.path.getsize(self.temp_path) < state["size"]
+            ):
+                return None
+            return {"after": state["after"], "rows": state["rows"], "size": state["size"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, after, rows, size):
+        """Se llama después de sincronizar el temporal: la página ya está en disco"""
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "table": self.table,
+            "fingerprint": self.fingerprint,
+            "after": [_key_value(value) for value in after],
+            "rows": rows,
+            "size": size,
+            "saved": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
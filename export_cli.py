@@ -0,0 +1,326 @@
+"""Exportación por lotes sin interfaz gráfica (no importa PyQt6), pensada para tareas programadas"""
+
+import argparse
+import os
+import re
+import sys
+
+from export_fanout import (
+    ALL_DATABASES,
+    FANOUT_MAX_WORKERS,
+    FANOUT_WORKERS,
+    ExportTarget,
+    FanOutExport,
+    format_summary,
+    load_targets,
+)
+from export_dedupe import DEDUPE_SPILL_KEYS
+from export_engine import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_CACHE_MB,
+    EXPORT_PARALLEL_MAX,
+    EXPORT_PARALLEL_TABLES,
+    CLIENT_JOIN_TABLES,
+    DELIMITER_ESCAPE_MODES,
+    KEYSET_PAGE_SIZE,
+    KEYSET_TABLES,
+    SANITIZE_PROCESS_MIN_ROWS,
+    SANITIZE_PROCESSES_MAX,
+    MAESTROS_TABLES,
+    RELACIONES_TABLES,
+    ExportEngine,
+    build_connection_string,
+    clean_special_characters,
+    export_filename,
+    normalize_text,
+)
+
+PASSWORD_ENV = "CONECTOR_SQL_PASSWORD"
+
+
+def _table_key(name):
+    # "Artículos - Códigos de Barras", "articulos_codigos_de_barras" y "ARTICULOS CODIGOS DE BARRAS" coinciden
+    return re.sub(r"[^a-z0-9]", "", clean_special_characters(normalize_text(name)).lower())
+
+
+def resolve_tables(names):
+    """Convierte los nombres indicados en la línea de comandos en nombres de tabla del exportador"""
+    available = MAESTROS_TABLES + RELACIONES_TABLES
+    by_key = {}
+    for table in available:
+        by_key[_table_key(table)] = table
+        by_key[_table_key(export_filename(table)[:-4])] = table
+
+    selected = []
+    unknown = []
+    for name in names:
+        key = _table_key(name)
+        if key == "maestros":
+            selected.extend(MAESTROS_TABLES)
+        elif key == "relaciones":
+            selected.extend(RELACIONES_TABLES)
+        elif key in ("todo", "todas", "all"):
+            selected.extend(available)
+        elif key in by_key:
+            selected.append(by_key[key])
+        else:
+            unknown.append(name)
+
+    # Mantener el orden de la interfaz y sin duplicados
+    selected = [table for table in available if table in selected]
+    return selected, unknown
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Exporta tablas de SQL Server a archivos TXT sin abrir la interfaz gráfica."
+    )
+    parser.add_argument(
+        "--instance", "-S", nargs="+", default=[], help="Instancia(s) SQL Server, p. ej. SERVIDOR\\SQLEXPRESS"
+    )
+    parser.add_argument("--database", "-d", nargs="+", default=[], help="Base(s) de datos a exportar")
+    parser.add_argument(
+        "--all-databases", action="store_true", help="Exporta todas las bases de usuario de cada instancia"
+    )
+    parser.add_argument(
+        "--targets", default=None, metavar="ARCHIVO",
+        help="Lista de destinos, una línea 'INSTANCIA;BASE' por base ('INSTANCIA' sola = todas sus bases)",
+    )
+    parser.add_argument(
+        "--fan-out", type=int, default=FANOUT_WORKERS,
+        help=f"Bases que se exportan a la vez cuando hay varias (1-{FANOUT_MAX_WORKERS})",
+    )
+    parser.add_argument("--user", "-U", default="", help="Usuario SQL (sin usuario se usa autenticación de Windows)")
+    parser.add_argument(
+        "--password", "-P", default=None, help=f"Contraseña SQL (por defecto se lee de la variable {PASSWORD_ENV})"
+    )
+    parser.add_argument(
+        "--tables", "-t", nargs="+", default=["todo"],
+        help="Tablas a exportar: nombres de tabla o de archivo, 'maestros', 'relaciones' o 'todo' (por defecto)",
+    )
+    parser.add_argument("--output", "-o", default="Maestros TXT", help="Carpeta de destino")
+    parser.add_argument(
+        "--parallel", type=int, default=EXPORT_PARALLEL_TABLES, help=f"Tablas en paralelo (1-{EXPORT_PARALLEL_MAX})"
+    )
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Filas por lote inicial de fetchmany")
+    parser.add_argument(
+        "--cache-mb", type=int, default=EXPORT_CACHE_MB, help="Memoria por tabla para la caché de normalización (0 la desactiva)"
+    )
+    parser.add_argument(
+        "--incremental", choices=["full", "delta"], default=None,
+        help="Compara con la exportación anterior: 'full' reescribe el archivo completo, "
+        "'delta' además deja altas, cambios y bajas en la subcarpeta delta",
+    )
+    parser.add_argument(
+        "--no-share-scans", action="store_true",
+        help="Ejecuta cada consulta por separado aunque varias tablas puedan compartir la misma lectura",
+    )
+    parser.add_argument(
+        "--client-join", nargs="+", default=[], metavar="TABLA",
+        help="Relaciones que se leen como Id y se unen en el cliente con índices en memoria ('todo' = todas las posibles)",
+    )
+    parser.add_argument(
+        "--batch-small", action="store_true",
+        help="Pide los maestros pequeños (Categoría, Marcas, Usos, Bancos, Forma de Pago) en un solo lote",
+    )
+    parser.add_argument(
+        "--resumable", action="store_true",
+        help="Lee las tablas grandes por páginas ordenadas por clave con punto de control; "
+        "si la exportación se corta, la siguiente con --resumable continúa desde la última página",
+    )
+    parser.add_argument("--page-size", type=int, default=KEYSET_PAGE_SIZE, help="Filas por página con --resumable")
+    parser.add_argument(
+        "--processes", type=int, default=0,
+        help=f"Procesos para sanitizar en paralelo (0-{SANITIZE_PROCESSES_MAX}); solo en tablas con al menos "
+        f"{SANITIZE_PROCESS_MIN_ROWS} filas estimadas y sin exportación incremental",
+    )
+    parser.add_argument(
+        "--columnar", action="store_true",
+        help="Limpia y formatea cada lote por columnas (textos repetidos una sola vez por lote) "
+        "en lugar de fila por fila; la salida es la misma",
+    )
+    parser.add_argument(
+        "--escape", choices=DELIMITER_ESCAPE_MODES, default="server",
+        help="Dónde se reemplaza el ';' dentro de los textos: server (REPLACE en las consultas) o client "
+        "(consultas con columnas crudas, reemplazo al escribir; mismo archivo, menos trabajo en el servidor)",
+    )
+    parser.add_argument(
+        "--client-dedupe", action="store_true",
+        help="Proveedores y Códigos de Barras se leen sin ROW_NUMBER() y las filas repetidas se descartan "
+        "en el cliente (evita el ordenamiento de la ventana en el servidor)",
+    )
+    parser.add_argument(
+        "--dedupe-spill", type=int, default=DEDUPE_SPILL_KEYS,
+        help="Claves en memoria antes de pasar a disco el conjunto de claves vistas de --client-dedupe",
+    )
+    parser.add_argument(
+        "--no-metrics", action="store_true",
+        help="No guarda el JSON de métricas por etapa en la subcarpeta metricas del destino",
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="Mide el pico de memoria con tracemalloc (hace la exportación más lenta)"
+    )
+    parser.add_argument("--list-tables", action="store_true", help="Muestra las tablas disponibles y termina")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Solo muestra el resumen final")
+    return parser
+
+
+def _describe_error(exc):
+    error_msg = str(exc)
+    if "Login failed" in error_msg:
+        return "Error de autenticación: Usuario o contraseña incorrectos"
+    if "timeout" in error_msg.lower():
+        return "Timeout: No se pudo conectar al servidor"
+    return error_msg
+
+
+def run_fan_out(args, targets, tables, options, password, log, status):
+    """Exporta varias bases con un pool acotado; cada una en su subcarpeta del destino"""
+    fan_out = FanOutExport(
+        targets,
+        lambda instance: build_connection_string(instance, args.user, password or ""),
+        options,
+        workers=args.fan_out,
+        on_target_status=status,
+        on_log=log,
+    )
+    try:
+        summary = fan_out.run(tables, args.output)
+    except KeyboardInterrupt:
+        fan_out.cancel()
+        print("⚠️ Exportación cancelada", file=sys.stderr)
+        return 130
+    except Exception as exc:
+        # Lo que no es de una base en particular (carpeta de destino, resumen): sin esto, un traceback
+        error_msg = _describe_error(exc)
+        print(f"❌ Error en la exportación: {error_msg}", file=sys.stderr)
+        return 2
+
+    print(f"✅ Exportación de varias bases terminada\n\n{format_summary(summary)}")
+    if summary["summary_file"]:
+        print(f"\nResumen: {os.path.abspath(summary['summary_file'])}")
+    return 0 if summary["ok_targets"] == len(summary["targets"]) else 1
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.list_tables:
+        print("MAESTROS:")
+        for table in MAESTROS_TABLES:
+            resumable = "  [--resumable]" if table in KEYSET_TABLES else ""
+            print(f"  {table}  ({export_filename(table)}){resumable}")
+        print("RELACIONES:")
+        for table in RELACIONES_TABLES:
+            flags = "".join(
+                flag for flag, tables in (("  [--client-join]", CLIENT_JOIN_TABLES), ("  [--resumable]", KEYSET_TABLES))
+                if table in tables
+            )
+            print(f"  {table}  ({export_filename(table)}){flags}")
+        return 0
+
+    targets = []
+    if args.targets:
+        try:
+            targets = load_targets(args.targets)
+        except (OSError, ValueError) as exc:
+            print(f"❌ No se pudo leer {args.targets}: {exc}", file=sys.stderr)
+            return 2
+    databases = [ALL_DATABASES] if args.all_databases else args.database
+    targets += [ExportTarget(instance, database) for instance in args.instance for database in databases]
+    if not targets:
+        parser.error("se requieren --instance y --database (o --all-databases), o --targets")
+
+    tables, unknown = resolve_tables(args.tables)
+    if unknown:
+        print(f"❌ Tablas desconocidas: {', '.join(unknown)} (usa --list-tables)", file=sys.stderr)
+        return 2
+    if not tables:
+        print("❌ Selecciona al menos una tabla o relación", file=sys.stderr)
+        return 2
+
+    client_join, unknown = resolve_tables(args.client_join)
+    unsupported = unknown + [table for table in client_join if table not in CLIENT_JOIN_TABLES]
+    if any(_table_key(name) in ("todo", "todas", "all") for name in args.client_join):
+        client_join = list(CLIENT_JOIN_TABLES)
+        unsupported = unknown
+    if unsupported:
+        print(f"❌ Sin unión en el cliente: {', '.join(unsupported)} (usa --list-tables)", file=sys.stderr)
+        return 2
+
+    password = args.password
+    if args.user and password is None:
+        password = os.environ.get(PASSWORD_ENV, "")
+
+    def log(table, text):
+        if not args.quiet:
+            print(f"[{table}] {text.strip()}")
+
+    def status(text):
+        if not args.quiet:
+            print(text)
+
+    options = {
+        "parallel_tables": args.parallel,
+        "batch_size": args.batch_size,
+        "cache_mb": args.cache_mb,
+        "incremental": args.incremental,
+        "share_scans": not args.no_share_scans,
+        "client_join": client_join,
+        "batch_small_tables": args.batch_small,
+        "save_metrics": not args.no_metrics,
+        "trace_memory": args.trace_memory,
+        "resumable": args.resumable,
+        "page_size": args.page_size,
+        "sanitize_processes": args.processes,
+        "columnar": args.columnar,
+        "delimiter_escape": args.escape,
+        "client_dedupe": args.client_dedupe,
+        "dedupe_spill_keys": args.dedupe_spill,
+    }
+
+    if len(targets) > 1 or targets[0].database == ALL_DATABASES:
+        return run_fan_out(args, targets, tables, options, password, log, status)
+
+    engine = ExportEngine(
+        build_connection_string(targets[0].instance, args.user, password or ""),
+        targets[0].database,
+        options,
+        on_table_status=status,
+        on_log=log,
+    )
+    try:
+        result = engine.run(tables, args.output)
+    except KeyboardInterrupt:
+        engine.cancel()
+        print("⚠️ Exportación cancelada", file=sys.stderr)
+        return 130
+    except Exception as exc:
+        error_msg = _describe_error(exc)
+        print(f"❌ Error en la exportación: {error_msg}", file=sys.stderr)
+        return 2
+
+    summary = "\n".join(result["exported_files"])
+    heading = "✅ Exportación completada!"
+    if result["cancelled"]:
+        heading = "⚠️ Exportación cancelada"
+        summary += "\n\nCanceladas (sin archivo nuevo):\n" + "\n".join(f"• {table}" for table in result["cancelled"])
+    print(
+        heading + "\n\n"
+        f"Tablas: {len(result['exported_files'])}/{result['total_tables']}\n"
+        f"Registros: {result['total_records']}\n"
+        f"Ubicación: {os.path.abspath(result['folder'])}\n\n"
+        f"Archivos:\n{summary}"
+    )
+    if result["metrics_file"]:
+        print(f"Métricas: {os.path.abspath(result['metrics_file'])}")
+    for table, error in result["failed"].items():
+        print(f"✗ {table}: Error ({error})", file=sys.stderr)
+    if result["cancelled"]:
+        return 130
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
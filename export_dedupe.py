@@ -0,0 +1,197 @@
+"""Depuración de filas repetidas en el cliente: la primera fila de cada clave, como ROW_NUMBER() = 1"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Claves en memoria antes de pasar el conjunto de claves vistas a un archivo temporal
+DEDUPE_SPILL_KEYS = 2000000
+DEDUPE_SPILL_MIN = 10000
+
+
+def _text_key(value):
+    # Intercalación CI de SQL Server: sin distinguir mayúsculas e ignorando espacios finales
+    return value.rstrip(" ").casefold()
+
+
+# Normalización de cada columna de la clave, equivalente a la expresión del PARTITION BY original
+PARTITION_NORMALIZERS = {
+    # La columna tal cual
+    "text": _text_key,
+    # REPLACE(col,';',' ')
+    "delimited": lambda value: _text_key(value.replace(";", " ")),
+    # UPPER(REPLACE(REPLACE(col,';',' '),' ','')): sin separadores ni espacios
+    "compact": lambda value: value.replace(";", "").replace(" ", "").casefold(),
+}
+
+
+def partition_key(columns):
+    """Función fila → clave normalizada a partir de [(posición, normalización), …]; NULL es su propia clave"""
+    normalizers = [(position, PARTITION_NORMALIZERS[kind]) for position, kind in columns]
+
+    def key(row):
+        parts = []
+        for position, normalize in normalizers:
+            value = row[position]
+            parts.append(None if value is None else normalize(value if type(value) is str else str(value)))
+        return tuple(parts)
+
+    return key
+
+
+def key_digest(key):
+    """Huella de 16 bytes de la clave: tamaño fijo en memoria y en disco, colisiones despreciables"""
+    return hashlib.blake2b(repr(key).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class SeenKeys:
+    """Conjunto de huellas ya vistas; pasado `spill_keys` se muda a una base SQLite temporal en disco"""
+
+    def __init__(self, spill_keys=DEDUPE_SPILL_KEYS):
+        self.spill_keys = max(DEDUPE_SPILL_MIN, spill_keys)
+        self.count = 0
+        self.path = None
+        self.peak_bytes = 0
+        self._memory = set()
+        self._db = None
+
+    @property
+    def on_disk(self):
+        return self._db is not None
+
+    def _spill(self):
+        self.peak_bytes = self.memory_bytes()
+        handle, self.path = tempfile.mkstemp(prefix="depuracion_", suffix=".sqlite")
+        os.close(handle)
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE vistas (huella BLOB PRIMARY KEY) WITHOUT ROWID")
+        self._db.execute("BEGIN")
+        self._db.executemany("INSERT INTO vistas VALUES (?)", ((digest,) for digest in self._memory))
+        self._db.execute("COMMIT")
+        self._memory = set()
+
+    def add_new(self, digests):
+        """Agrega las huellas de un lote (sin repetidas entre sí); devuelve el conjunto de las que no estaban"""
+        if self._db is None:
+            new = digests - self._memory
+            self._memory.update(new)
+            self.count += len(new)
+            if self.count > self.spill_keys:
+                self._spill()
+            return new
+
+        new = set()
+        cursor = self._db.cursor()
+        cursor.execute("BEGIN")
+        for digest in digests:
+            cursor.execute("INSERT OR IGNORE INTO vistas VALUES (?)", (digest,))
+            if cursor.rowcount == 1:
+                new.add(digest)
+        cursor.execute("COMMIT")
+        self.count += len(new)
+        return new
+
+    def memory_bytes(self):
+        if self._db is not None:
+            return 0
+        return sys.getsizeof(self._memory) + len(self._memory) * sys.getsizeof(bytes(16))
+
+    def peak_memory_bytes(self):
+        """El conjunto solo crece hasta mudarse a disco: el pico es el tamaño actual o el del momento de la mudanza"""
+        return self.peak_bytes if self._db is not None else self.memory_bytes()
+
+    def disk_bytes(self):
+        try:
+            return os.path.getsize(self.path) if self.path else 0
+        except OSError:
+            return 0
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+        self._memory = set()
+
+
+class StreamingDedupe:
+    """Filtra lote a lote las filas cuya clave ya apareció.
+
+    La consulta trae las filas ordenadas por el desempate del ROW_NUMBER original, así la primera fila
+    de cada clave es la que el servidor numeraba 1. Con `sorted_by_key` la consulta además viene
+    ordenada por la clave y basta comparar con la clave anterior (memoria constante); si no, se guarda
+    la huella de cada clave en un SeenKeys.
+    """
+
+    def __init__(self, columns, sorted_by_key=False, spill_keys=DEDUPE_SPILL_KEYS):
+        self.key = partition_key(columns)
+        self.sorted_by_key = sorted_by_key
+        self.seen = None if sorted_by_key else SeenKeys(spill_keys)
+        self.rows = 0
+        self.dropped = 0
+        self.keys = 0
+        self._previous = None
+
+    def filter(self, rows):
+        self.rows += len(rows)
+        key = self.key
+        kept = []
+        if self.sorted_by_key:
+            previous = self._previous
+            for row in rows:
+                current = key(row)
+                if current != previous:
+                    kept.append(row)
+                    previous = current
+            self._previous = previous
+            self.keys += len(kept)
+        else:
+            first = {}
+            for row in rows:
+                first.setdefault(key_digest(key(row)), row)
+            new = self.seen.add_new(first.keys())
+            kept = [row for digest, row in first.items() if digest in new]
+            self.keys = self.seen.count
+        self.dropped += len(rows) - len(kept)
+        return kept
+
+    def memory_bytes(self):
+        return 0 if self.seen is None else self.seen.peak_memory_bytes()
+
+    def to_dict(self):
+        return {
+            "mode": "ordenada" if self.sorted_by_key else ("disco" if self.seen.on_disk else "memoria"),
+            "rows": self.rows,
+            "dropped": self.dropped,
+            "keys": self.keys,
+            "peak_memory_mb": round(self.memory_bytes() / (1024 * 1024), 2),
+            "disk_mb": 0 if self.seen is None else round(self.seen.disk_bytes() / (1024 * 1024), 2),
+        }
+
+    def summary(self):
+        if self.sorted_by_key:
+            where = "ordenada por clave, sin conjunto en memoria"
+        elif self.seen.on_disk:
+            where = (
+                f"{self.seen.disk_bytes() / (1024 * 1024):.1f} MB en disco, "
+                f"{self.memory_bytes() / (1024 * 1024):.1f} MB en memoria antes de pasar a disco"
+            )
+        else:
+            where = f"{self.memory_bytes() / (1024 * 1024):.1f} MB en memoria"
+        return (
+            f"Depuración en el cliente: {self.rows} filas, {self.dropped} repetidas descartadas, "
+            f"{self.keys} claves ({where})"
+        )
+
+    def close(self):
+        if self.seen is not None:
+            self.seen.close()
@@ -0,0 +1,200 @@
+"""Exportación incremental: manifiesto por archivo y detección de filas nuevas, modificadas y eliminadas"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest"
+DELTA_FOLDER = "delta"
+
+# Un registro por línea exportada, en el mismo orden del archivo: hash de la clave y hash de la línea
+_RECORD = struct.Struct("<8s8s")
+
+
+def manifest_path(filepath):
+    return os.path.splitext(filepath)[0] + MANIFEST_SUFFIX
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+def _iter_lines(path):
+    """Recorre las líneas de un archivo mapeado en memoria, con su salto de línea original"""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield from iter(mm.readline, b"")
+
+
+class DeltaSummary:
+    def __init__(self, inserted=0, updated=0, deleted=0, baseline=True):
+        self.inserted = inserted
+        self.updated = updated
+        self.deleted = deleted
+        self.baseline = baseline
+
+    def __str__(self):
+        if not self.baseline:
+            return "Δ sin exportación anterior válida: se toma esta como base"
+        return f"Δ {self.inserted} nuevos, {self.updated} modificados, {self.deleted} eliminados"
+
+
+class DeltaTracker:
+    """Registra clave y hash de cada fila escrita y la compara con el manifiesto de la exportación anterior"""
+
+    def __init__(self, table, filepath, key_columns=None):
+        self.table = table
+        self.filepath = filepath
+        # Sin columnas clave la línea completa es la clave: solo hay altas y bajas
+        self.key_columns = list(key_columns) if key_columns else None
+        self._maxsplit = max(self.key_columns) + 1 if self.key_columns else 0
+        self.records = bytearray()
+        self.rows = 0
+
+    def _key(self, line):
+        if self.key_columns is None:
+            return line
+        fields = line.split(";", self._maxsplit)
+        return ";".join(fields[column] if column < len(fields) else "" for column in self.key_columns)
+
+    def add(self, lines):
+        """Se llama con las líneas ya formateadas de cada lote, antes de escribirlas"""
+        pack = _RECORD.pack
+        key = self._key
+        for line in lines:
+            self.records += pack(_digest(key(line).encode("utf-8")), _digest(line.encode("utf-8")))
+        self.rows += len(lines)
+
+    def load_previous(self):
+        """Devuelve {hash de clave: (hash de línea, número de línea)} de la exportación anterior, o None.
+
+        Una clave repetida (un artículo con varias filas de InvMinMax, líneas idénticas de una tabla sin
+        clave) guarda la lista de sus (hash de línea, número de línea).
+        """
+        path = manifest_path(self.filepath)
+        if not os.path.exists(path) or not os.path.exists(self.filepath):
+            return None
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header = json.loads(mm.readline())
+                stat = os.stat(self.filepath)
+                if (
+                    header.get("version") != MANIFEST_VERSION
+                    or header.get("key_columns") != self.key_columns
+                    or header.get("size") != stat.st_size
+                    or header.get("mtime_ns") != stat.st_mtime_ns
+                ):
+                    # El archivo anterior cambió fuera del exportador o la clave es otra: no sirve como base
+                    return None
+                start = mm.tell()
+                if (len(mm) - start) != header["rows"] * _RECORD.size:
+                    return None
+                previous = {}
+                # Copia contigua de los registros (16 bytes por fila) para recorrerlos con iter_unpack
+                for line_number, (key_hash, row_hash) in enumerate(_RECORD.iter_unpack(mm[start:])):
+                    old = previous.get(key_hash)
+                    if old is None:
+                        previous[key_hash] = (row_hash, line_number)
+                    elif old.__class__ is tuple:
+                        previous[key_hash] = [old, (row_hash, line_number)]
+                    else:
+                        old.append((row_hash, line_number))
+                return previous
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def compare(self, new_path, delta_folder=None):
+        """Compara las filas registradas (escritas en `new_path`) con la exportación anterior en `filepath`"""
+        previous = self.load_previous()
+        baseline = previous is not None
+        if not baseline:
+            # Sin base válida todas las filas son nuevas; los archivos delta no deben quedar de una ejecución anterior
+            previous = {}
+
+        # Las claves repetidas se comparan como multiconjunto: primero se emparejan las filas idénticas
+        # y después, con las filas anteriores que sobren de esa clave, las modificadas
+        inserted = set()
+        updated = set()
+        pending = []
+        for line_number, (key_hash, row_hash) in enumerate(_RECORD.iter_unpack(self.records)):
+            old = previous.get(key_hash)
+            if old is None:
+                inserted.add(line_number)
+            elif old.__class__ is tuple:
+                if old[0] == row_hash:
+                    del previous[key_hash]
+                else:
+                    pending.append((line_number, key_hash))
+            else:
+                for index in range(len(old) - 1, -1, -1):
+                    if old[index][0] == row_hash:
+                        del old[index]
+                        break
+                else:
+                    pending.append((line_number, key_hash))
+                if not old:
+                    del previous[key_hash]
+        for line_number, key_hash in pending:
+            old = previous.get(key_hash)
+            if old is None:
+                inserted.add(line_number)
+                continue
+            if old.__class__ is tuple or len(old) == 1:
+                del previous[key_hash]
+            else:
+                old.pop()
+            updated.add(line_number)
+        deleted = set()
+        for old in previous.values():
+            if old.__class__ is tuple:
+                deleted.add(old[1])
+            else:
+                deleted.update(line_number for _, line_number in old)
+
+        if delta_folder is not None:
+            os.makedirs(delta_folder, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(self.filepath))[0]
+            with open(os.path.join(delta_folder, f"{stem}_nuevos.txt"), "wb") as inserted_file, \
+                    open(os.path.join(delta_folder, f"{stem}_modificados.txt"), "wb") as updated_file:
+                for line_number, line in enumerate(_iter_lines(new_path)):
+                    if line_number in inserted:
+                        inserted_file.write(line)
+                    elif line_number in updated:
+                        updated_file.write(line)
+            # Las filas eliminadas solo existen en el archivo anterior, que aún no se reemplazó
+            with open(os.path.join(delta_folder, f"{stem}_eliminados.txt"), "wb") as deleted_file:
+                if deleted:
+                    for line_number, line in enumerate(_iter_lines(self.filepath)):
+                        if line_number in deleted:
+                            deleted_file.write(line)
+
+        return DeltaSummary(len(inserted), len(updated), len(deleted), baseline)
+
+    def save_manifest(self):
+        """Guarda el manifiesto del archivo ya reemplazado (tamaño y fecha validan la base siguiente)"""
+        stat = os.stat(self.filepath)
+        header = {
+            "version": MANIFEST_VERSION,
+            "table": self.table,
+            "key_columns": self.key_columns,
+            "rows": self.rows,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        content = json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + self.records
+        path = manifest_path(self.filepath)
+        try:
+            with open(path, "rb") as f:
+                if f.read() == content:
+                    # Exportación sin cambios: el manifiesto tampoco se toca
+                    return
+        except FileNotFoundError:
+            pass
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
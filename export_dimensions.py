@@ -0,0 +1,120 @@
+"""Índices Id → código de las tablas de dimensión, para unir las relaciones en el cliente"""
+
+import sys
+import threading
+import time
+
+# Marca de Id inexistente: un código NULL es un valor válido y no debe descartar la fila
+_MISSING = object()
+
+
+class DimensionIndex:
+    """Id → código de una tabla; lista indexada por Id cuando los Id son enteros densos, si no dict"""
+
+    def __init__(self, name, rows, code_description):
+        self.name = name
+        # Descripción de la columna de código (nombre, tipo, …) para el plan de escritura
+        self.code_description = code_description
+        self.count = len(rows)
+
+        ids = [row[0] for row in rows]
+        if ids and all(type(value) is int for value in ids):
+            low, high = min(ids), max(ids)
+            dense = (high - low + 1) <= 2 * len(ids) + 1024
+        else:
+            dense = False
+
+        if dense:
+            self.kind = "lista"
+            self._offset = low
+            self._codes = [_MISSING] * (high - low + 1)
+            for value, code in rows:
+                self._codes[value - low] = code
+        else:
+            self.kind = "dict"
+            self._offset = 0
+            self._codes = {value: code for value, code in rows}
+
+        codes = {id(code): code for _, code in rows}
+        self.memory_bytes = sys.getsizeof(self._codes) + sum(sys.getsizeof(code) for code in codes.values())
+
+    def getter(self):
+        """Función Id → código (o _MISSING) optimizada para el tipo de índice"""
+        codes = self._codes
+        if self.kind == "dict":
+            return lambda value: codes.get(value, _MISSING)
+
+        offset = self._offset
+        size = len(codes)
+
+        def get(value):
+            if type(value) is not int:
+                return _MISSING
+            index = value - offset
+            if 0 <= index < size:
+                return codes[index]
+            return _MISSING
+
+        return get
+
+    def summary(self):
+        return f"Índice {self.name}: {self.count} ids ({self.kind}), {self.memory_bytes / (1024 * 1024):.1f} MB"
+
+
+class DimensionCache:
+    """Carga cada dimensión una sola vez por exportación, aunque la pidan varias consultas en paralelo"""
+
+    def __init__(self, queries, on_log=None):
+        self.queries = queries
+        self.on_log = on_log
+        self._indexes = {}
+        self._locks = {name: threading.Lock() for name in queries}
+
+    def get(self, connection, name):
+        with self._locks[name]:
+            index = self._indexes.get(name)
+            if index is None:
+                started = time.perf_counter()
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(self.queries[name])
+                    code_description = cursor.description[1]
+                    rows = [(row[0], row[1]) for row in cursor.fetchall()]
+                finally:
+                    cursor.close()
+                index = DimensionIndex(name, rows, code_description)
+                self._indexes[name] = index
+                if self.on_log is not None:
+                    self.on_log("Dimensiones", f"{index.summary()}, cargado en {time.perf_counter() - started:.2f} s")
+            return index
+
+    def memory_bytes(self):
+        return sum(index.memory_bytes for index in self._indexes.values())
+
+    def row_joiner(self, description, columns):
+        """Devuelve (descripción unida, función que traduce los Id de cada lote a códigos).
+
+        `columns` es {posición: dimensión}, con las dimensiones ya cargadas por get(). Como en el
+        INNER JOIN del servidor, las filas con un Id nulo o inexistente se descartan.
+        """
+        getters = []
+        joined_description = list(description)
+        for position, name in sorted(columns.items()):
+            index = self._indexes[name]
+            getters.append((position, index.getter()))
+            joined_description[position] = index.code_description
+
+        def join_rows(rows):
+            joined = []
+            for row in rows:
+                values = list(row)
+                for position, get in getters:
+                    code = get(values[position])
+                    if code is _MISSING:
+                        break
+                    values[position] = code
+                else:
+                    joined.append(values)
+            return joined
+
+        return joined_description, join_rows
@@ -0,0 +1,2080 @@
+"""Motor de exportación a TXT sin dependencias de Qt, compartido por la interfaz y el modo por lotes"""
+
+import os
+import re
+import sys
+import time
+import uuid
+import queue
+import hashlib
+import decimal
+import datetime
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from export_checkpoint import KeysetCheckpoint, keyset_page_query
+from export_dedupe import DEDUPE_SPILL_KEYS, StreamingDedupe
+from export_delta import DELTA_FOLDER, DeltaTracker
+from export_dimensions import DimensionCache
+from export_metrics import RunMetrics
+
+# Parámetros de lectura por lotes (fetchmany) durante la exportación
+EXPORT_BATCH_SIZE = 5000
+EXPORT_BATCH_MIN = 500
+EXPORT_BATCH_MAX = 100000
+EXPORT_BATCH_TARGET_BYTES = 8 * 1024 * 1024
+EXPORT_BATCH_TARGET_SECONDS = 0.5
+
+# Sanitización en un pool de procesos (0 = en el mismo proceso). Solo para tablas con al menos
+# SANITIZE_PROCESS_MIN_ROWS filas estimadas: en las pequeñas la copia entre procesos cuesta más que lo que se gana
+SANITIZE_PROCESSES_MAX = 32
+SANITIZE_PROCESS_MIN_ROWS = 200000
+# Lotes en vuelo por proceso entre la lectura y la escritura: acota la memoria de la tubería
+SANITIZE_QUEUE_DEPTH = 2
+
+# Filas por página de la exportación reanudable (una consulta corta y un punto de control por página)
+KEYSET_PAGE_SIZE = 50000
+KEYSET_PAGE_MIN = 1000
+KEYSET_PAGE_MAX = 1000000
+
+# Tablas exportadas en paralelo (una conexión del pool por tabla en curso)
+EXPORT_PARALLEL_TABLES = 4
+EXPORT_PARALLEL_MAX = 8
+
+# Intervalo mínimo entre avisos de progreso (s): el aviso nunca debe frenar la escritura
+PROGRESS_INTERVAL = 0.25
+
+# Memoria máxima por tabla para la caché de valores ya sanitizados (0 la desactiva)
+EXPORT_CACHE_MB = 32
+EXPORT_CACHE_MAX_MB = 512
+
+_pyodbc = None
+
+
+def load_pyodbc():
+    """Importa pyodbc la primera vez que se necesita (carga el gestor ODBC, que es lento)"""
+    global _pyodbc
+    if _pyodbc is None:
+        import pyodbc
+
+        _pyodbc = pyodbc
+    return _pyodbc
+
+
+class AdaptiveBatchSizer:
+    """Ajusta el tamaño de lote según el ancho de fila y la latencia de fetch"""
+
+    def __init__(
+        self,
+        initial=EXPORT_BATCH_SIZE,
+        minimum=EXPORT_BATCH_MIN,
+        maximum=EXPORT_BATCH_MAX,
+        target_bytes=EXPORT_BATCH_TARGET_BYTES,
+        target_seconds=EXPORT_BATCH_TARGET_SECONDS,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.target_bytes = target_bytes
+        self.target_seconds = target_seconds
+        self.batch_size = self._clamp(initial)
+
+    def _clamp(self, size):
+        return max(self.minimum, min(self.maximum, int(size)))
+
+    def record(self, rows, elapsed, size_bytes):
+        """Recalcula el siguiente lote a partir del último fetch medido"""
+        if rows <= 0:
+            return self.batch_size
+
+        # Límite por memoria: cuántas filas de este ancho caben en el objetivo de bytes
+        row_width = max(1.0, size_bytes / rows)
+        by_width = self.target_bytes / row_width
+
+        # Límite por latencia: cuántas filas se leen en el tiempo objetivo
+        if elapsed > 0:
+            by_latency = self.target_seconds * rows / elapsed
+        else:
+            by_latency = self.maximum
+
+        # Crecer o reducir como máximo al doble/mitad por lote para evitar oscilaciones
+        wanted = min(by_width, by_latency)
+        wanted = max(self.batch_size / 2, min(self.batch_size * 2, wanted))
+        self.batch_size = self._clamp(wanted)
+        return self.batch_size
+
+
+# Separador de campos de los TXT; las consultas originales lo reemplazan por un espacio con REPLACE
+FIELD_DELIMITER = ";"
+
+# Caracteres problemáticos comunes en archivos de texto
+PROBLEMATIC_CHARS = {
+    '\x00': '',  # Null character
+    '\x01': '',  # Start of Header
+    '\x02': '',  # Start of Text
+    '\x03': '',  # End of Text
+    '\x04': '',  # End of Transmission
+    '\x05': '',  # Enquiry
+    '\x06': '',  # Acknowledge
+    '\x07': '',  # Bell
+    '\x08': '',  # Backspace
+    '\x0b': '',  # Vertical Tab
+    '\x0c': '',  # Form Feed
+    '\x0e': '',  # Shift Out
+    '\x0f': '',  # Shift In
+    '\x10': '',  # Data Link Escape
+    '\x11': '',  # Device Control 1
+    '\x12': '',  # Device Control 2
+    '\x13': '',  # Device Control 3
+    '\x14': '',  # Device Control 4
+    '\x15': '',  # Negative Acknowledge
+    '\x16': '',  # Synchronous Idle
+    '\x17': '',  # End of Transmission Block
+    '\x18': '',  # Cancel
+    '\x19': '',  # End of Medium
+    '\x1a': '',  # Substitute
+    '\x1b': '',  # Escape
+    '\x1c': '',  # File Separator
+    '\x1d': '',  # Group Separator
+    '\x1e': '',  # Record Separator
+    '\x1f': '',  # Unit Separator
+    '\x7f': '',  # Delete
+    '\ufffe': '', # BOM
+    '\uffff': '', # BOM
+    '´': '',     # Acento agudo
+    '`': '',     # Acento grave
+    '‘': '',     # Apostrofo curvo izquierdo
+    '’': '',     # Apostrofo curvo derecho
+    "'": "",     # Apostrofo simple
+}
+
+
+def normalize_text(value):
+    """Elimina tildes, caracteres especiales y convierte ñ a n"""
+    if value is None:
+        return ""
+    
+    value_str = str(value)
+    
+    # Si está vacío, retornar vacío
+    if not value_str.strip():
+        return value_str
+    
+    # Si es un número o contiene solo dígitos, puntos, comas y signos, no normalizar
+    cleaned = value_str.replace('.', '').replace(',', '').replace('-', '').replace('+', '').strip()
+    if cleaned.isdigit() or cleaned == '':
+        return value_str
+    
+    # Verificar si contiene letras (texto), si no contiene letras no normalizar
+    has_letters = any(char.isalpha() for char in value_str)
+    if not has_letters:
+        return value_str
+    
+    # Primero convertir ñ y Ñ a n y N
+    value_str = value_str.replace('ñ', 'n').replace('Ñ', 'N')
+    
+    # Eliminar caracteres especiales como acentos graves y apostrofos
+    value_str = value_str.replace('´', '').replace('`', '').replace("'", "").replace("‘", "").replace("’", "")
+    
+    # Normalizar y eliminar diacríticos (tildes, acentos, etc.) solo para texto
+    nfd = unicodedata.normalize('NFD', value_str)
+    # Filtrar solo los caracteres que no son marcas diacríticas (combining characters)
+    normalized = ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
+    
+    return normalized
+
+
+def clean_special_characters(text):
+    """Elimina caracteres especiales problemáticos manteniendo la legibilidad"""
+    if not text:
+        return text
+    
+    cleaned_text = text
+    for char, replacement in PROBLEMATIC_CHARS.items():
+        cleaned_text = cleaned_text.replace(char, replacement)
+    
+    return cleaned_text
+
+
+# Marcas de apóstrofo y acento que normalize_text elimina de los textos
+TEXT_REMOVED_CHARS = "´`'‘’"
+
+# Planos Unicode donde existen descomposiciones canónicas o marcas diacríticas (Mn)
+_SANITIZER_RANGES = (
+    range(0x80, 0xD800),
+    range(0xE000, 0x30000),
+    range(0xE0000, 0xE1000),
+)
+
+
+class TextSanitizer:
+    """Equivale a clean_special_characters(normalize_text(value)) en una sola pasada de str.translate"""
+
+    _ascii_removed = re.compile("[" + re.escape("".join(c for c in PROBLEMATIC_CHARS if c.isascii())) + "]")
+    _astral = re.compile("[\U00010000-\U0010FFFF]")
+
+    def __init__(self):
+        # Tabla para valores que no se normalizan (números, vacíos): solo limpieza
+        self.clean_table = {ord(char): None for char in PROBLEMATIC_CHARS}
+
+        # Tabla para textos: ñ → n, apóstrofos, diacríticos (NFD sin Mn) y limpieza, por carácter
+        self.text_table = dict(self.clean_table)
+        self.text_table[ord("ñ")] = "n"
+        self.text_table[ord("Ñ")] = "N"
+        for char in TEXT_REMOVED_CHARS:
+            self.text_table[ord(char)] = None
+
+        reordered = []
+        for code in (code for code_range in _SANITIZER_RANGES for code in code_range):
+            if code in self.text_table:
+                continue
+            char = chr(code)
+            if unicodedata.category(char) == "Mn":
+                self.text_table[code] = None
+                continue
+            nfd = unicodedata.normalize("NFD", char)
+            if nfd != char:
+                nfd = "".join(c for c in nfd if unicodedata.category(c) != "Mn")
+                self.text_table[code] = clean_special_characters(nfd) or None
+            # NFD reordena marcas combinantes; si alguna sobrevive al filtro, el orden importa
+            if any(unicodedata.combining(c) for c in nfd):
+                reordered.append(re.escape(char))
+
+        # Textos con esos caracteres (escrituras índicas, símbolos musicales) usan el camino original
+        reordered_bmp = [char for char in reordered if ord(char[-1]) < 0x10000]
+        self._reordered = re.compile(f"[{''.join(reordered)}]") if reordered else None
+        self._reordered_bmp = re.compile(f"[{''.join(reordered_bmp)}]") if reordered_bmp else None
+
+        # Copias en lista para el plano básico: str.translate indexa una lista mucho más rápido que un dict
+        self._clean_bmp = [None if code in self.clean_table else code for code in range(0x10000)]
+        self._text_bmp = list(self._clean_bmp)
+        for code, replacement in self.text_table.items():
+            if code < 0x10000:
+                self._text_bmp[code] = replacement
+
+    def sanitize(self, value):
+        if value is None:
+            return ""
+        value_str = value if type(value) is str else str(value)
+
+        # Camino rápido: en ASCII el texto y los números solo pierden controles y apóstrofos
+        if value_str.isascii():
+            if self._ascii_removed.search(value_str) is None:
+                return value_str
+            return value_str.translate(self._clean_bmp)
+
+        # Sin letras (vacíos, números, signos) normalize_text no modifica el valor
+        astral = self._astral.search(value_str) is not None
+        if not any(char.isalpha() for char in value_str):
+            return value_str.translate(self.clean_table if astral else self._clean_bmp)
+
+        reordered = self._reordered if astral else self._reordered_bmp
+        if reordered is not None and reordered.search(value_str):
+            return clean_special_characters(normalize_text(value_str))
+        return value_str.translate(self.text_table if astral else self._text_bmp)
+
+    def sanitize_column(self, values):
+        """Sanitiza una columna de texto completa (None → ""), con el mismo resultado que sanitize por celda.
+
+        Una columna ASCII se limpia con un solo translate sobre la columna unida; si no, cada valor
+        distinto del lote se sanitiza una sola vez.
+        """
+        values = [value or "" for value in values]
+        joined = "\n".join(values)
+        # El separador no debe aparecer dentro de los valores para poder volver a partir la columna
+        if joined.isascii() and joined.count("\n") == len(values) - 1:
+            if self._ascii_removed.search(joined) is None:
+                return values
+            return joined.translate(self._clean_bmp).split("\n")
+        sanitize = self.sanitize
+        sanitized = {value: sanitize(value) for value in set(values)}
+        return [sanitized[value] for value in values]
+
+
+# Tipos de columna (type_code de cursor.description) cuyo str() nunca requiere normalización
+DIRECT_FORMAT_TYPES = (
+    int,
+    float,
+    decimal.Decimal,
+    datetime.date,
+    datetime.time,
+    uuid.UUID,
+)
+
+
+def _format_direct(value):
+    return "" if value is None else str(value)
+
+
+class SanitizerCache:
+    """Memoiza valores de texto ya sanitizados con expulsión LRU acotada por memoria"""
+
+    # Costo aproximado de cada entrada del OrderedDict además de las cadenas
+    _entry_overhead = 100
+
+    def __init__(self, sanitizer, max_bytes):
+        self._sanitize = sanitizer.sanitize
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self.column_stats = {}
+
+    def _store(self, value, result):
+        entries = self._entries
+        size = self._entry_overhead + sys.getsizeof(value)
+        if result is not value:
+            size += sys.getsizeof(result)
+        entries[value] = (result, size)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes and entries:
+            _, (_, evicted_size) = entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+            self.evictions += 1
+
+    def column(self, name):
+        """Devuelve el sanitizador memoizado de una columna, con sus propios aciertos y fallos"""
+        entries = self._entries
+        move_to_end = entries.move_to_end
+        sanitize = self._sanitize
+        store = self._store
+        stats = self.column_stats.setdefault(name, [0, 0])
+
+        def sanitize_cached(value):
+            # Solo se memoizan cadenas: 1, 1.0 y True comparten hash pero no texto
+            if type(value) is not str:
+                return sanitize(value)
+            entry = entries.get(value)
+            if entry is None:
+                stats[1] += 1
+                result = sanitize(value)
+                store(value, result)
+                return result
+            stats[0] += 1
+            move_to_end(value)
+            return entry[0]
+
+        return sanitize_cached
+
+    def summary(self):
+        parts = []
+        for name, (hits, misses) in self.column_stats.items():
+            total = hits + misses
+            ratio = (hits / total * 100) if total else 0
+            parts.append(f"{name}: {hits} aciertos / {misses} fallos ({ratio:.0f}%)")
+        return (
+            f"Caché de normalización ({self.size_bytes / 1048576:.1f} MB, "
+            f"{len(self._entries)} valores, {self.evictions} expulsados) — " + "; ".join(parts)
+        )
+
+
+def _escape_delimiter(value):
+    """Lo mismo que REPLACE(col,';',' ') en la consulta: sobre el valor crudo, antes de sanitizar"""
+    if value.__class__ is str and FIELD_DELIMITER in value:
+        return value.replace(FIELD_DELIMITER, " ")
+    return value
+
+
+def _escaping(formatter):
+    """Reemplazo del separador en el cliente, en el mismo orden que el servidor: primero REPLACE, después
+    sanitizar (U+037E se vuelve ';' al sanitizar y queda igual que en la consulta original)
+    """
+    def format_escaped(value):
+        return formatter(_escape_delimiter(value))
+
+    return format_escaped
+
+
+def build_row_formatter(description, sanitizer, cache=None, escape=()):
+    """Arma el plan de escritura por columna: numéricos, bit y fechas directo, texto sanitizado.
+
+    En las posiciones de `escape` el separador se reemplaza por un espacio antes de sanitizar.
+    """
+    if not description:
+        formatters = None
+    else:
+        formatters = []
+        for index, column in enumerate(description):
+            if isinstance(column[1], type) and issubclass(column[1], DIRECT_FORMAT_TYPES):
+                formatter = _format_direct
+            elif cache is not None:
+                formatter = cache.column(column[0] or f"columna {index + 1}")
+            else:
+                formatter = sanitizer.sanitize
+            formatters.append(_escaping(formatter) if index in escape else formatter)
+
+    if formatters is None:
+        sanitize = sanitizer.sanitize
+
+        def format_row(row):
+            return ";".join([sanitize(value) for value in row])
+    elif all(formatter is _format_direct for formatter in formatters):
+        def format_row(row):
+            return ";".join(["" if value is None else str(value) for value in row])
+    else:
+        def format_row(row):
+            return ";".join([formatter(value) for formatter, value in zip(formatters, row)])
+
+    return format_row
+
+
+def encode_lines(lines):
+    """Bloque de líneas listo para escribir: modo binario con os.linesep, los mismos bytes que el modo texto"""
+    block = "\n".join(lines) + "\n"
+    if os.linesep != "\n":
+        block = block.replace("\n", os.linesep)
+    return block.encode("utf-8")
+
+
+# Formateadores de cada proceso del pool de sanitización, por descripción de columnas
+_process_formatters = {}
+
+
+def _format_block(description, rows, cache_bytes, columnar=False, escape=()):
+    """En un proceso del pool: sanitiza, formatea y codifica un lote; devuelve (bytes, filas)"""
+    key = (description, columnar, escape)
+    format_batch = _process_formatters.get(key)
+    if format_batch is None:
+        if len(_process_formatters) >= 32:
+            _process_formatters.clear()
+        sanitizer = get_text_sanitizer()
+        if columnar:
+            format_batch = build_batch_formatter(description, sanitizer, escape)
+        else:
+            cache = SanitizerCache(sanitizer, cache_bytes) if cache_bytes > 0 else None
+            format_row = build_row_formatter(description, sanitizer, cache, escape)
+
+            def format_batch(rows):
+                return list(map(format_row, rows))
+
+        _process_formatters[key] = format_batch
+    return encode_lines(format_batch(rows)), len(rows)
+
+
+def build_batch_formatter(description, sanitizer, escape=()):
+    """Camino por columnas: transpone cada lote, procesa una columna entera por vez y une las columnas
+    con ';' al final. Devuelve format_batch(rows) → líneas, idénticas a las de build_row_formatter.
+    """
+    sanitize = sanitizer.sanitize
+    kinds = []
+    for column in description or ():
+        if isinstance(column[1], type) and issubclass(column[1], DIRECT_FORMAT_TYPES):
+            kinds.append("direct")
+        elif column[1] is str:
+            kinds.append("text")
+        else:
+            kinds.append("other")
+
+    def format_column(kind, column):
+        if kind == "direct":
+            return ["" if value is None else str(value) for value in column]
+        if kind == "text":
+            return sanitizer.sanitize_column(column)
+        return list(map(sanitize, column))
+
+    def format_batch(rows):
+        if not rows:
+            return []
+        columns = list(zip(*rows))
+        # El separador se reemplaza en los valores crudos, antes de sanitizar, como en el camino por filas
+        for index in escape:
+            if index < len(columns):
+                columns[index] = list(map(_escape_delimiter, columns[index]))
+        if len(kinds) == len(columns):
+            formatted = [format_column(kind, column) for kind, column in zip(kinds, columns)]
+        else:
+            formatted = [format_column("other", column) for column in columns]
+        return list(map(FIELD_DELIMITER.join, zip(*formatted)))
+
+    return format_batch
+
+
+_text_sanitizer = None
+_text_sanitizer_lock = threading.Lock()
+
+
+def get_text_sanitizer():
+    """Construye las tablas del sanitizador una sola vez por proceso"""
+    global _text_sanitizer
+    if _text_sanitizer is None:
+        with _text_sanitizer_lock:
+            if _text_sanitizer is None:
+                _text_sanitizer = TextSanitizer()
+    return _text_sanitizer
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones pyodbc abiertas con la misma cadena de conexión"""
+
+    def __init__(self, conn_str, database, size, on_open=None):
+        self.conn_str = conn_str
+        self.database = database
+        # Recibe los segundos que tardó cada conexión nueva (métricas)
+        self.on_open = on_open
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._lock = threading.Lock()
+        self._opened = []
+
+    def _open(self):
+        started = time.perf_counter()
+        conn = open_connection(self.conn_str, self.database)
+        if self.on_open is not None:
+            self.on_open(time.perf_counter() - started)
+        with self._lock:
+            self._opened.append(conn)
+        return conn
+
+    def acquire(self):
+        """Entrega una conexión libre; bloquea si ya hay `size` conexiones en uso"""
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._open()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        if broken:
+            # Una conexión que falló no vuelve al pool; la siguiente tabla abrirá otra
+            with self._lock:
+                if conn in self._opened:
+                    self._opened.remove(conn)
+            try:
+                conn.close()
+            except Exception:
+                pass
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    def close_all(self):
+        with self._lock:
+            opened, self._opened = self._opened, []
+        for conn in opened:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+# Consultas MAESTROS (las originales)
+MAESTROS_QUERIES = {
+    "Artículos": "SELECT CodigoArticulo, REPLACE(Descripcion,';',' '), "
+    "REPLACE(DescripcionLarga,';',' '), CPE, PermisoSanitario, "
+    "CAST(ValorMaximo as int), CAST(ValorMinimo as int), "
+    "CASE WHEN DerechoOferta IS NULL THEN 'NULL' ELSE CAST(DerechoOferta as int) END, "
+    "CAST(GenerarEtiquetaCompras as int) "
+    "FROM InvArticulo JOIN InvMinMax on InvMinMax.InvArticuloId = InvArticulo.Id",
+    "Categoría": "SELECT CodigoCategoria, REPLACE(Descripcion,';',' ') FROM InvCategoria",
+    "Control Sanitario": "SELECT CodigoControl, REPLACE(Descripcion,';',' ') FROM InvControlSanitario",
+    "Marcas": "SELECT Codigo, REPLACE(Nombre,';',' '), "
+    "CASE WHEN Nota IS NULL THEN 'NULL' ELSE REPLACE(Nota,';',' ') END FROM InvMarca",
+    "Usos": "SELECT Codigo, REPLACE(Descripcion,';',' ') FROM InvUso",
+    "Proveedores": """WITH ProveedoresLimpios AS (
+SELECT 
+    CodigoProveedor, 
+    REPLACE(Nombre,';',' ') AS NombreLimpio,
+    CASE WHEN Apellido IS NULL THEN 'NULL' ELSE REPLACE(Apellido,';',' ') END AS ApellidoLimpio,
+    REPLACE(IdentificacionFiscal,';',' ') AS IdentificacionFiscalLimpia,
+    Telefono, 
+    Representante, 
+    Contactos,
+    CASE WHEN NombreEnCheque IS NULL THEN 'NULL' ELSE REPLACE(NombreEnCheque,';',' ') END AS NombreEnChequeLimpio,
+    TipoContribuyente, 
+    TipoPersona, 
+    tipoProveedor,
+    ROW_NUMBER() OVER (
+        PARTITION BY 
+            REPLACE(IdentificacionFiscal,';',' '),
+            UPPER(REPLACE(REPLACE(Nombre,';',' '), ' ', ''))
+        ORDER BY CodigoProveedor ASC
+    ) AS FilaNum
+FROM ComProveedor AS cp 
+JOIN GenPersona AS g ON g.Id = cp.GenPersonaId 
+)
+SELECT 
+CodigoProveedor, 
+NombreLimpio,
+ApellidoLimpio,
+IdentificacionFiscalLimpia,
+Telefono, 
+Representante, 
+Contactos,
+NombreEnChequeLimpio,
+TipoContribuyente, 
+TipoPersona, 
+tipoProveedor
+FROM ProveedoresLimpios
+WHERE FilaNum = 1
+ORDER BY CodigoProveedor ASC""",
+    "Principios Activos": "SELECT Codigo, REPLACE(Nombre,';',' '), CAST(SustanciaControlada as int) "
+    "FROM InvComponente",
+    "Bancos": "SELECT Codigo, REPLACE(Descripcion,';',' '), REPLACE(Nombre,';',' '), "
+    "tipoConfiguracion, estado FROM BanBanco",
+    "Forma de Pago": "SELECT Codigo, Nombre, Descripcion, estado, tipoFormaPago, "
+    "AplicaRetencion, PorcentajeRetencion, AplicaComisionFormaPago, PorcentajeComisionFormaPago, "
+    "CodigoImpresoraFiscal, AplicaIva "
+    "FROM BanFormaPago WHERE Codigo IN ('FP01','FP02','FP03','FP04','FP05','FP06','FP07')",
+}
+
+# Consultas RELACIONES
+RELACIONES_QUERIES = {
+    "Artículos - Categorías": "SELECT CodigoArticulo, CodigoCategoria FROM InvArticulo JOIN InvCategoria on InvCategoria.Id = InvArticulo.InvCategoriaId",
+    "Artículos - Códigos de Barras": """WITH CodigosBarrasLimpios AS (
+SELECT 
+    CodigoArticulo, 
+    CodigoBarra, 
+    CAST(EsPrincipal as int) AS EsPrincipal,
+    ROW_NUMBER() OVER (
+        PARTITION BY CodigoBarra 
+        ORDER BY EsPrincipal DESC, CodigoArticulo ASC
+    ) AS FilaNum
+FROM InvArticulo 
+JOIN InvCodigoBarra on InvCodigoBarra.InvArticuloId = InvArticulo.Id
+WHERE CodigoBarra IS NOT NULL AND CodigoBarra != ''
+)
+SELECT CodigoArticulo, CodigoBarra, EsPrincipal
+FROM CodigosBarrasLimpios
+WHERE FilaNum = 1""",
+    "Artículos - Componentes": "select InvArticulo.CodigoArticulo, InvComponente.Codigo from InvArticuloComponente join InvComponente on InvComponente.Id = InvArticuloComponente.InvComponenteId join InvArticulo on InvArticulo.Id = InvArticuloComponente.InvArticuloId",
+    "Artículos - Control Sanitario": "SELECT CodigoArticulo, InvControlSanitario.CodigoControl FROM InvArticulo JOIN InvControlSanitario on InvControlSanitario.Id = InvArticulo.InvControlSanitarioId",
+    "Artículos - Marcas": "SELECT CodigoArticulo, Codigo FROM InvArticulo JOIN InvMarca on InvMarca.Id = InvArticulo.InvMarcaId",
+    "Artículos - Principio Activo": "SELECT CodigoArticulo, InvComponente.Codigo FROM InvArticuloComponente JOIN InvArticulo on InvArticulo.Id = InvArticuloComponente.InvArticuloId JOIN InvComponente on InvComponente.Id = InvArticuloComponente.InvComponenteId",
+    "Artículos - Unidades de Medida": "SELECT a.CodigoArticulo, um.Codigo, um.Codigo, CAST(au.FactorConversion as int), um.Codigo, CAST(au.FactorConversion as int) "
+    "FROM InvArticulo a JOIN InvArticuloUnidad au on au.InvArticuloId=a.Id JOIN InvUnidadMedida um on um.Id=au.InvUnidadMedidaId ",
+    "Artículos - Usos": "SELECT CodigoArticulo, InvUso.Codigo FROM InvArticuloUso JOIN InvArticulo on InvArticulo.Id = InvArticuloUso.InvArticuloId JOIN InvUso on InvUso.Id = InvArticuloUso.InvUsoId",
+    "Artículos - Impuesto": "SELECT ex.CodigoArticulo, CAST(MAX(ex.tarifaI) AS NUMERIC(10,2)) as TarifaCompra, CAST(MAX(ex.tarifaV) AS NUMERIC(10,2)) as TarifaVenta FROM ( SELECT a.CodigoArticulo, CASE WHEN MAX(fcv.TarifaImpuesto) IS NULL THEN 0 ELSE CAST(MAX(fcv.TarifaImpuesto) AS DECIMAL(10,2)) END as tarifaI, CASE WHEN MAX(fcv2.TarifaImpuesto) IS NULL THEN 0 ELSE CAST(MAX(fcv2.TarifaImpuesto) AS DECIMAL(10,2)) END as tarifaV FROM InvArticulo a LEFT JOIN FinConceptoVigencia fcv ON fcv.FinConceptoImptoId = a.FinConceptoImptoIdCompra LEFT JOIN FinConceptoVigencia fcv2 ON fcv2.FinConceptoImptoId = a.FinConceptoImptoIdVenta GROUP BY a.CodigoArticulo ) as ex GROUP BY ex.CodigoArticulo",
+    "Artículos - Atributos (Medicina)": "SELECT InvArticulo.CodigoArticulo FROM InvArticulo JOIN InvArticuloAtributo ON InvArticuloAtributo.InvArticuloId = InvArticulo.Id JOIN InvAtributo ON InvAtributo.Id = InvArticuloAtributo.InvAtributoId WHERE InvAtributo.Descripcion = 'Medicina' ORDER BY InvArticulo.CodigoArticulo ASC",
+    "Artículos - Atributos (Genérico)": "SELECT InvArticulo.CodigoArticulo FROM InvArticulo JOIN InvArticuloAtributo ON InvArticuloAtributo.InvArticuloId = InvArticulo.Id JOIN InvAtributo ON InvAtributo.Id = InvArticuloAtributo.InvAtributoId WHERE InvAtributo.Descripcion = 'Genérico' ORDER BY InvArticulo.CodigoArticulo ASC",
+}
+
+MAESTROS_TABLES = list(MAESTROS_QUERIES)
+RELACIONES_TABLES = list(RELACIONES_QUERIES)
+
+# Columnas de la línea exportada que identifican una fila en la exportación incremental.
+# Las tablas sin entrada usan la línea completa como clave (solo altas y bajas).
+TABLE_KEY_COLUMNS = {
+    **{table: (0,) for table in MAESTROS_TABLES},
+    "Artículos - Categorías": (0,),
+    "Artículos - Códigos de Barras": (1,),
+    "Artículos - Componentes": (0, 1),
+    "Artículos - Control Sanitario": (0,),
+    "Artículos - Marcas": (0,),
+    "Artículos - Principio Activo": (0, 1),
+    "Artículos - Unidades de Medida": (0, 1),
+    "Artículos - Usos": (0, 1),
+    "Artículos - Impuesto": (0,),
+}
+
+# Modos de exportación incremental: None (desactivada), "full" (archivo completo + manifiesto)
+# y "delta" (además, archivos de altas, cambios y bajas en la subcarpeta delta)
+INCREMENTAL_MODES = (None, "full", "delta")
+
+# Id → código de las tablas de dimensión, cargados una vez por exportación para unir en el cliente
+DIMENSION_QUERIES = {
+    "InvArticulo": "SELECT Id, CodigoArticulo FROM InvArticulo",
+    "InvCategoria": "SELECT Id, CodigoCategoria FROM InvCategoria",
+    "InvComponente": "SELECT Id, Codigo FROM InvComponente",
+    "InvControlSanitario": "SELECT Id, CodigoControl FROM InvControlSanitario",
+    "InvMarca": "SELECT Id, Codigo FROM InvMarca",
+    "InvUnidadMedida": "SELECT Id, Codigo FROM InvUnidadMedida",
+    "InvUso": "SELECT Id, Codigo FROM InvUso",
+}
+
+# Relaciones que pueden leerse como Id crudos y unirse en el cliente: consulta y {posición: dimensión}.
+# Códigos de Barras, Impuesto y Atributos ordenan o agrupan por CodigoArticulo en el servidor y no se incluyen.
+CLIENT_JOIN_QUERIES = {
+    "Artículos - Categorías": {
+        "query": "SELECT CodigoArticulo, InvCategoriaId FROM InvArticulo",
+        "columns": {1: "InvCategoria"},
+    },
+    "Artículos - Componentes": {
+        "query": "SELECT InvArticuloId, InvComponenteId FROM InvArticuloComponente",
+        "columns": {0: "InvArticulo", 1: "InvComponente"},
+    },
+    "Artículos - Control Sanitario": {
+        "query": "SELECT CodigoArticulo, InvControlSanitarioId FROM InvArticulo",
+        "columns": {1: "InvControlSanitario"},
+    },
+    "Artículos - Marcas": {
+        "query": "SELECT CodigoArticulo, InvMarcaId FROM InvArticulo",
+        "columns": {1: "InvMarca"},
+    },
+    "Artículos - Principio Activo": {
+        "query": "SELECT InvArticuloId, InvComponenteId FROM InvArticuloComponente",
+        "columns": {0: "InvArticulo", 1: "InvComponente"},
+    },
+    "Artículos - Unidades de Medida": {
+        "query": "SELECT InvArticuloId, InvUnidadMedidaId, InvUnidadMedidaId, CAST(FactorConversion as int), "
+        "InvUnidadMedidaId, CAST(FactorConversion as int) FROM InvArticuloUnidad",
+        "columns": {0: "InvArticulo", 1: "InvUnidadMedida", 2: "InvUnidadMedida", 4: "InvUnidadMedida"},
+    },
+    "Artículos - Usos": {
+        "query": "SELECT InvArticuloId, InvUsoId FROM InvArticuloUso",
+        "columns": {0: "InvArticulo", 1: "InvUso"},
+    },
+}
+CLIENT_JOIN_TABLES = list(CLIENT_JOIN_QUERIES)
+
+# Tablas grandes que la exportación reanudable lee por páginas ordenadas por su clave. En "query",
+# {page} es el tamaño de página y {after} la condición "clave > última clave" precedida por "filter";
+# "keys" son las expresiones SQL de la clave y "positions" sus columnas en el resultado, de donde sale
+# la clave del punto de control. La clave debe ser única o una página cortada entre filas con la misma
+# clave perdería las siguientes: cuando los códigos se pueden repetir (un artículo con varias filas en
+# la tabla de unión) se agrega el Id de la tabla de unión como última clave, en las últimas "hidden"
+# columnas del resultado, que no se escriben.
+_COMPONENTES_KEYSET = {
+    "query": "SELECT TOP ({page}) InvArticulo.CodigoArticulo, InvComponente.Codigo, InvArticuloComponente.Id "
+    "FROM InvArticuloComponente "
+    "JOIN InvComponente on InvComponente.Id = InvArticuloComponente.InvComponenteId "
+    "JOIN InvArticulo on InvArticulo.Id = InvArticuloComponente.InvArticuloId {after} "
+    "ORDER BY InvArticulo.CodigoArticulo, InvComponente.Codigo, InvArticuloComponente.Id",
+    "filter": "WHERE",
+    "keys": ("InvArticulo.CodigoArticulo", "InvComponente.Codigo", "InvArticuloComponente.Id"),
+    "positions": (0, 1, 2),
+    "hidden": 1,
+}
+KEYSET_QUERIES = {
+    "Artículos": {
+        "query": "SELECT TOP ({page}) CodigoArticulo, REPLACE(Descripcion,';',' '), "
+        "REPLACE(DescripcionLarga,';',' '), CPE, PermisoSanitario, "
+        "CAST(ValorMaximo as int), CAST(ValorMinimo as int), "
+        "CASE WHEN DerechoOferta IS NULL THEN 'NULL' ELSE CAST(DerechoOferta as int) END, "
+        "CAST(GenerarEtiquetaCompras as int), InvMinMax.Id "
+        "FROM InvArticulo JOIN InvMinMax on InvMinMax.InvArticuloId = InvArticulo.Id {after} "
+        "ORDER BY InvArticulo.CodigoArticulo, InvMinMax.Id",
+        "filter": "WHERE",
+        "keys": ("InvArticulo.CodigoArticulo", "InvMinMax.Id"),
+        "positions": (0, 9),
+        "hidden": 1,
+    },
+    "Artículos - Códigos de Barras": {
+        # La condición va dentro del CTE: ROW_NUMBER se particiona por CodigoBarra y no cambia
+        "query": """WITH CodigosBarrasLimpios AS (
+SELECT 
+    CodigoArticulo, 
+    CodigoBarra, 
+    CAST(EsPrincipal as int) AS EsPrincipal,
+    ROW_NUMBER() OVER (
+        PARTITION BY CodigoBarra 
+        ORDER BY EsPrincipal DESC, CodigoArticulo ASC
+    ) AS FilaNum
+FROM InvArticulo 
+JOIN InvCodigoBarra on InvCodigoBarra.InvArticuloId = InvArticulo.Id
+WHERE CodigoBarra IS NOT NULL AND CodigoBarra != '' {after}
+)
+SELECT TOP ({page}) CodigoArticulo, CodigoBarra, EsPrincipal
+FROM CodigosBarrasLimpios
+WHERE FilaNum = 1
+ORDER BY CodigoBarra""",
+        "filter": "AND",
+        "keys": ("CodigoBarra",),
+        "positions": (1,),
+    },
+    "Artículos - Componentes": _COMPONENTES_KEYSET,
+    "Artículos - Principio Activo": _COMPONENTES_KEYSET,
+    "Artículos - Unidades de Medida": {
+        "query": "SELECT TOP ({page}) a.CodigoArticulo, um.Codigo, um.Codigo, CAST(au.FactorConversion as int), "
+        "um.Codigo, CAST(au.FactorConversion as int), au.Id "
+        "FROM InvArticulo a JOIN InvArticuloUnidad au on au.InvArticuloId=a.Id "
+        "JOIN InvUnidadMedida um on um.Id=au.InvUnidadMedidaId {after} "
+        "ORDER BY a.CodigoArticulo, um.Codigo, au.Id",
+        "filter": "WHERE",
+        "keys": ("a.CodigoArticulo", "um.Codigo", "au.Id"),
+        "positions": (0, 1, 6),
+        "hidden": 1,
+    },
+    "Artículos - Usos": {
+        "query": "SELECT TOP ({page}) InvArticulo.CodigoArticulo, InvUso.Codigo, InvArticuloUso.Id "
+        "FROM InvArticuloUso "
+        "JOIN InvArticulo on InvArticulo.Id = InvArticuloUso.InvArticuloId "
+        "JOIN InvUso on InvUso.Id = InvArticuloUso.InvUsoId {after} "
+        "ORDER BY InvArticulo.CodigoArticulo, InvUso.Codigo, InvArticuloUso.Id",
+        "filter": "WHERE",
+        "keys": ("InvArticulo.CodigoArticulo", "InvUso.Codigo", "InvArticuloUso.Id"),
+        "positions": (0, 1, 2),
+        "hidden": 1,
+    },
+    "Artículos - Impuesto": {
+        "query": "SELECT TOP ({page}) ex.CodigoArticulo, CAST(MAX(ex.tarifaI) AS NUMERIC(10,2)) as TarifaCompra, "
+        "CAST(MAX(ex.tarifaV) AS NUMERIC(10,2)) as TarifaVenta FROM ( SELECT a.CodigoArticulo, "
+        "CASE WHEN MAX(fcv.TarifaImpuesto) IS NULL THEN 0 ELSE CAST(MAX(fcv.TarifaImpuesto) AS DECIMAL(10,2)) END as tarifaI, "
+        "CASE WHEN MAX(fcv2.TarifaImpuesto) IS NULL THEN 0 ELSE CAST(MAX(fcv2.TarifaImpuesto) AS DECIMAL(10,2)) END as tarifaV "
+        "FROM InvArticulo a LEFT JOIN FinConceptoVigencia fcv ON fcv.FinConceptoImptoId = a.FinConceptoImptoIdCompra "
+        "LEFT JOIN FinConceptoVigencia fcv2 ON fcv2.FinConceptoImptoId = a.FinConceptoImptoIdVenta {after} "
+        "GROUP BY a.CodigoArticulo ) as ex GROUP BY ex.CodigoArticulo ORDER BY ex.CodigoArticulo",
+        "filter": "WHERE",
+        "keys": ("a.CodigoArticulo",),
+        "positions": (0,),
+    },
+}
+KEYSET_TABLES = list(KEYSET_QUERIES)
+
+# Dónde se reemplaza el separador dentro de los textos: "server" (REPLACE en la consulta, como siempre)
+# o "client" (la consulta trae las columnas crudas y el formateador hace el reemplazo)
+DELIMITER_ESCAPE_MODES = ("server", "client")
+
+# Consultas sin REPLACE para el reemplazo en el cliente: consulta, posiciones de las columnas que la
+# consulta original pasaba por REPLACE y, si la tabla es reanudable, su variante por páginas.
+# En Proveedores la clave de ROW_NUMBER sigue normalizada en el servidor: decide qué filas quedan.
+CLIENT_ESCAPE_QUERIES = {
+    "Artículos": {
+        "query": "SELECT CodigoArticulo, Descripcion, DescripcionLarga, CPE, PermisoSanitario, "
+        "CAST(ValorMaximo as int), CAST(ValorMinimo as int), "
+        "CASE WHEN DerechoOferta IS NULL THEN 'NULL' ELSE CAST(DerechoOferta as int) END, "
+        "CAST(GenerarEtiquetaCompras as int) "
+        "FROM InvArticulo JOIN InvMinMax on InvMinMax.InvArticuloId = InvArticulo.Id",
+        "columns": (1, 2),
+        "keyset": dict(
+            KEYSET_QUERIES["Artículos"],
+            query="SELECT TOP ({page}) CodigoArticulo, Descripcion, DescripcionLarga, CPE, PermisoSanitario, "
+            "CAST(ValorMaximo as int), CAST(ValorMinimo as int), "
+            "CASE WHEN DerechoOferta IS NULL THEN 'NULL' ELSE CAST(DerechoOferta as int) END, "
+            "CAST(GenerarEtiquetaCompras as int), InvMinMax.Id "
+            "FROM InvArticulo JOIN InvMinMax on InvMinMax.InvArticuloId = InvArticulo.Id {after} "
+            "ORDER BY InvArticulo.CodigoArticulo, InvMinMax.Id",
+        ),
+    },
+    "Categoría": {"query": "SELECT CodigoCategoria, Descripcion FROM InvCategoria", "columns": (1,)},
+    "Control Sanitario": {"query": "SELECT CodigoControl, Descripcion FROM InvControlSanitario", "columns": (1,)},
+    "Marcas": {
+        "query": "SELECT Codigo, Nombre, CASE WHEN Nota IS NULL THEN 'NULL' ELSE Nota END FROM InvMarca",
+        "columns": (1, 2),
+    },
+    "Usos": {"query": "SELECT Codigo, Descripcion FROM InvUso", "columns": (1,)},
+    "Proveedores": {
+        "query": """WITH ProveedoresLimpios AS (
+SELECT 
+    CodigoProveedor, 
+    Nombre,
+    CASE WHEN Apellido IS NULL THEN 'NULL' ELSE Apellido END AS Apellido,
+    IdentificacionFiscal,
+    Telefono, 
+    Representante, 
+    Contactos,
+    CASE WHEN NombreEnCheque IS NULL THEN 'NULL' ELSE NombreEnCheque END AS NombreEnCheque,
+    TipoContribuyente, 
+    TipoPersona, 
+    tipoProveedor,
+    ROW_NUMBER() OVER (
+        PARTITION BY 
+            REPLACE(IdentificacionFiscal,';',' '),
+            UPPER(REPLACE(REPLACE(Nombre,';',' '), ' ', ''))
+        ORDER BY CodigoProveedor ASC
+    ) AS FilaNum
+FROM ComProveedor AS cp 
+JOIN GenPersona AS g ON g.Id = cp.GenPersonaId 
+)
+SELECT 
+CodigoProveedor, 
+Nombre,
+Apellido,
+IdentificacionFiscal,
+Telefono, 
+Representante, 
+Contactos,
+NombreEnCheque,
+TipoContribuyente, 
+TipoPersona, 
+tipoProveedor
+FROM ProveedoresLimpios
+WHERE FilaNum = 1
+ORDER BY CodigoProveedor ASC""",
+        "columns": (1, 2, 3, 7),
+    },
+    "Principios Activos": {
+        "query": "SELECT Codigo, Nombre, CAST(SustanciaControlada as int) FROM InvComponente",
+        "columns": (1,),
+    },
+    "Bancos": {
+        "query": "SELECT Codigo, Descripcion, Nombre, tipoConfiguracion, estado FROM BanBanco",
+        "columns": (1, 2),
+    },
+}
+CLIENT_ESCAPE_TABLES = list(CLIENT_ESCAPE_QUERIES)
+
+# Consultas sin ROW_NUMBER() para depurar las repetidas en el cliente. Vienen ordenadas por el desempate
+# del ROW_NUMBER original y la primera fila de cada clave es la que se conserva; "key" son las posiciones
+# de la clave con la normalización de su expresión en el PARTITION BY (PARTITION_NORMALIZERS) y
+# "sorted" indica que la consulta ya viene ordenada por la clave. "escape" y "keyset" son las variantes
+# para el reemplazo del separador en el cliente y para la lectura por páginas.
+CLIENT_DEDUPE_QUERIES = {
+    "Proveedores": {
+        "query": "SELECT CodigoProveedor, REPLACE(Nombre,';',' '), "
+        "CASE WHEN Apellido IS NULL THEN 'NULL' ELSE REPLACE(Apellido,';',' ') END, "
+        "REPLACE(IdentificacionFiscal,';',' '), Telefono, Representante, Contactos, "
+        "CASE WHEN NombreEnCheque IS NULL THEN 'NULL' ELSE REPLACE(NombreEnCheque,';',' ') END, "
+        "TipoContribuyente, TipoPersona, tipoProveedor "
+        "FROM ComProveedor AS cp JOIN GenPersona AS g ON g.Id = cp.GenPersonaId "
+        "ORDER BY CodigoProveedor ASC",
+        "key": ((3, "delimited"), (1, "compact")),
+        "sorted": False,
+        "escape": {
+            "query": "SELECT CodigoProveedor, Nombre, CASE WHEN Apellido IS NULL THEN 'NULL' ELSE Apellido END, "
+            "IdentificacionFiscal, Telefono, Representante, Contactos, "
+            "CASE WHEN NombreEnCheque IS NULL THEN 'NULL' ELSE NombreEnCheque END, "
+            "TipoContribuyente, TipoPersona, tipoProveedor "
+            "FROM ComProveedor AS cp JOIN GenPersona AS g ON g.Id = cp.GenPersonaId "
+            "ORDER BY CodigoProveedor ASC",
+            "columns": CLIENT_ESCAPE_QUERIES["Proveedores"]["columns"],
+        },
+    },
+    "Artículos - Códigos de Barras": {
+        "query": "SELECT CodigoArticulo, CodigoBarra, CAST(EsPrincipal as int) "
+        "FROM InvArticulo JOIN InvCodigoBarra on InvCodigoBarra.InvArticuloId = InvArticulo.Id "
+        "WHERE CodigoBarra IS NOT NULL AND CodigoBarra != '' "
+        "ORDER BY CodigoBarra, EsPrincipal DESC, CodigoArticulo ASC",
+        "key": ((1, "text"),),
+        "sorted": True,
+        # Una página termina en la última fila de una clave o a mitad de ella: el resto de esa clave
+        # son repetidas, así que "CodigoBarra > última" no pierde filas que deban exportarse
+        "keyset": dict(
+            KEYSET_QUERIES["Artículos - Códigos de Barras"],
+            query="SELECT TOP ({page}) CodigoArticulo, CodigoBarra, CAST(EsPrincipal as int) "
+            "FROM InvArticulo JOIN InvCodigoBarra on InvCodigoBarra.InvArticuloId = InvArticulo.Id "
+            "WHERE CodigoBarra IS NOT NULL AND CodigoBarra != '' {after} "
+            "ORDER BY CodigoBarra, EsPrincipal DESC, CodigoArticulo ASC",
+        ),
+    },
+}
+CLIENT_DEDUPE_TABLES = list(CLIENT_DEDUPE_QUERIES)
+
+# Tabla base de cada exportación, para ponderar el progreso con su cantidad estimada de filas
+TABLE_ROW_SOURCES = {
+    "Artículos": "InvArticulo",
+    "Categoría": "InvCategoria",
+    "Control Sanitario": "InvControlSanitario",
+    "Marcas": "InvMarca",
+    "Usos": "InvUso",
+    "Proveedores": "ComProveedor",
+    "Principios Activos": "InvComponente",
+    "Bancos": "BanBanco",
+    "Forma de Pago": "BanFormaPago",
+    "Artículos - Categorías": "InvArticulo",
+    "Artículos - Códigos de Barras": "InvCodigoBarra",
+    "Artículos - Componentes": "InvArticuloComponente",
+    "Artículos - Control Sanitario": "InvArticulo",
+    "Artículos - Marcas": "InvArticulo",
+    "Artículos - Principio Activo": "InvArticuloComponente",
+    "Artículos - Unidades de Medida": "InvArticuloUnidad",
+    "Artículos - Usos": "InvArticuloUso",
+    "Artículos - Impuesto": "InvArticulo",
+    "Artículos - Atributos (Medicina)": "InvArticuloAtributo",
+    "Artículos - Atributos (Genérico)": "InvArticuloAtributo",
+}
+
+# Filas según los metadatos del servidor (montón o índice agrupado): no recorre las tablas
+ROW_ESTIMATE_QUERY = (
+    "SELECT t.name, SUM(p.rows) FROM sys.tables t "
+    "JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1) "
+    "WHERE t.name IN ({placeholders}) GROUP BY t.name"
+)
+
+# Maestros pequeños: con la opción batch_small_tables se piden en un solo viaje al servidor
+BATCHED_TABLES = ("Categoría", "Marcas", "Usos", "Bancos", "Forma de Pago")
+
+
+def get_query_for_table(table_name):
+    # Buscar en ambas secciones
+    if table_name in MAESTROS_QUERIES:
+        return MAESTROS_QUERIES[table_name]
+    elif table_name in RELACIONES_QUERIES:
+        return RELACIONES_QUERIES[table_name]
+    else:
+        return None
+
+
+def export_filename(table):
+    # Generar nombre de archivo limpiando caracteres especiales
+    filename = table.replace(' ', '_').replace('-', '_').replace('(', '').replace(')', '').lower()
+    return f"{filename}.txt"
+
+
+# Consultas escritas de otra forma pero con el mismo resultado: si se eligen juntas se leen una vez
+EQUIVALENT_QUERIES = {
+    # Misma unión de InvArticuloComponente, InvArticulo e InvComponente con otro orden de JOIN
+    "Artículos - Principio Activo": "Artículos - Componentes",
+}
+
+# Consultas que solo difieren en un filtro de igualdad: se unen en una con WHERE ... IN (...)
+_FILTER_QUERY = re.compile(
+    r"^SELECT (?P<columns>.+?) FROM (?P<source>.+?) WHERE (?P<column>[\w.\[\]]+) = '(?P<value>[^']*)'"
+    r"(?P<tail> ORDER BY .+)?$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _canonical_sql(query):
+    return " ".join(query.split()).casefold()
+
+
+def filter_key(value):
+    # SQL Server compara sin distinguir mayúsculas (intercalación CI) e ignorando espacios finales
+    return "" if value is None else str(value).rstrip().casefold()
+
+
+class ExportScan:
+    """Una consulta que se ejecuta una sola vez y alimenta uno o varios archivos"""
+
+    def __init__(self, query, tables, routes=None, dimensions=None, keyset=None, escape=(), dedupe=None):
+        self.query = query
+        self.tables = tables
+        # {valor del filtro (filter_key): tabla}; la última columna del resultado elige el archivo
+        self.routes = routes
+        # {posición: dimensión} cuando la consulta trae Id que se traducen a códigos en el cliente
+        self.dimensions = dimensions
+        # Entrada de KEYSET_QUERIES cuando la tabla se lee por páginas reanudables
+        self.keyset = keyset
+        # Posiciones de las columnas en las que el cliente reemplaza el separador (consulta sin REPLACE)
+        self.escape = escape
+        # Entrada de CLIENT_DEDUPE_QUERIES cuando las repetidas se descartan en el cliente
+        self.dedupe = dedupe
+        # Columnas finales que solo completan la clave de las páginas y no se escriben
+        self.hidden = keyset.get("hidden", 0) if keyset else 0
+
+
+def plan_export_scans(tables, share=True, client_join=(), keyset=(), client_escape=(), client_dedupe=()):
+    """Agrupa las tablas cuyas consultas son iguales o solo cambian en el filtro.
+
+    Las tablas de `client_join` se leen con Id crudos y se unen con los índices de dimensión; las de
+    `keyset` se leen por páginas reanudables, cada una por separado; las de `client_escape` se leen
+    sin REPLACE y el separador se reemplaza al formatear; las de `client_dedupe` se leen sin
+    ROW_NUMBER() y las repetidas se descartan en el cliente.
+    """
+    def single_scan(table):
+        if table in client_dedupe:
+            return dedupe_scan(table)
+        escape = CLIENT_ESCAPE_QUERIES[table] if table in client_escape else None
+        if table in keyset:
+            spec = escape["keyset"] if escape else KEYSET_QUERIES[table]
+            return ExportScan(spec["query"], [table], keyset=spec, escape=escape["columns"] if escape else ())
+        if table in client_join:
+            spec = CLIENT_JOIN_QUERIES[table]
+            return ExportScan(spec["query"], [table], dimensions=spec["columns"])
+        if escape:
+            return ExportScan(escape["query"], [table], escape=escape["columns"])
+        return ExportScan(get_query_for_table(table), [table])
+
+    def dedupe_scan(table):
+        spec = CLIENT_DEDUPE_QUERIES[table]
+        variant = spec
+        if table in client_escape and "escape" in spec:
+            variant = spec["escape"]
+        if table in keyset and "keyset" in spec:
+            return ExportScan(spec["keyset"]["query"], [table], keyset=spec["keyset"], dedupe=spec)
+        return ExportScan(variant["query"], [table], escape=variant.get("columns", ()), dedupe=spec)
+
+    if not share:
+        return [single_scan(table) for table in tables]
+
+    identical = {}
+    separate = {}
+    for table in tables:
+        if table in keyset or table in client_dedupe:
+            separate[table] = single_scan(table)
+            continue
+        if table in client_join:
+            spec = CLIENT_JOIN_QUERIES[table]
+            key = (_canonical_sql(spec["query"]), tuple(sorted(spec["columns"].items())))
+        elif table in client_escape:
+            spec = CLIENT_ESCAPE_QUERIES[table]
+            key = (_canonical_sql(spec["query"]), ("escape",) + spec["columns"])
+        else:
+            key = (_canonical_sql(get_query_for_table(EQUIVALENT_QUERIES.get(table, table))), ())
+        identical.setdefault(key, []).append(table)
+
+    scans = dict(separate)
+    filtered = {}
+    for group in identical.values():
+        if len(group) > 1:
+            scan = single_scan(group[0])
+            scan.tables = group
+            scans[group[0]] = scan
+            continue
+        table = group[0]
+        unfiltered = table in client_join or table in client_escape
+        match = None if unfiltered else _FILTER_QUERY.match(" ".join(get_query_for_table(table).split()))
+        if match is None:
+            scans[table] = single_scan(table)
+            continue
+        key = tuple(_canonical_sql(match.group(name) or "") for name in ("columns", "source", "column", "tail"))
+        filtered.setdefault(key, []).append((table, match))
+
+    for group in filtered.values():
+        table, match = group[0]
+        if len(group) == 1:
+            scans[table] = ExportScan(get_query_for_table(table), [table])
+            continue
+        values = ", ".join(f"'{member.group('value')}'" for _, member in group)
+        query = (
+            f"SELECT {match.group('columns')}, {match.group('column')} FROM {match.group('source')} "
+            f"WHERE {match.group('column')} IN ({values}){match.group('tail') or ''}"
+        )
+        routes = {filter_key(member.group("value")): member_table for member_table, member in group}
+        scans[table] = ExportScan(query, [member_table for member_table, _ in group], routes)
+
+    # Mismo orden en que se eligieron las tablas
+    return [scans[table] for table in tables if table in scans]
+
+
+class ExportBatch:
+    """Consultas pequeñas enviadas en un solo lote; cada conjunto de resultados va a sus archivos"""
+
+    def __init__(self, scans):
+        self.scans = scans
+        self.tables = [table for scan in scans for table in scan.tables]
+
+
+def batch_small_scans(scans):
+    """Reúne en un ExportBatch las consultas simples de BATCHED_TABLES (en la posición de la primera)"""
+    small = [
+        scan for scan in scans
+        if scan.routes is None and not scan.dimensions and not scan.keyset
+        and all(table in BATCHED_TABLES for table in scan.tables)
+    ]
+    if len(small) < 2:
+        return list(scans)
+    units = []
+    for scan in scans:
+        if scan is small[0]:
+            units.append(ExportBatch(small))
+        elif scan not in small:
+            units.append(scan)
+    return units
+
+
+def build_connection_string(instance, username="", password="", timeout=10):
+    """Cadena ODBC usada por la interfaz, el modo por lotes y el pool de conexiones"""
+    if not username:
+        return (
+            "DRIVER={ODBC Driver 17 for SQL Server};"
+            f"SERVER={instance};"
+            "Trusted_Connection=yes;"
+            f"Connection Timeout={timeout};"
+        )
+    return (
+        "DRIVER={ODBC Driver 17 for SQL Server};"
+        f"SERVER={instance};"
+        f"UID={username};"
+        f"PWD={password};"
+        f"Connection Timeout={timeout};"
+    )
+
+
+def open_connection(conn_str, database=""):
+    conn = load_pyodbc().connect(conn_str)
+    if database:
+        cursor = conn.cursor()
+        cursor.execute(f"USE [{database}]")
+        cursor.close()
+    return conn
+
+
+# De la más específica (solo bases de usuario en línea) a la más general, según los permisos del login
+DATABASE_LIST_QUERIES = (
+    "SELECT name FROM sys.databases WHERE state_desc='ONLINE' AND database_id>4 ORDER BY name",
+    "SELECT name FROM sys.databases WHERE state_desc='ONLINE' ORDER BY name",
+    "SELECT name FROM sys.databases ORDER BY name",
+)
+
+
+def list_databases(connection):
+    cursor = connection.cursor()
+    try:
+        for query in DATABASE_LIST_QUERIES:
+            try:
+                cursor.execute(query)
+                rows = cursor.fetchall()
+            except Exception:
+                continue
+            if rows:
+                return [str(row[0]) for row in rows]
+        return []
+    finally:
+        cursor.close()
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def replace_if_changed(temp_path, path, digest, size):
+    """Mueve `temp_path` sobre `path` solo si el contenido difiere; devuelve True si lo reemplazó"""
+    try:
+        unchanged = os.path.getsize(path) == size and file_digest(path) == digest
+    except FileNotFoundError:
+        unchanged = False
+    if unchanged:
+        # El archivo existente conserva su fecha: los sincronizadores no ven cambios
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, path)
+    return True
+
+
+def estimate_table_rows(connection, tables):
+    """Devuelve {tabla: filas estimadas} leyendo sys.partitions en una sola consulta"""
+    sources = sorted({TABLE_ROW_SOURCES[table] for table in tables if table in TABLE_ROW_SOURCES})
+    if not sources:
+        return {}
+    cursor = connection.cursor()
+    try:
+        cursor.execute(ROW_ESTIMATE_QUERY.format(placeholders=", ".join("?" * len(sources))), *sources)
+        counts = {name.lower(): int(rows or 0) for name, rows in cursor.fetchall()}
+    finally:
+        cursor.close()
+    return {
+        table: counts[TABLE_ROW_SOURCES[table].lower()]
+        for table in tables
+        if TABLE_ROW_SOURCES.get(table, "").lower() in counts
+    }
+
+
+def _format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600} h {seconds % 3600 // 60:02d} min"
+    if seconds >= 60:
+        return f"{seconds // 60} min {seconds % 60:02d} s"
+    return f"{seconds} s"
+
+
+def _format_count(value):
+    # Separador de miles con punto; solo al número, no a los nombres de tabla de la etiqueta
+    return f"{value:,.0f}".replace(",", ".")
+
+
+class ExportProgress:
+    """Progreso ponderado por filas estimadas, con filas/s y tiempo restante; avisa como mucho cada `interval` s"""
+
+    def __init__(self, tables, estimates, on_progress, on_progress_text, interval=PROGRESS_INTERVAL):
+        # Sin estimación cada tabla pesa una fila: el progreso vuelve a ser por tablas
+        self.estimates = {table: max(1, estimates.get(table, 1)) for table in tables}
+        self.total = sum(self.estimates.values()) or 1
+        self.on_progress = on_progress
+        self.on_progress_text = on_progress_text
+        self.interval = interval
+        self.label = ""
+        self._rows = dict.fromkeys(self.estimates, 0)
+        self._finished = set()
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._next_report = 0.0
+
+    def set_label(self, label):
+        self.label = label
+        self._report(force=True)
+
+    def update(self, table, rows):
+        """Lo llama el escritor tras cada lote con el total de filas escritas de la tabla"""
+        self._rows[table] = rows
+        if time.perf_counter() >= self._next_report:
+            self._report()
+
+    def finish(self, tables, label=None):
+        self._finished.update(tables)
+        if label is not None:
+            self.label = label
+        self._report(force=True)
+
+    def _report(self, force=False):
+        with self._lock:
+            now = time.perf_counter()
+            if not force and now < self._next_report:
+                return
+            self._next_report = now + self.interval
+
+            # Una tabla terminada cuenta con su estimación completa aunque haya escrito más o menos filas
+            done = sum(
+                estimate if table in self._finished else min(self._rows[table], estimate)
+                for table, estimate in self.estimates.items()
+            )
+            rows = sum(self._rows.values())
+            elapsed = now - self._started
+
+        self.on_progress(int(done * 100 / self.total))
+        if rows == 0 or elapsed <= 0:
+            self.on_progress_text(self.label)
+            return
+        rate = rows / elapsed
+        text = f"{self.label} · {_format_count(rows)} filas · {_format_count(rate)} filas/s"
+        if 0 < done < self.total:
+            text += f" · restan ~{_format_duration((self.total - done) * elapsed / done)}"
+        self.on_progress_text(text)
+
+
+class _TableOutput:
+    """Temporal de una tabla: cuenta, hashea y registra las filas antes de reemplazar el .txt"""
+
+    def __init__(self, table, folder, incremental=None, resume=None):
+        self.table = table
+        self.filename = export_filename(table)
+        self.filepath = os.path.join(folder, self.filename)
+        # Se escribe en un temporal: un fallo o una cancelación nunca dejan un .txt a medias
+        self.temp_path = self.filepath + ".tmp"
+        self.tracker = DeltaTracker(table, self.filepath, TABLE_KEY_COLUMNS.get(table)) if incremental else None
+        self.records_count = 0
+        self.size = 0
+        self._digest = hashlib.blake2b()
+        if resume is None:
+            self._file = open(self.temp_path, "wb")
+        else:
+            self._resume(resume)
+
+    def _resume(self, resume):
+        """Continúa un temporal de una exportación por páginas: descarta lo escrito después del punto de control"""
+        self._file = open(self.temp_path, "r+b")
+        self._file.truncate(resume["size"])
+        newline = os.linesep.encode("ascii")
+        lines = []
+        # El hash y el manifiesto incremental se reconstruyen con las filas ya escritas
+        for line in self._file:
+            self._digest.update(line)
+            if self.tracker is not None:
+                lines.append(line[: -len(newline)].decode("utf-8"))
+                if len(lines) >= EXPORT_BATCH_SIZE:
+                    self.tracker.add(lines)
+                    lines = []
+        if self.tracker is not None:
+            self.tracker.add(lines)
+        self._file.seek(0, os.SEEK_END)
+        self.records_count = resume["rows"]
+        self.size = resume["size"]
+
+    def write(self, lines):
+        """Escribe un lote de líneas; devuelve los bytes escritos"""
+        if not lines:
+            return 0
+        if self.tracker is not None:
+            self.tracker.add(lines)
+        return self.write_block(encode_lines(lines), len(lines))
+
+    def write_block(self, data, count):
+        """Escribe `count` líneas ya codificadas (encode_lines); sin manifiesto incremental"""
+        self._file.write(data)
+        self._digest.update(data)
+        self.records_count += count
+        self.size += len(data)
+        return len(data)
+
+    def sync(self):
+        """Lleva a disco lo escrito hasta ahora sin cerrar el temporal (antes de un punto de control)"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def commit(self, delta_folder=None):
+        """Reemplaza el .txt solo si el contenido cambió; devuelve (reemplazado, resumen delta o None)"""
+        self.close()
+        changes = None
+        if self.tracker is not None:
+            # El archivo anterior se conserva hasta comparar: las filas eliminadas se leen de él
+            changes = self.tracker.compare(self.temp_path, delta_folder)
+        changed = replace_if_changed(self.temp_path, self.filepath, self._digest.digest(), self.size)
+        if self.tracker is not None:
+            self.tracker.save_manifest()
+        return changed, changes
+
+
+DEFAULT_EXPORT_OPTIONS = {
+    "parallel_tables": 1,
+    "batch_size": EXPORT_BATCH_SIZE,
+    "cache_mb": EXPORT_CACHE_MB,
+    "incremental": None,
+    "share_scans": True,
+    "client_join": (),
+    "batch_small_tables": False,
+    "save_metrics": True,
+    "trace_memory": False,
+    "resumable": False,
+    "page_size": KEYSET_PAGE_SIZE,
+    "sanitize_processes": 0,
+    "columnar": False,
+    "delimiter_escape": "server",
+    "client_dedupe": False,
+    "dedupe_spill_keys": DEDUPE_SPILL_KEYS,
+}
+
+
+def _ignore(*args):
+    pass
+
+
+class ExportEngine:
+    """Exporta tablas a archivos TXT; lo usan la interfaz (en su hilo de trabajo) y el modo por lotes"""
+
+    def __init__(
+        self,
+        connection_string,
+        database="",
+        options=None,
+        connection=None,
+        cancel_event=None,
+        on_progress=None,
+        on_progress_text=None,
+        on_table_status=None,
+        on_log=None,
+        on_metrics=None,
+    ):
+        self.connection_string = connection_string
+        self.database = database
+        self.options = dict(DEFAULT_EXPORT_OPTIONS, **(options or {}))
+        self.connection = connection
+        self._cancel = cancel_event or threading.Event()
+        self.on_progress = on_progress or _ignore
+        self.on_progress_text = on_progress_text or _ignore
+        self.on_table_status = on_table_status or _ignore
+        self.on_log = on_log or _ignore
+        # Recibe el diccionario de métricas de cada consulta al terminarla
+        self.on_metrics = on_metrics
+
+        self.batch_size = self.options["batch_size"]
+        self.cache_max_bytes = self.options["cache_mb"] * 1024 * 1024
+        self.incremental = self.options["incremental"]
+        if self.incremental not in INCREMENTAL_MODES:
+            raise ValueError(f"Modo incremental desconocido: {self.incremental}")
+        self.client_join = set(self.options["client_join"])
+        unknown = self.client_join.difference(CLIENT_JOIN_QUERIES)
+        if unknown:
+            raise ValueError(f"Unión en el cliente no disponible para: {', '.join(sorted(unknown))}")
+        if self.options["delimiter_escape"] not in DELIMITER_ESCAPE_MODES:
+            raise ValueError(f"Reemplazo del separador desconocido: {self.options['delimiter_escape']}")
+        self.sanitizer = None
+        self.dimensions = None
+        self.progress = None
+        self.metrics = None
+        self.failed = {}
+        self._process_pool = None
+        self._process_workers = 0
+        self._process_pool_lock = threading.Lock()
+
+    def cancel(self):
+        """La exportación se detiene al terminar el lote actual"""
+        self._cancel.set()
+
+    def run(self, selected_tables, folder):
+        self.sanitizer = get_text_sanitizer()
+        parallel_tables = max(1, min(EXPORT_PARALLEL_MAX, self.options["parallel_tables"]))
+        tables = [table for table in selected_tables if get_query_for_table(table)]
+        keyset = set(KEYSET_TABLES) if self.options["resumable"] else set()
+        client_escape = set(CLIENT_ESCAPE_TABLES) if self.options["delimiter_escape"] == "client" else set()
+        client_dedupe = set(CLIENT_DEDUPE_TABLES) if self.options["client_dedupe"] else set()
+        units = plan_export_scans(
+            tables, self.options["share_scans"], self.client_join, keyset, client_escape, client_dedupe
+        )
+        if self.options["batch_small_tables"]:
+            units = batch_small_scans(units)
+        self.dimensions = DimensionCache(DIMENSION_QUERIES, self.on_log)
+        self.failed = {}
+        parallel = parallel_tables > 1 and len(units) > 1
+        self.metrics = RunMetrics(
+            self.database,
+            {key: sorted(value) if isinstance(value, (set, tuple, list)) else value for key, value in self.options.items()},
+            self.options["trace_memory"],
+            sequential=not parallel,
+            on_scan=self.on_metrics,
+        )
+
+        if not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        self.metrics.start()
+        own_connection = False
+        try:
+            if parallel:
+                results = self._run_parallel(units, folder, parallel_tables)
+            else:
+                if self.connection is None:
+                    started = time.perf_counter()
+                    self.connection = open_connection(self.connection_string, self.database)
+                    self.metrics.add_connect(time.perf_counter() - started)
+                    own_connection = True
+                try:
+                    results = self._run_sequential(units, folder)
+                finally:
+                    if own_connection:
+                        self.connection.close()
+                        self.connection = None
+        finally:
+            self.metrics.finish()
+            if self._process_pool is not None:
+                self._process_pool.shutdown(cancel_futures=True)
+                self._process_pool = None
+
+        metrics_file = None
+        if self.options["save_metrics"]:
+            try:
+                metrics_file = self.metrics.save(folder)
+                self.on_log("Métricas", f"Métricas guardadas en {metrics_file}")
+            except OSError as exc:
+                self.on_log("Métricas", f"No se pudieron guardar las métricas: {exc}")
+
+        if self.dimensions.memory_bytes():
+            self.on_log("Dimensiones", f"Memoria total de índices: {self.dimensions.memory_bytes() / (1024 * 1024):.1f} MB")
+
+        exported_files = []
+        total_records = 0
+        for table in tables:
+            if table not in results:
+                continue
+            filename, records_count = results[table]
+            total_records += records_count
+            exported_files.append(f"• {filename} ({records_count} registros)")
+
+        # Tablas a medias o sin empezar cuando se canceló: no tienen archivo nuevo
+        cancelled = []
+        if self._cancel.is_set():
+            cancelled = [table for table in tables if table not in results and table not in self.failed]
+
+        return {
+            "folder": folder,
+            "total_tables": len(selected_tables),
+            "exported_files": exported_files,
+            "total_records": total_records,
+            "failed": dict(self.failed),
+            "cancelled": cancelled,
+            "metrics_file": metrics_file,
+        }
+
+    def _table_failed(self, table, exc):
+        self.failed[table] = str(exc)
+        self.on_table_status(f"✗ {table}: Error ({exc})")
+
+    def _start_progress(self, connection, units):
+        """Estima las filas de cada tabla antes de empezar para ponderar el progreso"""
+        tables = [table for unit in units for table in unit.tables]
+        estimates = {}
+        if connection is not None:
+            try:
+                estimates = estimate_table_rows(connection, tables)
+            except Exception as exc:
+                self.on_log("Progreso", f"Sin estimación de filas ({exc}); el progreso se mide por tablas")
+        return ExportProgress(tables, estimates, self.on_progress, self.on_progress_text)
+
+    def _run_sequential(self, units, folder):
+        total_tables = sum(len(unit.tables) for unit in units)
+        self.progress = self._start_progress(self.connection, units)
+        results = {}
+        done = 0
+
+        for unit in units:
+            if self._cancel.is_set():
+                break
+
+            self.progress.set_label(f"Exportando {', '.join(unit.tables)}… ({done + 1}/{total_tables})")
+
+            try:
+                results.update(self._export_unit(self.connection, unit, folder))
+            except Exception as exc:
+                for table in unit.tables:
+                    self._table_failed(table, exc)
+            done += len(unit.tables)
+            self.progress.finish(unit.tables)
+
+        return results
+
+    def _run_parallel(self, units, folder, parallel_tables):
+        """Exporta varias consultas a la vez, cada una con su propia conexión del pool"""
+        total_tables = sum(len(unit.tables) for unit in units)
+        workers = min(parallel_tables, len(units))
+        pool = ConnectionPool(self.connection_string, self.database, workers, self.metrics.add_connect)
+        pyodbc = load_pyodbc()
+        results = {}
+        completed = 0
+
+        def export_with_pool(unit):
+            if self._cancel.is_set():
+                return None
+            conn = pool.acquire()
+            broken = False
+            try:
+                return self._export_unit(conn, unit, folder)
+            except pyodbc.Error:
+                broken = True
+                raise
+            finally:
+                pool.release(conn, broken)
+
+        try:
+            connection = pool.acquire()
+        except Exception:
+            # El error de conexión se informará por tabla al exportar
+            connection = None
+        try:
+            self.progress = self._start_progress(connection, units)
+        finally:
+            if connection is not None:
+                pool.release(connection)
+
+        self.progress.set_label(f"Exportando {total_tables} tablas ({workers} en paralelo)…")
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(export_with_pool, unit): unit for unit in units}
+                for future in as_completed(futures):
+                    unit = futures[future]
+                    completed += len(unit.tables)
+                    try:
+                        result = future.result()
+                        if result is not None:
+                            results.update(result)
+                    except Exception as exc:
+                        for table in unit.tables:
+                            self._table_failed(table, exc)
+
+                    self.progress.finish(unit.tables, f"Exportando… ({completed}/{total_tables} tablas completadas)")
+        finally:
+            pool.close_all()
+
+        return results
+
+    def _export_unit(self, connection, unit, folder):
+        if isinstance(unit, ExportBatch):
+            return self._export_batch(connection, unit.scans, folder)
+        if unit.keyset is not None:
+            return self._export_keyset(connection, unit, folder)
+        return self._export_scan(connection, unit, folder)
+
+    def _export_scan(self, connection, scan, folder):
+        """Ejecuta la consulta una vez y escribe el archivo de cada tabla que alimenta"""
+        self.on_log(" + ".join(scan.tables), scan.query)
+        metrics = self.metrics.scan_started(scan.tables)
+        try:
+            if scan.dimensions:
+                # Sin MARS la conexión no admite otra consulta con resultados pendientes: índices primero
+                started = time.perf_counter()
+                for name in scan.dimensions.values():
+                    self.dimensions.get(connection, name)
+                metrics.add("join", time.perf_counter() - started)
+
+            cursor = connection.cursor()
+            try:
+                metrics.query_sent()
+                started = time.perf_counter()
+                cursor.execute(scan.query)
+                metrics.add("execute", time.perf_counter() - started)
+                return self._write_result(cursor, scan, folder, metrics)
+            finally:
+                cursor.close()
+        except Exception as exc:
+            metrics.error = str(exc)
+            raise
+        finally:
+            self.metrics.scan_finished(metrics)
+
+    def _export_batch(self, connection, scans, folder):
+        """Envía varias consultas en un solo lote y recorre sus conjuntos de resultados con nextset().
+
+        Si una consulta falla, su tabla queda como fallida y las siguientes se reenvían en otro lote,
+        tanto si el servidor continuó el lote como si lo abortó. Si falla el envío del lote (SQL Server
+        rechaza el lote entero cuando una consulta no compila), cada consulta se ejecuta por separado
+        para que solo falle la tabla que tiene el error.
+        """
+        results = {}
+        while scans and not self._cancel.is_set():
+            batch_query = "SET NOCOUNT ON;\n" + ";\n".join(scan.query for scan in scans)
+            self.on_log(" + ".join(table for scan in scans for table in scan.tables), batch_query)
+
+            done = 0
+            rejected = None
+            metrics = self.metrics.scan_started(scans[0].tables)
+            cursor = connection.cursor()
+            try:
+                metrics.query_sent()
+                started = time.perf_counter()
+                try:
+                    cursor.execute(batch_query)
+                except Exception as exc:
+                    # Ningún resultado llegó todavía: no se sabe qué consulta tiene el error
+                    rejected = exc
+                    raise
+                metrics.add("execute", time.perf_counter() - started)
+                for position, scan in enumerate(scans):
+                    if position:
+                        metrics = self.metrics.scan_started(scan.tables)
+                        metrics.query_sent()
+                        started = time.perf_counter()
+                        if not cursor.nextset():
+                            raise RuntimeError("El lote terminó sin devolver el resultado de esta tabla")
+                        metrics.add("execute", time.perf_counter() - started)
+                    results.update(self._write_result(cursor, scan, folder, metrics))
+                    self.metrics.scan_finished(metrics)
+                    metrics = None
+                    done += 1
+                    if self._cancel.is_set():
+                        break
+            except Exception as exc:
+                if metrics is not None:
+                    metrics.error = str(exc)
+                    self.metrics.scan_finished(metrics)
+                if rejected is None:
+                    for table in scans[done].tables:
+                        self._table_failed(table, exc)
+                    done += 1
+            finally:
+                cursor.close()
+
+            if rejected is not None:
+                self.on_log("Lote", f"El servidor rechazó el lote ({rejected}); se exporta tabla por tabla")
+                results.update(self._export_separately(connection, scans, folder))
+                break
+            scans = scans[done:]
+
+        return results
+
+    def _export_separately(self, connection, scans, folder):
+        """Cada consulta en su propio viaje; una tabla con error no impide exportar las demás"""
+        results = {}
+        for scan in scans:
+            if self._cancel.is_set():
+                break
+            try:
+                results.update(self._export_scan(connection, scan, folder))
+            except Exception as exc:
+                for table in scan.tables:
+                    self._table_failed(table, exc)
+        return results
+
+    def _export_keyset(self, connection, scan, folder):
+        """Lee la tabla por páginas ordenadas por su clave y guarda un punto de control tras cada página.
+
+        Si la exportación falla o se cancela, el temporal y el punto de control quedan en disco y la
+        siguiente exportación reanudable continúa desde la última página confirmada.
+        """
+        table = scan.tables[0]
+        spec = scan.keyset
+        page_size = max(KEYSET_PAGE_MIN, min(KEYSET_PAGE_MAX, self.options["page_size"]))
+        checkpoint = KeysetCheckpoint(table, os.path.join(folder, export_filename(table)), spec)
+        state = checkpoint.load()
+        after = state["after"] if state else None
+        if state:
+            self.on_log(table, f"Reanudando después de {after} ({state['rows']} registros ya exportados)")
+        self.on_log(table, keyset_page_query(spec, page_size, after)[0])
+
+        metrics = self.metrics.scan_started(scan.tables)
+        cache = None
+        if self.cache_max_bytes > 0:
+            cache = SanitizerCache(self.sanitizer, self.cache_max_bytes)
+        output = None
+        dedupe = self._start_dedupe(scan)
+        try:
+            output = _TableOutput(table, folder, self.incremental, resume=state)
+            cursor = connection.cursor()
+            try:
+                while not self._cancel.is_set():
+                    query, params = keyset_page_query(spec, page_size, after)
+                    metrics.query_sent()
+                    started = time.perf_counter()
+                    cursor.execute(query, *params)
+                    metrics.add("execute", time.perf_counter() - started)
+                    # Con depuración en el cliente se escriben menos filas que las leídas: la página se mide en leídas
+                    fetched_before = metrics.rows
+                    last_row = self._stream_rows(cursor, scan, [output], metrics, cache, dedupe)
+                    if last_row is None or self._cancel.is_set():
+                        # Una página cancelada a medias no se confirma: se repite al reanudar
+                        break
+                    after = [last_row[position] for position in spec["positions"]]
+                    if any(value is None for value in after):
+                        raise RuntimeError(f"Clave nula en {table}: no se puede continuar por páginas")
+                    started = time.perf_counter()
+                    output.sync()
+                    checkpoint.save(after, output.records_count, output.size)
+                    metrics.add("write", time.perf_counter() - started)
+                    if metrics.rows - fetched_before < page_size:
+                        break
+            finally:
+                cursor.close()
+        except Exception as exc:
+            metrics.error = str(exc)
+            if output is not None:
+                output.close()
+            raise
+        finally:
+            self._finish_dedupe(scan, dedupe, metrics)
+            self.metrics.scan_finished(metrics)
+
+        if cache is not None and cache.column_stats:
+            self.on_log(table, cache.summary())
+
+        if self._cancel.is_set():
+            # El temporal y el punto de control quedan para reanudar; la tabla se informa como cancelada
+            output.close()
+            return {}
+
+        changed, changes = output.commit(
+            os.path.join(folder, DELTA_FOLDER) if self.incremental == "delta" else None
+        )
+        checkpoint.clear()
+        if changes is not None:
+            self.on_log(table, str(changes))
+        suffix = "" if changed else " (sin cambios)"
+        self.on_table_status(f"✓ {table}: {output.records_count} registros{suffix}")
+        return {table: (output.filename, output.records_count)}
+
+    def _write_result(self, cursor, scan, folder, metrics):
+        """Escribe el conjunto de resultados actual del cursor en los archivos de la consulta"""
+        cache = None
+        if self.cache_max_bytes > 0:
+            cache = SanitizerCache(self.sanitizer, self.cache_max_bytes)
+
+        outputs = []
+        dedupe = self._start_dedupe(scan)
+        try:
+            outputs = [_TableOutput(table, folder, self.incremental) for table in scan.tables]
+            self._stream_rows(cursor, scan, outputs, metrics, cache, dedupe)
+        except BaseException:
+            for output in outputs:
+                output.discard()
+            raise
+        finally:
+            self._finish_dedupe(scan, dedupe, metrics)
+
+        if cache is not None and cache.column_stats:
+            self.on_log(" + ".join(scan.tables), cache.summary())
+
+        results = {}
+        if self._cancel.is_set():
+            # Sin archivo escrito: la tabla se informa como cancelada, no como exportada
+            for output in outputs:
+                output.discard()
+            return results
+
+        delta_folder = os.path.join(folder, DELTA_FOLDER) if self.incremental == "delta" else None
+        for output in outputs:
+            started = time.perf_counter()
+            changed, changes = output.commit(delta_folder)
+            metrics.add("write", time.perf_counter() - started)
+            if changes is not None:
+                self.on_log(output.table, str(changes))
+            if changed:
+                self.on_table_status(f"✓ {output.table}: {output.records_count} registros")
+            else:
+                self.on_table_status(f"✓ {output.table}: {output.records_count} registros (sin cambios)")
+            results[output.table] = (output.filename, output.records_count)
+        return results
+
+    def _start_dedupe(self, scan):
+        if scan.dedupe is None:
+            return None
+        return StreamingDedupe(scan.dedupe["key"], scan.dedupe["sorted"], self.options["dedupe_spill_keys"])
+
+    def _finish_dedupe(self, scan, dedupe, metrics):
+        """Informa cuántas repetidas se descartaron y la memoria usada; borra el conjunto en disco si lo hubo"""
+        if dedupe is None:
+            return
+        metrics.dedupe = dedupe.to_dict()
+        self.on_log(" + ".join(scan.tables), dedupe.summary())
+        dedupe.close()
+
+    def _sanitize_in_processes(self, scan):
+        """La tubería con procesos solo compensa en consultas simples de tablas grandes"""
+        processes = self.options["sanitize_processes"]
+        if processes <= 0 or scan.routes is not None or scan.dimensions or self.incremental:
+            return False
+        estimate = max(self.progress.estimates.get(table, 0) for table in scan.tables)
+        return estimate >= SANITIZE_PROCESS_MIN_ROWS
+
+    def _sanitize_pool(self):
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_workers = max(1, min(SANITIZE_PROCESSES_MAX, self.options["sanitize_processes"]))
+                self._process_pool = ProcessPoolExecutor(max_workers=self._process_workers)
+            return self._process_pool
+
+    def _stream_rows_pooled(self, cursor, scan, outputs, metrics, dedupe=None):
+        """Tubería de tres etapas: un hilo lee lotes, el pool de procesos los sanitiza y codifica, y este
+        hilo escribe los bloques en el orden de lectura. Devuelve la última fila leída, como _stream_rows.
+        """
+        pool = self._sanitize_pool()
+        # Solo nombre y tipo: es lo que usa build_row_formatter y se puede enviar a otro proceso
+        description = tuple((column[0], column[1]) for column in cursor.description)
+        hidden = scan.hidden
+        if hidden:
+            description = description[:-hidden]
+        sizer = AdaptiveBatchSizer(self.batch_size)
+        pending = queue.Queue(maxsize=SANITIZE_QUEUE_DEPTH * self._process_workers)
+        stop = threading.Event()
+        fetched_state = {"last_row": None, "error": None}
+        clock = time.perf_counter
+
+        def put(item):
+            # Si el escritor ya se detuvo nadie vaciará la cola: no bloquear para siempre
+            while not stop.is_set():
+                try:
+                    pending.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def fetch():
+            first = True
+            try:
+                while not self._cancel.is_set() and not stop.is_set():
+                    started = clock()
+                    rows = cursor.fetchmany(sizer.batch_size)
+                    elapsed = clock() - started
+                    metrics.add("fetch", elapsed)
+                    if not rows:
+                        break
+                    if first:
+                        metrics.first_row()
+                        first = False
+                    # Las filas de pyodbc no se pueden enviar a otro proceso; las tuplas sí
+                    rows = [tuple(row) for row in rows]
+                    fetched = len(rows)
+                    fetched_state["last_row"] = rows[-1]
+                    if hidden:
+                        rows = [row[:-hidden] for row in rows]
+                    if dedupe is not None:
+                        started = clock()
+                        rows = dedupe.filter(rows)
+                        metrics.add("dedupe", clock() - started)
+                    future = None
+                    if rows:
+                        future = pool.submit(
+                            _format_block, description, rows, self.cache_max_bytes, self.options["columnar"], scan.escape
+                        )
+                    put((future, fetched, elapsed))
+            except BaseException as exc:
+                fetched_state["error"] = exc
+            finally:
+                put(None)
+
+        reader = threading.Thread(target=fetch, name=f"Lectura {scan.tables[0]}", daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = pending.get()
+                if item is None:
+                    break
+                future, fetched, elapsed = item
+                started = clock()
+                data, count = future.result() if future is not None else (b"", 0)
+                ready = clock()
+                for output in outputs:
+                    output.write_block(data, count)
+                # "sanitize" es aquí la espera por el proceso: lo que la tubería no logró ocultar
+                metrics.add("sanitize", ready - started)
+                metrics.add("write", clock() - ready)
+                metrics.rows += fetched
+                metrics.bytes += len(data) * len(outputs)
+                metrics.batches += 1
+                sizer.record(fetched, elapsed, len(data))
+                for output in outputs:
+                    self.progress.update(output.table, output.records_count)
+        finally:
+            stop.set()
+            reader.join()
+            while True:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None and item[0] is not None:
+                    item[0].cancel()
+
+        if fetched_state["error"] is not None:
+            raise fetched_state["error"]
+        return fetched_state["last_row"]
+
+    def _stream_rows(self, cursor, scan, outputs, metrics, cache=None, dedupe=None):
+        """Lee el resultado por lotes con fetchmany y reparte cada lote entre los archivos de la consulta.
+
+        Devuelve la última fila leída (None si no hubo filas): la exportación por páginas toma de ella la clave.
+        """
+        if self._sanitize_in_processes(scan):
+            return self._stream_rows_pooled(cursor, scan, outputs, metrics, dedupe)
+        sizer = AdaptiveBatchSizer(self.batch_size)
+        description = cursor.description
+        hidden = scan.hidden
+        if hidden:
+            description = description[:-hidden]
+        join_rows = None
+        if scan.dimensions:
+            description, join_rows = self.dimensions.row_joiner(description, scan.dimensions)
+        format_batch = None
+        if scan.routes is None and self.options["columnar"]:
+            format_batch = build_batch_formatter(description, self.sanitizer, scan.escape)
+        elif scan.routes is None:
+            format_row = build_row_formatter(description, self.sanitizer, cache, scan.escape)
+        else:
+            # La última columna es el valor del filtro: elige el archivo y no se escribe
+            format_row = build_row_formatter(description[:-1], self.sanitizer, cache, scan.escape)
+            by_value = {value: outputs[scan.tables.index(table)] for value, table in scan.routes.items()}
+
+        clock = time.perf_counter
+        last_row = None
+        while not self._cancel.is_set():
+            started = clock()
+            rows = cursor.fetchmany(sizer.batch_size)
+            elapsed = clock() - started
+            metrics.add("fetch", elapsed)
+            if not rows:
+                break
+            metrics.first_row()
+            fetched = len(rows)
+            last_row = rows[-1]
+            if hidden:
+                rows = [row[:-hidden] for row in rows]
+            if join_rows is not None:
+                started = clock()
+                rows = join_rows(rows)
+                metrics.add("join", clock() - started)
+            if dedupe is not None:
+                started = clock()
+                rows = dedupe.filter(rows)
+                metrics.add("dedupe", clock() - started)
+
+            started = clock()
+            if format_batch is not None:
+                lines = format_batch(rows)
+                formatted = clock()
+                written = 0
+                for output in outputs:
+                    written = output.write(lines)
+                total_written = written * len(outputs)
+            elif scan.routes is None:
+                lines = list(map(format_row, rows))
+                formatted = clock()
+                written = 0
+                for output in outputs:
+                    written = output.write(lines)
+                total_written = written * len(outputs)
+            else:
+                batches = {id(output): [] for output in outputs}
+                for row in rows:
+                    output = by_value.get(filter_key(row[-1]))
+                    if output is not None:
+                        batches[id(output)].append(format_row(row[:-1]))
+                formatted = clock()
+                written = total_written = sum(output.write(batches[id(output)]) for output in outputs)
+            metrics.add("sanitize", formatted - started)
+            metrics.add("write", clock() - formatted)
+            metrics.rows += fetched
+            metrics.bytes += total_written
+            metrics.batches += 1
+
+            sizer.record(fetched, elapsed, written)
+            for output in outputs:
+                self.progress.update(output.table, output.records_count)
+
+        return last_row
@@ -0,0 +1,258 @@
+"""Exportación de las mismas tablas en varias instancias y bases de datos a la vez, con resumen consolidado"""
+
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from export_engine import ExportEngine, list_databases, open_connection
+
+FANOUT_WORKERS = 4
+FANOUT_MAX_WORKERS = 16
+
+# En la lista de destinos, "*" (o solo la instancia) significa todas las bases de usuario de la instancia
+ALL_DATABASES = "*"
+
+_UNSAFE_PATH_CHARS = re.compile(r'[\\/:*?"<>|]+')
+
+
+class ExportTarget:
+    def __init__(self, instance, database):
+        self.instance = instance
+        self.database = database
+
+    @property
+    def label(self):
+        return f"{self.instance} → {self.database}"
+
+    def folder_name(self, with_instance):
+        """Subcarpeta de la base; lleva la instancia delante si el lote incluye varias instancias"""
+        name = f"{self.instance} - {self.database}" if with_instance else self.database
+        return _UNSAFE_PATH_CHARS.sub("_", name).strip(" .") or "_"
+
+    def __eq__(self, other):
+        return (self.instance.casefold(), self.database.casefold()) == (other.instance.casefold(), other.database.casefold())
+
+    def __hash__(self):
+        return hash((self.instance.casefold(), self.database.casefold()))
+
+
+def parse_targets(lines):
+    """Lee líneas "INSTANCIA;BASE" ("#" comenta; sin base o con "*" = todas las bases de la instancia)"""
+    targets = []
+    for number, line in enumerate(lines, 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        instance, _, database = (part.strip() for part in line.partition(";"))
+        if not instance:
+            raise ValueError(f"Línea {number}: falta la instancia")
+        targets.append(ExportTarget(instance, database or ALL_DATABASES))
+    return targets
+
+
+def load_targets(path):
+    with open(path, encoding="utf-8-sig") as f:
+        return parse_targets(f)
+
+
+class FanOutExport:
+    """Exporta las tablas elegidas de cada destino con un pool acotado, una subcarpeta por base.
+
+    Cada destino usa su propio ExportEngine y sus propias conexiones; con `parallel_tables` mayor
+    que 1 en las opciones se abren hasta `workers` × `parallel_tables` conexiones a la vez.
+    """
+
+    def __init__(
+        self,
+        targets,
+        connection_string_for,
+        options=None,
+        workers=FANOUT_WORKERS,
+        cancel_event=None,
+        on_progress=None,
+        on_progress_text=None,
+        on_target_status=None,
+        on_log=None,
+    ):
+        self.targets = list(targets)
+        # Instancia → cadena de conexión (mismas credenciales para todas, o las que decida quien llama)
+        self.connection_string_for = connection_string_for
+        self.options = dict(options or {})
+        self.workers = max(1, min(FANOUT_MAX_WORKERS, workers))
+        self._cancel = cancel_event or threading.Event()
+        self.on_progress = on_progress
+        self.on_progress_text = on_progress_text
+        self.on_target_status = on_target_status
+        self.on_log = on_log
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _log(self, source, text):
+        if self.on_log is not None:
+            self.on_log(source, text)
+
+    def _status(self, text):
+        if self.on_target_status is not None:
+            self.on_target_status(text)
+
+    def expand(self):
+        """Reemplaza cada "*" por las bases de la instancia; devuelve (destinos, {instancia: error})"""
+        targets = []
+        errors = {}
+        for target in self.targets:
+            if target.database != ALL_DATABASES:
+                targets.append(target)
+                continue
+            try:
+                connection = open_connection(self.connection_string_for(target.instance))
+                try:
+                    databases = list_databases(connection)
+                finally:
+                    connection.close()
+            except Exception as exc:
+                errors[target.instance] = str(exc)
+                self._status(f"✗ {target.instance}: no se pudieron listar las bases ({exc})")
+                continue
+            self._log(target.instance, f"{len(databases)} base(s) de datos: {', '.join(databases)}")
+            targets.extend(ExportTarget(target.instance, database) for database in databases)
+        # Sin duplicados y en el orden de la lista
+        return list(dict.fromkeys(targets)), errors
+
+    def _export_target(self, target, tables, folder):
+        started = time.perf_counter()
+        entry = {
+            "instance": target.instance,
+            "database": target.database,
+            "folder": folder,
+            "status": "cancelada",
+            "total_tables": len(tables),
+            "exported_tables": 0,
+            "total_records": 0,
+            "failed": {},
+            "error": None,
+            "metrics_file": None,
+            "elapsed": 0.0,
+        }
+        if self._cancel.is_set():
+            return entry
+
+        self._status(f"⏳ {target.label}")
+        engine = ExportEngine(
+            self.connection_string_for(target.instance),
+            target.database,
+            self.options,
+            cancel_event=self._cancel,
+            on_log=lambda table, text: self._log(f"{target.label} · {table}", text),
+        )
+        try:
+            result = engine.run(tables, folder)
+        except Exception as exc:
+            entry["status"] = "error"
+            entry["error"] = str(exc)
+            self._status(f"✗ {target.label}: Error ({exc})")
+        else:
+            entry["exported_tables"] = len(result["exported_files"])
+            entry["total_records"] = result["total_records"]
+            entry["failed"] = result["failed"]
+            entry["cancelled_tables"] = result["cancelled"]
+            entry["metrics_file"] = result.get("metrics_file")
+            if self._cancel.is_set():
+                entry["status"] = "cancelada"
+            elif result["failed"]:
+                entry["status"] = "incompleta"
+                self._status(f"⚠️ {target.label}: {len(result['failed'])} tabla(s) con error")
+            else:
+                entry["status"] = "ok"
+                self._status(f"✓ {target.label}: {result['total_records']} registros")
+        entry["elapsed"] = round(time.perf_counter() - started, 2)
+        return entry
+
+    def run(self, selected_tables, folder):
+        started_at = datetime.datetime.now()
+        started = time.perf_counter()
+        os.makedirs(folder, exist_ok=True)
+
+        targets, discovery_errors = self.expand()
+        with_instance = len({target.instance.casefold() for target in targets}) > 1
+        entries = [
+            {"instance": instance, "database": ALL_DATABASES, "status": "error", "error": error}
+            for instance, error in discovery_errors.items()
+        ]
+
+        completed = 0
+        total = len(targets)
+        if self.on_progress is not None:
+            self.on_progress(0)
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(1, total))) as executor:
+            futures = {
+                executor.submit(
+                    self._export_target,
+                    target,
+                    selected_tables,
+                    os.path.join(folder, target.folder_name(with_instance)),
+                ): target
+                for target in targets
+            }
+            results = {}
+            try:
+                for future in as_completed(futures):
+                    target = futures[future]
+                    results[target] = future.result()
+                    completed += 1
+                    if self.on_progress is not None:
+                        self.on_progress(int(completed * 100 / total))
+                    if self.on_progress_text is not None:
+                        self.on_progress_text(f"Bases exportadas: {completed}/{total}")
+            except BaseException:
+                # Ctrl+C u otro error: los destinos en curso terminan su lote actual y los pendientes no empiezan
+                self._cancel.set()
+                raise
+        entries.extend(results[target] for target in targets)
+
+        summary = {
+            "started": started_at.isoformat(timespec="seconds"),
+            "folder": folder,
+            "tables": list(selected_tables),
+            "workers": self.workers,
+            "elapsed": round(time.perf_counter() - started, 2),
+            "total_targets": len(entries),
+            "ok_targets": sum(1 for entry in entries if entry["status"] == "ok"),
+            "total_records": sum(entry.get("total_records", 0) for entry in entries),
+            "targets": entries,
+        }
+        summary_file = os.path.join(folder, f"resumen_{started_at:%Y%m%d_%H%M%S}.json")
+        try:
+            with open(summary_file, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+        except OSError as exc:
+            self._log("Resumen", f"No se pudo guardar el resumen: {exc}")
+            summary_file = None
+        summary["summary_file"] = summary_file
+        return summary
+
+
+def format_summary(summary):
+    """Texto del resumen consolidado para la consola o un cuadro de mensaje"""
+    lines = [
+        f"Bases: {summary['ok_targets']}/{summary['total_targets']} completas",
+        f"Registros: {summary['total_records']}",
+        f"Tiempo: {summary['elapsed']:.1f} s",
+        "",
+    ]
+    for entry in summary["targets"]:
+        label = f"{entry['instance']} → {entry['database']}"
+        if entry["status"] == "ok":
+            lines.append(f"✓ {label}: {entry['total_records']} registros ({entry['elapsed']:.1f} s)")
+        elif entry["status"] == "incompleta":
+            failed = ", ".join(entry["failed"])
+            lines.append(f"⚠️ {label}: {entry['exported_tables']}/{entry['total_tables']} tablas, con error: {failed}")
+        elif entry["status"] == "cancelada":
+            lines.append(f"⚠️ {label}: cancelada")
+        else:
+            lines.append(f"✗ {label}: Error ({entry['error']})")
+    return "\n".join(lines)
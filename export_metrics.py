@@ -0,0 +1,162 @@
+"""Métricas por etapa de cada exportación (servidor, red y CPU del cliente), guardadas en JSON"""
+
+import datetime
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+METRICS_VERSION = 1
+METRICS_FOLDER = "metricas"
+
+# Etapas medidas por consulta; "join" incluye la carga de los índices de dimensión y "dedupe" el
+# descarte de repetidas en el cliente
+SCAN_STAGES = ("execute", "first_row", "fetch", "join", "dedupe", "sanitize", "write")
+
+# Etapas que cuentan para decidir qué limita una consulta
+_BOUND_STAGES = {
+    "servidor": ("execute",),
+    "red": ("fetch",),
+    "cliente": ("join", "dedupe", "sanitize", "write"),
+}
+
+
+class ScanMetrics:
+    """Tiempos de una consulta (puede alimentar varias tablas), acumulados lote a lote"""
+
+    def __init__(self, tables):
+        self.tables = list(tables)
+        self.seconds = dict.fromkeys(SCAN_STAGES, 0.0)
+        self.rows = 0
+        self.bytes = 0
+        self.batches = 0
+        self.peak_memory = None
+        # Resumen de la depuración en el cliente (StreamingDedupe.to_dict), si la hubo
+        self.dedupe = None
+        self.error = None
+        self.elapsed = 0.0
+        self._started = time.perf_counter()
+        self._query_sent = self._started
+
+    def add(self, stage, seconds):
+        self.seconds[stage] += seconds
+
+    def query_sent(self):
+        """Marca el envío de la consulta (o el paso a su conjunto de resultados en un lote)"""
+        self._query_sent = time.perf_counter()
+
+    def first_row(self):
+        """Se llama al recibir el primer lote: mide desde el envío de la consulta"""
+        if not self.batches:
+            self.seconds["first_row"] = time.perf_counter() - self._query_sent
+
+    def bound(self):
+        """Dónde se fue la mayor parte del tiempo: "servidor", "red" o "cliente" """
+        totals = {name: sum(self.seconds[stage] for stage in stages) for name, stages in _BOUND_STAGES.items()}
+        name = max(totals, key=totals.get)
+        return name if totals[name] > 0 else None
+
+    def to_dict(self):
+        return {
+            "tables": self.tables,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "batches": self.batches,
+            "elapsed": round(self.elapsed, 4),
+            "seconds": {stage: round(seconds, 4) for stage, seconds in self.seconds.items()},
+            "rows_per_second": round(self.rows / self.elapsed) if self.elapsed else 0,
+            "bound": self.bound(),
+            "peak_memory_mb": None if self.peak_memory is None else round(self.peak_memory / (1024 * 1024), 2),
+            "dedupe": self.dedupe,
+            "error": self.error,
+        }
+
+
+class RunMetrics:
+    """Reúne las métricas de todas las consultas de una exportación y las guarda al terminar.
+
+    Con `trace_memory` se activa tracemalloc (más lento); el pico por consulta solo se mide
+    cuando las consultas corren de a una, porque el pico de tracemalloc es de todo el proceso.
+    """
+
+    def __init__(self, database="", options=None, trace_memory=False, sequential=True, on_scan=None):
+        self.database = database
+        self.options = dict(options or {})
+        self.trace_memory = trace_memory
+        self.on_scan = on_scan
+        self.scans = []
+        self.connect_seconds = 0.0
+        self.connections = 0
+        self.peak_memory = None
+        self.started_at = datetime.datetime.now()
+        self.elapsed = 0.0
+        self._scan_peaks = trace_memory and sequential
+        self._own_tracing = False
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+
+    def add_connect(self, seconds):
+        with self._lock:
+            self.connect_seconds += seconds
+            self.connections += 1
+
+    def scan_started(self, tables):
+        if self._scan_peaks:
+            tracemalloc.reset_peak()
+        return ScanMetrics(tables)
+
+    def scan_finished(self, scan):
+        scan.elapsed = time.perf_counter() - scan._started
+        if self._scan_peaks:
+            scan.peak_memory = tracemalloc.get_traced_memory()[1]
+        with self._lock:
+            self.scans.append(scan)
+        if self.on_scan is not None:
+            self.on_scan(scan.to_dict())
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self._started
+        if self.trace_memory and tracemalloc.is_tracing():
+            peaks = [scan.peak_memory for scan in self.scans if scan.peak_memory is not None]
+            self.peak_memory = max(peaks + [tracemalloc.get_traced_memory()[1]])
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+
+    def to_dict(self):
+        stages = dict.fromkeys(SCAN_STAGES, 0.0)
+        for scan in self.scans:
+            for stage, seconds in scan.seconds.items():
+                stages[stage] += seconds
+        rows = sum(scan.rows for scan in self.scans)
+        return {
+            "version": METRICS_VERSION,
+            "started": self.started_at.isoformat(timespec="seconds"),
+            "database": self.database,
+            "options": self.options,
+            "elapsed": round(self.elapsed, 4),
+            "connect": {"seconds": round(self.connect_seconds, 4), "connections": self.connections},
+            "rows": rows,
+            "bytes": sum(scan.bytes for scan in self.scans),
+            "rows_per_second": round(rows / self.elapsed) if self.elapsed else 0,
+            "seconds": {stage: round(seconds, 4) for stage, seconds in stages.items()},
+            "peak_memory_mb": None if self.peak_memory is None else round(self.peak_memory / (1024 * 1024), 2),
+            "scans": [scan.to_dict() for scan in self.scans],
+        }
+
+    def save(self, folder):
+        """Escribe metricas/metricas_<fecha>.json en la carpeta de destino; devuelve la ruta"""
+        metrics_folder = os.path.join(folder, METRICS_FOLDER)
+        os.makedirs(metrics_folder, exist_ok=True)
+        path = os.path.join(metrics_folder, f"metricas_{self.started_at:%Y%m%d_%H%M%S}.json")
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2, default=str)
+        os.replace(temp_path, path)
+        return path
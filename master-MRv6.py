@@ -1,1155 +1,1772 @@
-import os
-import sys
-import socket
-import pyodbc
-import winreg
-import unicodedata
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QIcon, QPixmap
-from PyQt6.QtWidgets import (
-    QApplication,
-    QCheckBox,
-    QComboBox,
-    QFileDialog,
-    QFormLayout,
-    QFrame,
-    QGridLayout,
-    QGroupBox,
-    QHBoxLayout,
-    QLabel,
-    QLineEdit,
-    QListWidget,
-    QListWidgetItem,
-    QMainWindow,
-    QMessageBox,
-    QProgressBar,
-    QPushButton,
-    QScrollArea,
-    QSizePolicy,
-    QStackedWidget,
-    QTextEdit,
-    QVBoxLayout,
-    QWidget,
-)
-
-class SQLServerConnector(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Conector SQL Server - Exportador de Datos")
-        self.resize(950, 680)
-        self.setMinimumSize(880, 640)
-        
-        self.connection = None
-        self.connected_instance = ""
-        self.selected_database = ""
-        self.logo_pixmap = self.load_logo()
-
-        self.central = QWidget()
-        self.setCentralWidget(self.central)
-
-        self.central_layout = QVBoxLayout(self.central)
-        self.central_layout.setContentsMargins(0, 0, 0, 0)
-        self.central_layout.setSpacing(0)
-
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area_widget = QWidget()
-        self.scroll_area_layout = QVBoxLayout(self.scroll_area_widget)
-        self.scroll_area_layout.setContentsMargins(32, 32, 32, 32)
-        self.scroll_area_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
-        self.scroll_area.setWidget(self.scroll_area_widget)
-        self.central_layout.addWidget(self.scroll_area)
-
-        self.stacked = QStackedWidget()
-        self.scroll_area_layout.addWidget(self.stacked, alignment=Qt.AlignmentFlag.AlignHCenter)
-
-        self.setup_connection_page()
-        self.setup_database_page()
-        self.setup_export_page()
-
-        self.apply_stylesheet()
-        self.apply_window_icon()
-        self.stacked.setCurrentWidget(self.connection_page)
-
-    def get_resource_path(self, relative_path):
-        """Obtiene la ruta absoluta al recurso, funciona para desarrollo y para PyInstaller"""
-        try:
-            # PyInstaller crea una carpeta temporal y almacena la ruta en _MEIPASS
-            base_path = sys._MEIPASS
-        except Exception:
-            base_path = os.path.abspath(".")
-        
-        return os.path.join(base_path, relative_path)
-    
-    def load_logo(self):
-        """Carga el logo desde diferentes ubicaciones posibles"""
-        # Lista de posibles ubicaciones del logo (en orden de prioridad)
-        possible_paths = [
-            self.get_resource_path("resources/logo.png"),  # Para PyInstaller
-            self.get_resource_path("logo.png"),            # Para PyInstaller (raíz)
-            os.path.join(os.path.dirname(__file__), "resources", "logo.png"),  # Desarrollo
-            os.path.join(os.path.dirname(__file__), "logo.png"),  # Desarrollo (raíz)
-            "resources/logo.png",  # Ruta relativa
-            "logo.png",            # Ruta relativa directa
-        ]
-        
-        for logo_path in possible_paths:
-            if os.path.exists(logo_path):
-                pixmap = QPixmap(logo_path)
-                if not pixmap.isNull():
-                    print(f"✅ Logo cargado desde: {logo_path}")
-                    return pixmap
-        
-        # Si no se encuentra el logo, mostrar mensaje (solo en desarrollo)
-        print("⚠️ No se pudo cargar el logo. Verifica que el archivo 'logo.png' exista en la carpeta 'resources'.")
-        return None
-
-    # ----------- Configuración de páginas ----------- #
-    def setup_connection_page(self):
-        self.connection_page = QWidget()
-        layout = QVBoxLayout(self.connection_page)
-        layout.setContentsMargins(24, 24, 24, 24)
-        layout.setSpacing(24)
-
-        # Logo centrado
-        logo_label = self._create_logo_label(80)
-        if logo_label:
-            logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(logo_label, alignment=Qt.AlignmentFlag.AlignCenter)
-
-        title = QLabel("Conector SQL Server")
-        title.setObjectName("titleLabel")
-        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(title)
-
-        subtitle = QLabel("Conecta y exporta datos a archivos TXT")
-        subtitle.setObjectName("subtitleLabel")
-        subtitle.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(subtitle)
-
-        card = QGroupBox("Credenciales de conexión")
-        card_layout = QVBoxLayout(card)
-        card_layout.setSpacing(16)
-
-        search_layout = QVBoxLayout()
-        search_label = QLabel("🔍 Buscar Instancias SQL Server")
-        search_label.setObjectName("sectionLabel")
-        search_layout.addWidget(search_label)
-
-        self.search_btn = QPushButton("Buscar Instancias Disponibles")
-        self.search_btn.clicked.connect(self.search_instances)
-        self.search_btn.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
-        self.search_btn.setMinimumWidth(240)
-        search_layout.addWidget(self.search_btn, alignment=Qt.AlignmentFlag.AlignLeft)
-
-        instance_layout = QHBoxLayout()
-        instance_label = QLabel("Instancia:")
-        self.instance_combo = QComboBox()
-        self.instance_combo.setEditable(True)
-        instance_layout.addWidget(instance_label)
-        instance_layout.addWidget(self.instance_combo)
-        search_layout.addLayout(instance_layout)
-
-        card_layout.addLayout(search_layout)
-
-        self.windows_check = QCheckBox("Usar autenticación de Windows (Recomendado)")
-        self.windows_check.setChecked(True)
-        self.windows_check.stateChanged.connect(self.toggle_credentials)
-        card_layout.addWidget(self.windows_check)
-
-        credentials_form = QFormLayout()
-        credentials_form.setSpacing(12)
-        self.user_entry = QLineEdit()
-        self.pass_entry = QLineEdit()
-        self.pass_entry.setEchoMode(QLineEdit.EchoMode.Password)
-        credentials_form.addRow("Usuario:", self.user_entry)
-        credentials_form.addRow("Contraseña:", self.pass_entry)
-        card_layout.addLayout(credentials_form)
-
-        self.connect_btn = QPushButton("Conectar al Servidor")
-        self.connect_btn.setEnabled(False)
-        self.connect_btn.clicked.connect(self.connect_to_server)
-        card_layout.addWidget(self.connect_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
-
-        self.status_label = QLabel("Listo para conectar")
-        self.status_label.setObjectName("infoLabel")
-        card_layout.addWidget(self.status_label)
-
-        help_label = QLabel("💡 Consejo: Usa autenticación de Windows para una conexión más segura")
-        help_label.setObjectName("hintLabel")
-        card_layout.addWidget(help_label)
-
-        layout.addWidget(card)
-        layout.addStretch()
-        self.stacked.addWidget(self.connection_page)
-        self.toggle_credentials()
-
-    def setup_database_page(self):
-        self.database_page = QWidget()
-        layout = QVBoxLayout(self.database_page)
-        layout.setContentsMargins(24, 24, 24, 24)
-        layout.setSpacing(24)
-
-        # Logo centrado
-        logo_label = self._create_logo_label(80)
-        if logo_label:
-            logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(logo_label, alignment=Qt.AlignmentFlag.AlignCenter)
-
-        title = QLabel("Seleccionar Base de Datos")
-        title.setObjectName("titleLabel")
-        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(title)
-
-        self.connection_info_label = QLabel("")
-        self.connection_info_label.setObjectName("successLabel")
-        self.connection_info_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(self.connection_info_label)
-
-        card = QGroupBox("Bases de Datos Disponibles")
-        card_layout = QVBoxLayout(card)
-        card_layout.setSpacing(18)
-
-        self.database_combo = QComboBox()
-        card_layout.addWidget(self.database_combo)
-
-        self.db_status_label = QLabel("Cargando bases de datos...")
-        self.db_status_label.setObjectName("infoLabel")
-        card_layout.addWidget(self.db_status_label)
-
-        buttons_layout = QHBoxLayout()
-        buttons_layout.setSpacing(12)
-
-        self.select_db_btn = QPushButton("Seleccionar Base de Datos")
-        self.select_db_btn.setEnabled(False)
-        self.select_db_btn.clicked.connect(self.select_database)
-        buttons_layout.addWidget(self.select_db_btn)
-
-        back_btn = QPushButton("← Cambiar Conexión")
-        back_btn.clicked.connect(self.back_to_connection)
-        buttons_layout.addWidget(back_btn)
-
-        card_layout.addLayout(buttons_layout)
-
-        self.final_status_label = QLabel("")
-        self.final_status_label.setObjectName("infoLabel")
-        card_layout.addWidget(self.final_status_label)
-
-        layout.addWidget(card)
-        layout.addStretch()
-        self.stacked.addWidget(self.database_page)
-
-    def setup_export_page(self):
-        self.export_page = QWidget()
-        page_layout = QVBoxLayout(self.export_page)
-        page_layout.setContentsMargins(24, 24, 24, 24)
-        page_layout.setSpacing(24)
-
-        # Logo centrado
-        logo_label = self._create_logo_label(80)
-        if logo_label:
-            logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            page_layout.addWidget(logo_label, alignment=Qt.AlignmentFlag.AlignCenter)
-
-        title = QLabel("Exportar Datos a TXT")
-        title.setObjectName("titleLabel")
-        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        page_layout.addWidget(title)
-
-        self.export_info_label = QLabel("")
-        self.export_info_label.setObjectName("successLabel")
-        self.export_info_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        page_layout.addWidget(self.export_info_label)
-
-        # Sección MAESTROS
-        maestros_group = QGroupBox("📋 MAESTROS")
-        maestros_layout = QVBoxLayout(maestros_group)
-        maestros_layout.setSpacing(16)
-
-        self.maestros_grid = QGridLayout()
-        self.maestros_grid.setHorizontalSpacing(20)
-        self.maestros_grid.setVerticalSpacing(10)
-
-        self.maestros_checkboxes = {}
-        # SOLO los nombres de las tablas, sin descripciones
-        maestros_tables = [
-            "Artículos",
-            "Categoría",
-            "Control Sanitario",
-            "Marcas",
-            "Usos",
-            "Proveedores",
-            "Principios Activos",
-            "Bancos",
-            "Forma de Pago",
-        ]
-
-        for index, table in enumerate(maestros_tables):
-            checkbox = QCheckBox(table)
-            checkbox.setChecked(True)
-            
-            row = index // 3  # 3 columnas
-            col = index % 3
-            self.maestros_grid.addWidget(checkbox, row, col, alignment=Qt.AlignmentFlag.AlignLeft)
-            self.maestros_checkboxes[table] = checkbox
-
-        maestros_layout.addLayout(self.maestros_grid)
-
-        maestros_buttons_layout = QHBoxLayout()
-        maestros_buttons_layout.setSpacing(12)
-        maestros_select_all_btn = QPushButton("✅ Seleccionar Todo")
-        maestros_select_all_btn.clicked.connect(lambda: self.select_all_tables("maestros"))
-        maestros_deselect_all_btn = QPushButton("❌ Deseleccionar Todo")
-        maestros_deselect_all_btn.clicked.connect(lambda: self.deselect_all_tables("maestros"))
-        maestros_buttons_layout.addWidget(maestros_select_all_btn)
-        maestros_buttons_layout.addWidget(maestros_deselect_all_btn)
-        maestros_buttons_layout.addStretch()
-        maestros_layout.addLayout(maestros_buttons_layout)
-
-        page_layout.addWidget(maestros_group)
-
-        # Sección RELACIONES
-        relaciones_group = QGroupBox("🔗 RELACIONES")
-        relaciones_layout = QVBoxLayout(relaciones_group)
-        relaciones_layout.setSpacing(16)
-
-        self.relaciones_grid = QGridLayout()
-        self.relaciones_grid.setHorizontalSpacing(20)
-        self.relaciones_grid.setVerticalSpacing(10)
-
-        self.relaciones_checkboxes = {}
-        # SOLO los nombres de las relaciones, sin descripciones
-        relaciones_tables = [
-            "Artículos - Categorías",
-            "Artículos - Códigos de Barras",
-            "Artículos - Componentes",
-            "Artículos - Control Sanitario",
-            "Artículos - Marcas",
-            "Artículos - Principio Activo",
-            "Artículos - Unidades de Medida",
-            "Artículos - Usos",
-            "Artículos - Impuesto",
-            "Artículos - Atributos (Medicina)",
-            "Artículos - Atributos (Genérico)",
-        ]
-
-        for index, table in enumerate(relaciones_tables):
-            checkbox = QCheckBox(table)
-            checkbox.setChecked(True)
-            
-            row = index // 3  # 3 columnas
-            col = index % 3
-            self.relaciones_grid.addWidget(checkbox, row, col, alignment=Qt.AlignmentFlag.AlignLeft)
-            self.relaciones_checkboxes[table] = checkbox
-
-        relaciones_layout.addLayout(self.relaciones_grid)
-
-        relaciones_buttons_layout = QHBoxLayout()
-        relaciones_buttons_layout.setSpacing(12)
-        relaciones_select_all_btn = QPushButton("✅ Seleccionar Todo")
-        relaciones_select_all_btn.clicked.connect(lambda: self.select_all_tables("relaciones"))
-        relaciones_deselect_all_btn = QPushButton("❌ Deseleccionar Todo")
-        relaciones_deselect_all_btn.clicked.connect(lambda: self.deselect_all_tables("relaciones"))
-        relaciones_buttons_layout.addWidget(relaciones_select_all_btn)
-        relaciones_buttons_layout.addWidget(relaciones_deselect_all_btn)
-        relaciones_buttons_layout.addStretch()
-        relaciones_layout.addLayout(relaciones_buttons_layout)
-
-        page_layout.addWidget(relaciones_group)
-
-        destination_group = QGroupBox("📁 Carpeta de Destino")
-        destination_layout = QHBoxLayout(destination_group)
-        destination_layout.setSpacing(12)
-
-        self.folder_path = os.path.join(os.path.expanduser("Maestros TXT"))
-        self.folder_entry = QLineEdit(self.folder_path)
-        self.folder_entry.setReadOnly(True)
-        destination_layout.addWidget(self.folder_entry)
-
-        browse_btn = QPushButton("Examinar…")
-        browse_btn.clicked.connect(self.browse_folder)
-        destination_layout.addWidget(browse_btn)
-
-        page_layout.addWidget(destination_group)
-
-        progress_group = QGroupBox("🚀 Progreso de Exportación")
-        progress_layout = QVBoxLayout(progress_group)
-        progress_layout.setSpacing(16)
-
-        self.progress_bar = QProgressBar()
-        self.progress_bar.setRange(0, 100)
-        progress_layout.addWidget(self.progress_bar)
-
-        self.progress_label = QLabel("Listo para exportar")
-        self.progress_label.setObjectName("infoLabel")
-        self.progress_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        progress_layout.addWidget(self.progress_label)
-
-        self.export_status_label = QLabel("")
-        self.export_status_label.setObjectName("successLabel")
-        self.export_status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        progress_layout.addWidget(self.export_status_label)
-
-        query_label = QLabel("Consultas ejecutadas:")
-        query_label.setObjectName("sectionLabel")
-        progress_layout.addWidget(query_label)
-
-        self.query_text = QTextEdit()
-        self.query_text.setReadOnly(True)
-        progress_layout.addWidget(self.query_text)
-
-        self.export_btn = QPushButton("🎯 Iniciar Exportación")
-        self.export_btn.clicked.connect(self.execute_and_export)
-        progress_layout.addWidget(self.export_btn, alignment=Qt.AlignmentFlag.AlignCenter)
-
-        page_layout.addWidget(progress_group)
-
-        back_btn = QPushButton("← Cambiar Base de Datos")
-        back_btn.clicked.connect(self.back_to_database_selection)
-        page_layout.addWidget(back_btn, alignment=Qt.AlignmentFlag.AlignCenter)
-
-        page_layout.addStretch()
-        self.stacked.addWidget(self.export_page)
-
-    # ----------- Métodos auxiliares ----------- #
-    def _create_logo_label(self, height=60):
-        if not self.logo_pixmap:
-            return None
-        label = QLabel()
-        label.setPixmap(
-            self.logo_pixmap.scaledToHeight(height, Qt.TransformationMode.SmoothTransformation)
-        )
-        label.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
-        return label
-
-    def apply_window_icon(self):
-        if self.logo_pixmap:
-            self.setWindowIcon(QIcon(self.logo_pixmap))
-
-    def apply_stylesheet(self):
-        self.setStyleSheet(
-            """
-            QWidget {
-                background: #181818;
-                color: #f5f5f5;
-                font-family: 'Segoe UI', Arial, sans-serif;
-                font-size: 10.5pt;
-            }
-            QScrollArea {
-                border: none;
-            }
-            QGroupBox {
-                background: #1f1f1f;
-                border: 1px solid #2d2d2d;
-                border-radius: 10px;
-                padding: 18px;
-            }
-            QPushButton {
-                background: #3a86ff;
-                color: #ffffff;
-                border: none;
-                border-radius: 6px;
-                padding: 9px 18px;
-                font-weight: 600;
-            }
-            QPushButton:disabled {
-                background: #3c3c3c;
-                color: #9e9e9e;
-            }
-            QPushButton:hover:!disabled {
-                background: #2f6ddb;
-            }
-            QPushButton:pressed:!disabled {
-                background: #2556af;
-            }
-            QLineEdit, QComboBox, QTextEdit {
-                background: #222222;
-                border: 1px solid #333333;
-                border-radius: 6px;
-                padding: 7px;
-                selection-background-color: #3a86ff;
-                selection-color: #ffffff;
-            }
-            QComboBox QAbstractItemView {
-                background: #222222;
-                border: 1px solid #333333;
-                selection-background-color: #3a86ff;
-                selection-color: #ffffff;
-            }
-            QTextEdit {
-                min-height: 120px;
-            }
-            QProgressBar {
-                background: #222222;
-                border: 1px solid #333333;
-                border-radius: 6px;
-                text-align: center;
-            }
-            QProgressBar::chunk {
-                background: #3a86ff;
-                border-radius: 6px;
-            }
-            QCheckBox {
-                spacing: 8px;
-            }
-            QCheckBox::indicator {
-                width: 18px;
-                height: 18px;
-                border-radius: 4px;
-                border: 1px solid #3a3a3a;
-                background: #222222;
-            }
-            QCheckBox::indicator:checked {
-                background: #3a86ff;
-                border: 1px solid #3a86ff;
-            }
-            #titleLabel {
-                font-size: 20pt;
-                font-weight: 700;
-            }
-            #subtitleLabel {
-                font-size: 11pt;
-                font-weight: 600;
-                color: #b0bec5;
-            }
-            #sectionLabel {
-                font-size: 11pt;
-                font-weight: 600;
-                color: #cfd8dc;
-            }
-            #infoLabel {
-                color: #64b5f6;
-                font-size: 10pt;
-            }
-            #successLabel {
-                color: #81c784;
-                font-size: 10pt;
-            }
-            #hintLabel {
-                color: #a0a0a0;
-                font-size: 9.5pt;
-            }
-            QScrollBar:vertical {
-                background: #1c1c1c;
-                width: 12px;
-                margin: 6px 0 6px 0;
-                border-radius: 6px;
-            }
-            QScrollBar::handle:vertical {
-                background: #2f2f2f;
-                border-radius: 6px;
-            }
-            QScrollBar::handle:vertical:hover {
-                background: #3a3a3a;
-            }
-            QScrollBar::add-line:vertical,
-            QScrollBar::sub-line:vertical {
-                height: 0;
-            }
-            """
-        )
-
-    def toggle_credentials(self):
-        enabled = not self.windows_check.isChecked()
-        self.user_entry.setEnabled(enabled)
-        self.pass_entry.setEnabled(enabled)
-
-    def _get_local_sql_instances(self):
-        instances = []
-        hostname = socket.gethostname()
-        registry_paths = [
-            r"SOFTWARE\Microsoft\Microsoft SQL Server\Instance Names\SQL",
-            r"SOFTWARE\WOW6432Node\Microsoft\Microsoft SQL Server\Instance Names\SQL",
-        ]
-        for path in registry_paths:
-            try:
-                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path) as key:
-                    index = 0
-                    while True:
-                        try:
-                            name, _, _ = winreg.EnumValue(key, index)
-                            if name.upper() == "MSSQLSERVER":
-                                instances.append(hostname)
-                            else:
-                                instances.append(f"{hostname}\\{name}")
-                            index += 1
-                        except OSError:
-                            break
-            except FileNotFoundError:
-                continue
-            except Exception as exc:  # noqa: F841
-                print(f"Info: No se pudieron leer instancias locales: {exc}")
-        # Remover duplicados manteniendo orden
-        seen = set()
-        ordered = []
-        for instance in instances:
-            if instance not in seen:
-                ordered.append(instance)
-                seen.add(instance)
-        return ordered
-
-    def _is_instance_reachable(self, instance_name):
-        conn_str = (
-            "DRIVER={ODBC Driver 17 for SQL Server};"
-            f"SERVER={instance_name};"
-            "Trusted_Connection=yes;"
-            "Connection Timeout=2;"
-        )
-        try:
-            conn = pyodbc.connect(conn_str)
-            conn.close()
-            return True
-        except pyodbc.Error as exc:
-            error_msg = str(exc)
-            if "Login failed" in error_msg or "Error de autenticación" in error_msg:
-                return True
-            if "network-related" in error_msg.lower() or "server does not exist" in error_msg.lower():
-                return False
-            if "timeout expired" in error_msg.lower():
-                return False
-            return False
-        except Exception:
-            return False
-
-    def _filter_valid_instances(self, candidates):
-        valid_instances = []
-        for instance_name in candidates:
-            if self._is_instance_reachable(instance_name):
-                valid_instances.append(instance_name)
-        return valid_instances
-
-    def search_instances(self):
-        self.search_btn.setEnabled(False)
-        self.status_label.setText("Buscando instancias...")
-        QApplication.processEvents()
-        
-        try:
-            instances = []
-            hostname = socket.gethostname()
-            local_instances = self._get_local_sql_instances()
-
-            if local_instances:
-                instances.extend(local_instances)
-            else:
-                common = [
-                    f"{hostname}",
-                    f"{hostname}\\SQLEXPRESS",
-                    "localhost",
-                    "localhost\\SQLEXPRESS",
-                    ".",
-                    ".\\SQLEXPRESS",
-                    "(local)",
-                    "(local)\\SQLEXPRESS",
-                ]
-                instances.extend(common)
-
-            try:
-                sources = pyodbc.dataSources()
-                for key in sources.keys():
-                    if "SQL Server" in sources[key] or "SQL Server" in key:
-                        instances.append(key)
-            except Exception as exc:  # noqa: F841 - solo informativo
-                print(f"Info: No se pudieron obtener fuentes de datos: {exc}")
-
-            instances = sorted(set(instances))
-
-            if not local_instances:
-                valid_instances = self._filter_valid_instances(instances)
-                if valid_instances:
-                    instances = valid_instances
-
-            self.instance_combo.clear()
-            self.instance_combo.addItems(instances)
-            if instances:
-                self.instance_combo.setCurrentIndex(0)
-                self.connect_btn.setEnabled(True)
-                self.status_label.setText(f"✅ Se encontraron {len(instances)} instancia(s)")
-            else:
-                self.status_label.setText("⚠️ No se encontraron instancias. Ingresa manualmente.")
-                self.connect_btn.setEnabled(True)
-        except Exception as exc:
-            self.status_label.setText("❌ Error en la búsqueda")
-            QMessageBox.critical(self, "Error", f"Error al buscar instancias:\n{exc}")
-        finally:
-            self.search_btn.setEnabled(True)
-
-    def connect_to_server(self):
-        instance = self.instance_combo.currentText().strip()
-        if not instance:
-            QMessageBox.warning(self, "Advertencia", "Por favor selecciona una instancia")
-            return
-        
-        try:
-            if self.windows_check.isChecked():
-                conn_str = (
-                    "DRIVER={ODBC Driver 17 for SQL Server};"
-                    f"SERVER={instance};"
-                    "Trusted_Connection=yes;"
-                    "Connection Timeout=10;"
-                )
-            else:
-                username = self.user_entry.text().strip()
-                password = self.pass_entry.text()
-                if not username or not password:
-                    QMessageBox.warning(self, "Advertencia", "Por favor ingresa usuario y contraseña")
-                    return
-                conn_str = (
-                    "DRIVER={ODBC Driver 17 for SQL Server};"
-                    f"SERVER={instance};"
-                    f"UID={username};"
-                    f"PWD={password};"
-                    "Connection Timeout=10;"
-                )
-
-            self.status_label.setText("Conectando…")
-            self.connect_btn.setEnabled(False)
-            QApplication.processEvents()
-
-            self.connection = pyodbc.connect(conn_str)
-            self.connected_instance = instance
-            self.connection_info_label.setText(f"Conectado a: {instance}")
-            self.stacked.setCurrentWidget(self.database_page)
-
-            QTimer.singleShot(100, self.load_databases)
-        except pyodbc.Error as exc:
-            error_msg = str(exc)
-            if "Login failed" in error_msg:
-                error_msg = "Error de autenticación: Usuario o contraseña incorrectos"
-            elif "timeout" in error_msg.lower():
-                error_msg = "Timeout: No se pudo conectar al servidor"
-            QMessageBox.critical(self, "Error de Conexión", f"No se pudo conectar:\n\n{error_msg}")
-            self.connect_btn.setEnabled(True)
-            self.status_label.setText("❌ Error de conexión")
-        except Exception as exc:
-            QMessageBox.critical(self, "Error", f"Error inesperado:\n{exc}")
-            self.connect_btn.setEnabled(True)
-            self.status_label.setText("❌ Error inesperado")
-
-    def load_databases(self):
-        self.database_combo.clear()
-        self.db_status_label.setText("Cargando bases de datos...")
-        self.select_db_btn.setEnabled(False)
-        QApplication.processEvents()
-
-        try:
-            cursor = self.connection.cursor()
-            queries = [
-                "SELECT name FROM sys.databases WHERE state_desc='ONLINE' AND database_id>4 ORDER BY name",
-                "SELECT name FROM sys.databases WHERE state_desc='ONLINE' ORDER BY name",
-                "SELECT name FROM sys.databases ORDER BY name",
-            ]
-            databases = []
-            for query in queries:
-                try:
-                    cursor.execute(query)
-                    rows = cursor.fetchall()
-                    if rows:
-                        databases = [str(row[0]) for row in rows]
-                        break
-                except Exception:
-                    continue
-            
-            cursor.close()
-            if databases:
-                self.database_combo.addItems(databases)
-                self.database_combo.setCurrentIndex(0)
-                self.select_db_btn.setEnabled(True)
-                self.db_status_label.setText(f"✅ Se encontraron {len(databases)} base(s) de datos")
-            else:
-                self.db_status_label.setText("⚠️ No se encontraron bases de datos")
-        except Exception as exc:
-            self.db_status_label.setText("❌ Error al cargar bases de datos")
-            QMessageBox.critical(self, "Error", f"No se pudieron cargar las bases de datos:\n{exc}")
-
-    def select_database(self):
-        database = self.database_combo.currentText()
-        if not database:
-            QMessageBox.warning(self, "Advertencia", "Por favor selecciona una base de datos")
-            return
-        
-        try:
-            self.final_status_label.setText("Conectando a la base de datos…")
-            self.select_db_btn.setEnabled(False)
-            QApplication.processEvents()
-            
-            cursor = self.connection.cursor()
-            cursor.execute(f"USE [{database}]")
-            cursor.close()
-            
-            self.selected_database = database
-            self.final_status_label.setText(f"✅ Conectado exitosamente a: {database}")
-
-            def switch_to_export():
-                self.export_info_label.setText(
-                    f"Conectado a: {self.connected_instance} → {self.selected_database}"
-                )
-                if not os.path.exists(self.folder_path):
-                    os.makedirs(self.folder_path, exist_ok=True)
-                self.folder_entry.setText(self.folder_path)
-                self.query_text.clear()
-                self.progress_bar.setValue(0)
-                self.progress_label.setText("Listo para exportar")
-                self.export_status_label.clear()
-                self.stacked.setCurrentWidget(self.export_page)
-
-            QTimer.singleShot(600, switch_to_export)
-        except Exception as exc:
-            self.final_status_label.setText("❌ Error al seleccionar base de datos")
-            self.select_db_btn.setEnabled(True)
-            QMessageBox.critical(self, "Error", f"No se pudo seleccionar la base de datos:\n{exc}")
-
-    # ----------- Exportación ----------- #
-    def browse_folder(self):
-        folder = QFileDialog.getExistingDirectory(
-            self, "Seleccionar Carpeta", self.folder_path, QFileDialog.Option.ShowDirsOnly
-        )
-        if folder:
-            self.folder_path = folder
-            self.folder_entry.setText(folder)
-            if not os.path.exists(folder):
-                os.makedirs(folder, exist_ok=True)
-
-    def select_all_tables(self, section):
-        if section == "maestros":
-            for checkbox in self.maestros_checkboxes.values():
-                checkbox.setChecked(True)
-        elif section == "relaciones":
-            for checkbox in self.relaciones_checkboxes.values():
-                checkbox.setChecked(True)
-
-    def deselect_all_tables(self, section):
-        if section == "maestros":
-            for checkbox in self.maestros_checkboxes.values():
-                checkbox.setChecked(False)
-        elif section == "relaciones":
-            for checkbox in self.relaciones_checkboxes.values():
-                checkbox.setChecked(False)
-
-    def log_query(self, table, query):
-        if self.query_text.toPlainText():
-            self.query_text.append("\n")
-        self.query_text.append(f"[{table}] {query.strip()}")
-        cursor = self.query_text.textCursor()
-        cursor.movePosition(cursor.MoveOperation.End)
-        self.query_text.setTextCursor(cursor)
-
-    def _normalize_text(self, value):
-        """Elimina tildes, caracteres especiales y convierte ñ a n"""
-        if value is None:
-            return ""
-        
-        value_str = str(value)
-        
-        # Si está vacío, retornar vacío
-        if not value_str.strip():
-            return value_str
-        
-        # Si es un número o contiene solo dígitos, puntos, comas y signos, no normalizar
-        cleaned = value_str.replace('.', '').replace(',', '').replace('-', '').replace('+', '').strip()
-        if cleaned.isdigit() or cleaned == '':
-            return value_str
-        
-        # Verificar si contiene letras (texto), si no contiene letras no normalizar
-        has_letters = any(char.isalpha() for char in value_str)
-        if not has_letters:
-            return value_str
-        
-        # Primero convertir ñ y Ñ a n y N
-        value_str = value_str.replace('ñ', 'n').replace('Ñ', 'N')
-        
-        # Eliminar caracteres especiales como acentos graves y apostrofos
-        value_str = value_str.replace('´', '').replace('`', '').replace("'", "").replace("‘", "").replace("’", "")
-        
-        # Normalizar y eliminar diacríticos (tildes, acentos, etc.) solo para texto
-        nfd = unicodedata.normalize('NFD', value_str)
-        # Filtrar solo los caracteres que no son marcas diacríticas (combining characters)
-        normalized = ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
-        
-        return normalized
-
-    def _clean_special_characters(self, text):
-        """Elimina caracteres especiales problemáticos manteniendo la legibilidad"""
-        if not text:
-            return text
-        
-        # Caracteres problemáticos comunes en archivos de texto
-        problematic_chars = {
-            '\x00': '',  # Null character
-            '\x01': '',  # Start of Header
-            '\x02': '',  # Start of Text
-            '\x03': '',  # End of Text
-            '\x04': '',  # End of Transmission
-            '\x05': '',  # Enquiry
-            '\x06': '',  # Acknowledge
-            '\x07': '',  # Bell
-            '\x08': '',  # Backspace
-            '\x0b': '',  # Vertical Tab
-            '\x0c': '',  # Form Feed
-            '\x0e': '',  # Shift Out
-            '\x0f': '',  # Shift In
-            '\x10': '',  # Data Link Escape
-            '\x11': '',  # Device Control 1
-            '\x12': '',  # Device Control 2
-            '\x13': '',  # Device Control 3
-            '\x14': '',  # Device Control 4
-            '\x15': '',  # Negative Acknowledge
-            '\x16': '',  # Synchronous Idle
-            '\x17': '',  # End of Transmission Block
-            '\x18': '',  # Cancel
-            '\x19': '',  # End of Medium
-            '\x1a': '',  # Substitute
-            '\x1b': '',  # Escape
-            '\x1c': '',  # File Separator
-            '\x1d': '',  # Group Separator
-            '\x1e': '',  # Record Separator
-            '\x1f': '',  # Unit Separator
-            '\x7f': '',  # Delete
-            '\ufffe': '', # BOM
-            '\uffff': '', # BOM
-            '´': '',     # Acento agudo
-            '`': '',     # Acento grave
-            '‘': '',     # Apostrofo curvo izquierdo
-            '’': '',     # Apostrofo curvo derecho
-            "'": "",     # Apostrofo simple
-        }
-        
-        cleaned_text = text
-        for char, replacement in problematic_chars.items():
-            cleaned_text = cleaned_text.replace(char, replacement)
-        
-        return cleaned_text
-
-    def execute_and_export(self):
-        # Combinar selecciones de ambas secciones
-        selected_maestros = [name for name, cb in self.maestros_checkboxes.items() if cb.isChecked()]
-        selected_relaciones = [name for name, cb in self.relaciones_checkboxes.items() if cb.isChecked()]
-        
-        selected_tables = selected_maestros + selected_relaciones
-        if not selected_tables:
-            QMessageBox.warning(self, "Advertencia", "Selecciona al menos una tabla o relación")
-            return
-
-        folder = self.folder_entry.text()
-        if not os.path.exists(folder):
-            os.makedirs(folder, exist_ok=True)
-
-        self.export_btn.setEnabled(False)
-        self.progress_bar.setValue(0)
-        self.progress_label.setText("Iniciando exportación…")
-        self.export_status_label.clear()
-        self.query_text.clear()
-        QApplication.processEvents()
-
-        total_tables = len(selected_tables)
-        exported_files = []
-        total_records = 0
-
-        for index, table in enumerate(selected_tables, start=1):
-            progress = int(((index - 1) / total_tables) * 100)
-            self.progress_bar.setValue(progress)
-            self.progress_label.setText(f"Exportando {table}… ({index}/{total_tables})")
-            QApplication.processEvents()
-
-            query = self.get_query_for_table(table)
-            if not query:
-                continue
-
-            self.log_query(table, query)
-
-            try:
-                cursor = self.connection.cursor()
-                cursor.execute(query)
-                rows = cursor.fetchall()
-
-                # Generar nombre de archivo limpiando caracteres especiales
-                filename = table.replace(' ', '_').replace('-', '_').replace('(', '').replace(')', '').lower()
-                filename = f"{filename}.txt"
-                filepath = os.path.join(folder, filename)
-
-                with open(filepath, "w", encoding="utf-8") as f:
-                    for row in rows:
-                        # Normalizar solo los valores de texto (quitar tildes y caracteres especiales)
-                        normalized_row = []
-                        for value in row:
-                            normalized_value = self._normalize_text(value)
-                            # Limpiar caracteres especiales problemáticos
-                            cleaned_value = self._clean_special_characters(normalized_value)
-                            normalized_row.append(cleaned_value)
-                        
-                        line = ";".join(str(value) for value in normalized_row)
-                        f.write(line + "\n")
-
-                cursor.close()
-                records_count = len(rows)
-                total_records += records_count
-                exported_files.append(f"• {filename} ({records_count} registros)")
-                self.export_status_label.setText(f"✓ {table}: {records_count} registros")
-            except Exception as exc:
-                self.export_status_label.setText(f"✗ {table}: Error ({exc})")
-                continue
-
-        self.progress_bar.setValue(100)
-        self.progress_label.setText("Exportación completada")
-        self.export_btn.setEnabled(True)
-
-        summary = "\n".join(exported_files)
-        message = (
-            "✅ Exportación completada!\n\n"
-            f"Tablas: {len(exported_files)}/{total_tables}\n"
-            f"Registros: {total_records}\n"
-            f"Ubicación: {folder}\n\n"
-            f"Archivos:\n{summary}"
-        )
-        reply = QMessageBox.question(self, "Éxito", f"{message}\n\n¿Abrir carpeta?")
-        if reply == QMessageBox.StandardButton.Yes:
-            try:
-                os.startfile(folder)
-            except Exception:
-                # Para sistemas no Windows
-                import subprocess
-                import platform
-                system = platform.system()
-                if system == "Darwin":  # macOS
-                    subprocess.run(["open", folder])
-                else:  # Linux
-                    subprocess.run(["xdg-open", folder])
-
-    def get_query_for_table(self, table_name):
-        # Consultas MAESTROS (las originales)
-        maestros_queries = {
-            "Artículos": "SELECT CodigoArticulo, REPLACE(Descripcion,';',' '), "
-            "REPLACE(DescripcionLarga,';',' '), CPE, PermisoSanitario, "
-            "CAST(ValorMaximo as int), CAST(ValorMinimo as int), "
-            "CASE WHEN DerechoOferta IS NULL THEN 'NULL' ELSE CAST(DerechoOferta as int) END, "
-            "CAST(GenerarEtiquetaCompras as int) "
-            "FROM InvArticulo JOIN InvMinMax on InvMinMax.InvArticuloId = InvArticulo.Id",
-            "Categoría": "SELECT CodigoCategoria, REPLACE(Descripcion,';',' ') FROM InvCategoria",
-            "Control Sanitario": "SELECT CodigoControl, REPLACE(Descripcion,';',' ') FROM InvControlSanitario",
-            "Marcas": "SELECT Codigo, REPLACE(Nombre,';',' '), "
-            "CASE WHEN Nota IS NULL THEN 'NULL' ELSE REPLACE(Nota,';',' ') END FROM InvMarca",
-            "Usos": "SELECT Codigo, REPLACE(Descripcion,';',' ') FROM InvUso",
-            "Proveedores": """WITH ProveedoresLimpios AS (
-    SELECT 
-        CodigoProveedor, 
-        REPLACE(Nombre,';',' ') AS NombreLimpio,
-        CASE WHEN Apellido IS NULL THEN 'NULL' ELSE REPLACE(Apellido,';',' ') END AS ApellidoLimpio,
-        REPLACE(IdentificacionFiscal,';',' ') AS IdentificacionFiscalLimpia,
-        Telefono, 
-        Representante, 
-        Contactos,
-        CASE WHEN NombreEnCheque IS NULL THEN 'NULL' ELSE REPLACE(NombreEnCheque,';',' ') END AS NombreEnChequeLimpio,
-        TipoContribuyente, 
-        TipoPersona, 
-        tipoProveedor,
-        ROW_NUMBER() OVER (
-            PARTITION BY 
-                REPLACE(IdentificacionFiscal,';',' '),
-                UPPER(REPLACE(REPLACE(Nombre,';',' '), ' ', ''))
-            ORDER BY CodigoProveedor ASC
-        ) AS FilaNum
-    FROM ComProveedor AS cp 
-    JOIN GenPersona AS g ON g.Id = cp.GenPersonaId 
-)
-SELECT 
-    CodigoProveedor, 
-    NombreLimpio,
-    ApellidoLimpio,
-    IdentificacionFiscalLimpia,
-    Telefono, 
-    Representante, 
-    Contactos,
-    NombreEnChequeLimpio,
-    TipoContribuyente, 
-    TipoPersona, 
-    tipoProveedor
-FROM ProveedoresLimpios
-WHERE FilaNum = 1
-ORDER BY CodigoProveedor ASC""",
-            "Principios Activos": "SELECT Codigo, REPLACE(Nombre,';',' '), CAST(SustanciaControlada as int) "
-            "FROM InvComponente",
-            "Bancos": "SELECT Codigo, REPLACE(Descripcion,';',' '), REPLACE(Nombre,';',' '), "
-            "tipoConfiguracion, estado FROM BanBanco",
-            "Forma de Pago": "SELECT Codigo, Nombre, Descripcion, estado, tipoFormaPago, "
-            "AplicaRetencion, PorcentajeRetencion, AplicaComisionFormaPago, PorcentajeComisionFormaPago, "
-            "CodigoImpresoraFiscal, AplicaIva "
-            "FROM BanFormaPago WHERE Codigo IN ('FP01','FP02','FP03','FP04','FP05','FP06','FP07')",
-        }
-
-        # Consultas RELACIONES
-        relaciones_queries = {
-            "Artículos - Categorías": "SELECT CodigoArticulo, CodigoCategoria FROM InvArticulo JOIN InvCategoria on InvCategoria.Id = InvArticulo.InvCategoriaId",
-            "Artículos - Códigos de Barras": """WITH CodigosBarrasLimpios AS (
-    SELECT 
-        CodigoArticulo, 
-        CodigoBarra, 
-        CAST(EsPrincipal as int) AS EsPrincipal,
-        ROW_NUMBER() OVER (
-            PARTITION BY CodigoBarra 
-            ORDER BY EsPrincipal DESC, CodigoArticulo ASC
-        ) AS FilaNum
-    FROM InvArticulo 
-    JOIN InvCodigoBarra on InvCodigoBarra.InvArticuloId = InvArticulo.Id
-    WHERE CodigoBarra IS NOT NULL AND CodigoBarra != ''
-)
-SELECT CodigoArticulo, CodigoBarra, EsPrincipal
-FROM CodigosBarrasLimpios
-WHERE FilaNum = 1""",
-            "Artículos - Componentes": "select InvArticulo.CodigoArticulo, InvComponente.Codigo from InvArticuloComponente join InvComponente on InvComponente.Id = InvArticuloComponente.InvComponenteId join InvArticulo on InvArticulo.Id = InvArticuloComponente.InvArticuloId",
-            "Artículos - Control Sanitario": "SELECT CodigoArticulo, InvControlSanitario.CodigoControl FROM InvArticulo JOIN InvControlSanitario on InvControlSanitario.Id = InvArticulo.InvControlSanitarioId",
-            "Artículos - Marcas": "SELECT CodigoArticulo, Codigo FROM InvArticulo JOIN InvMarca on InvMarca.Id = InvArticulo.InvMarcaId",
-            "Artículos - Principio Activo": "SELECT CodigoArticulo, InvComponente.Codigo FROM InvArticuloComponente JOIN InvArticulo on InvArticulo.Id = InvArticuloComponente.InvArticuloId JOIN InvComponente on InvComponente.Id = InvArticuloComponente.InvComponenteId",
-            "Artículos - Unidades de Medida": "SELECT a.CodigoArticulo, um.Codigo, um.Codigo, CAST(au.FactorConversion as int), um.Codigo, CAST(au.FactorConversion as int) "
-            "FROM InvArticulo a JOIN InvArticuloUnidad au on au.InvArticuloId=a.Id JOIN InvUnidadMedida um on um.Id=au.InvUnidadMedidaId ",
-            "Artículos - Usos": "SELECT CodigoArticulo, InvUso.Codigo FROM InvArticuloUso JOIN InvArticulo on InvArticulo.Id = InvArticuloUso.InvArticuloId JOIN InvUso on InvUso.Id = InvArticuloUso.InvUsoId",
-            "Artículos - Impuesto": "SELECT ex.CodigoArticulo, CAST(MAX(ex.tarifaI) AS NUMERIC(10,2)) as TarifaCompra, CAST(MAX(ex.tarifaV) AS NUMERIC(10,2)) as TarifaVenta FROM ( SELECT a.CodigoArticulo, CASE WHEN MAX(fcv.TarifaImpuesto) IS NULL THEN 0 ELSE CAST(MAX(fcv.TarifaImpuesto) AS DECIMAL(10,2)) END as tarifaI, CASE WHEN MAX(fcv2.TarifaImpuesto) IS NULL THEN 0 ELSE CAST(MAX(fcv2.TarifaImpuesto) AS DECIMAL(10,2)) END as tarifaV FROM InvArticulo a LEFT JOIN FinConceptoVigencia fcv ON fcv.FinConceptoImptoId = a.FinConceptoImptoIdCompra LEFT JOIN FinConceptoVigencia fcv2 ON fcv2.FinConceptoImptoId = a.FinConceptoImptoIdVenta GROUP BY a.CodigoArticulo ) as ex GROUP BY ex.CodigoArticulo",
-            "Artículos - Atributos (Medicina)": "SELECT InvArticulo.CodigoArticulo FROM InvArticulo JOIN InvArticuloAtributo ON InvArticuloAtributo.InvArticuloId = InvArticulo.Id JOIN InvAtributo ON InvAtributo.Id = InvArticuloAtributo.InvAtributoId WHERE InvAtributo.Descripcion = 'Medicina' ORDER BY InvArticulo.CodigoArticulo ASC",
-            "Artículos - Atributos (Genérico)": "SELECT InvArticulo.CodigoArticulo FROM InvArticulo JOIN InvArticuloAtributo ON InvArticuloAtributo.InvArticuloId = InvArticulo.Id JOIN InvAtributo ON InvAtributo.Id = InvArticuloAtributo.InvAtributoId WHERE InvAtributo.Descripcion = 'Genérico' ORDER BY InvArticulo.CodigoArticulo ASC",
-        }
-
-        # Buscar en ambas secciones
-        if table_name in maestros_queries:
-            return maestros_queries[table_name]
-        elif table_name in relaciones_queries:
-            return relaciones_queries[table_name]
-        else:
-            return None
-
-    # ----------- Navegación ----------- #
-    def back_to_database_selection(self):
-        self.query_text.clear()
-        self.progress_bar.setValue(0)
-        self.progress_label.setText("Listo para exportar")
-        self.export_status_label.clear()
-        self.stacked.setCurrentWidget(self.database_page)
-
-    def back_to_connection(self):
-        if self.connection:
-            self.connection.close()
-            self.connection = None
-        self.select_db_btn.setEnabled(False)
-        self.instance_combo.clear()
-        self.status_label.setText("Listo para conectar")
-        self.final_status_label.clear()
-        self.db_status_label.setText("Cargando bases de datos...")
-        self.connected_instance = ""
-        self.selected_database = ""
-        self.stacked.setCurrentWidget(self.connection_page)
-
-    def closeEvent(self, event):  # noqa: N802
-        if self.connection:
-            try:
-                self.connection.close()
-            except Exception:
-                pass
-        event.accept()
-
-
-def main():
-    app = QApplication([])
-    window = SQLServerConnector()
-    window.showMaximized()
-    app.exec()
-
-
-if __name__ == "__main__":
+import os
+import sys
+import socket
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from export_engine import (
+    EXPORT_CACHE_MAX_MB,
+    EXPORT_CACHE_MB,
+    EXPORT_PARALLEL_MAX,
+    EXPORT_PARALLEL_TABLES,
+    MAESTROS_TABLES,
+    SANITIZE_PROCESS_MIN_ROWS,
+    SANITIZE_PROCESSES_MAX,
+    RELACIONES_TABLES,
+    ExportEngine,
+    build_connection_string,
+    list_databases,
+    load_pyodbc,
+)
+from export_fanout import (
+    ALL_DATABASES,
+    FANOUT_MAX_WORKERS,
+    FANOUT_WORKERS,
+    ExportTarget,
+    FanOutExport,
+    format_summary,
+    load_targets,
+)
+from PyQt6.QtCore import QObject, Qt, QThread, QTimer, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QIcon, QPixmap, QTextCursor
+from PyQt6.QtWidgets import (
+    QApplication,
+    QCheckBox,
+    QComboBox,
+    QFileDialog,
+    QFormLayout,
+    QGridLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QMainWindow,
+    QMessageBox,
+    QProgressBar,
+    QPushButton,
+    QScrollArea,
+    QSizePolicy,
+    QSpinBox,
+    QStackedWidget,
+    QTableWidget,
+    QTableWidgetItem,
+    QTextEdit,
+    QVBoxLayout,
+    QWidget,
+)
+
+# Búsqueda de instancias: sondeos concurrentes con límite total de tiempo
+INSTANCE_PROBE_TIMEOUT = 2
+INSTANCE_PROBE_WORKERS = 8
+INSTANCE_SEARCH_DEADLINE = 6
+INSTANCE_CACHE_TTL = 7 * 24 * 3600
+INSTANCE_CACHE_PATH = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "ConectorSQL", "instancias.json"
+)
+
+# Presupuesto de arranque en milisegundos (se comprueba con --medir-arranque)
+IMPORT_BUDGET_MS = 400
+FIRST_PAINT_BUDGET_MS = 1500
+STARTUP_CHECK_ARG = "--medir-arranque"
+
+# Registro de consultas en pantalla: capacidad fija, refresco por temporizador y archivo rotativo opcional
+QUERY_LOG_CAPACITY = 200
+QUERY_LOG_ENTRY_CHARS = 600
+QUERY_LOG_RENDER_MS = 250
+QUERY_LOG_PATH = os.path.join(os.path.dirname(INSTANCE_CACHE_PATH), "consultas.log")
+QUERY_LOG_FILE_BYTES = 5 * 1024 * 1024
+QUERY_LOG_FILE_BACKUPS = 3
+
+# Al cerrar la ventana con una exportación en curso: espera máxima a que el hilo de trabajo termine
+EXPORT_CLOSE_WAIT_MS = 5000
+
+# Resumen de métricas por consulta en la página de exportación: (encabezado, función sobre el diccionario)
+METRICS_COLUMNS = (
+    ("Tablas", lambda m: " + ".join(m["tables"])),
+    ("Filas", lambda m: str(m["rows"])),
+    ("Servidor (s)", lambda m: f"{m['seconds']['execute']:.2f}"),
+    ("1.ª fila (s)", lambda m: f"{m['seconds']['first_row']:.2f}"),
+    ("Lectura (s)", lambda m: f"{m['seconds']['fetch']:.2f}"),
+    ("Limpieza (s)", lambda m: f"{m['seconds']['join'] + m['seconds']['dedupe'] + m['seconds']['sanitize']:.2f}"),
+    ("Escritura (s)", lambda m: f"{m['seconds']['write']:.2f}"),
+    ("MB", lambda m: f"{m['bytes'] / (1024 * 1024):.1f}"),
+    ("Filas/s", lambda m: str(m["rows_per_second"])),
+    ("Límite", lambda m: "error" if m["error"] else (m["bound"] or "")),
+)
+
+
+def get_local_sql_instances():
+    try:
+        import winreg
+    except ImportError:
+        # Fuera de Windows no hay registro: quedan SQL Server Browser y los nombres habituales
+        return []
+
+    instances = []
+    hostname = socket.gethostname()
+    registry_paths = [
+        r"SOFTWARE\Microsoft\Microsoft SQL Server\Instance Names\SQL",
+        r"SOFTWARE\WOW6432Node\Microsoft\Microsoft SQL Server\Instance Names\SQL",
+    ]
+    for path in registry_paths:
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path) as key:
+                index = 0
+                while True:
+                    try:
+                        name, _, _ = winreg.EnumValue(key, index)
+                        if name.upper() == "MSSQLSERVER":
+                            instances.append(hostname)
+                        else:
+                            instances.append(f"{hostname}\\{name}")
+                        index += 1
+                    except OSError:
+                        break
+        except FileNotFoundError:
+            continue
+        except Exception as exc:  # noqa: F841
+            print(f"Info: No se pudieron leer instancias locales: {exc}")
+    # Remover duplicados manteniendo orden
+    seen = set()
+    ordered = []
+    for instance in instances:
+        if instance not in seen:
+            ordered.append(instance)
+            seen.add(instance)
+    return ordered
+
+
+def is_instance_reachable(instance_name):
+    conn_str = (
+        "DRIVER={ODBC Driver 17 for SQL Server};"
+        f"SERVER={instance_name};"
+        "Trusted_Connection=yes;"
+        f"Connection Timeout={INSTANCE_PROBE_TIMEOUT};"
+    )
+    pyodbc = load_pyodbc()
+    try:
+        conn = pyodbc.connect(conn_str)
+        conn.close()
+        return True
+    except pyodbc.Error as exc:
+        error_msg = str(exc)
+        if "Login failed" in error_msg or "Error de autenticación" in error_msg:
+            return True
+        if "network-related" in error_msg.lower() or "server does not exist" in error_msg.lower():
+            return False
+        if "timeout expired" in error_msg.lower():
+            return False
+        return False
+    except Exception:
+        return False
+
+
+def probe_instances(candidates, on_reachable=None, deadline=INSTANCE_SEARCH_DEADLINE):
+    """Sondea las instancias en paralelo; devuelve {instancia: alcanzable} de las que respondieron a tiempo"""
+    results = {}
+    if not candidates:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=min(INSTANCE_PROBE_WORKERS, len(candidates)))
+    futures = {executor.submit(is_instance_reachable, name): name for name in candidates}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            name = futures[future]
+            results[name] = future.result()
+            if results[name] and on_reachable is not None:
+                on_reachable(name)
+    except FuturesTimeoutError:
+        # Las instancias que no respondieron antes del límite se consideran no disponibles
+        pass
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+class InstanceProbeCache:
+    """Resultados recientes de sondeo guardados en disco para mostrarlos al iniciar"""
+
+    def __init__(self, path=INSTANCE_CACHE_PATH, ttl=INSTANCE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = {
+                name: entry for name, entry in data.get("instances", {}).items()
+                if isinstance(entry, dict) and "checked_at" in entry
+            }
+        except (OSError, ValueError, AttributeError):
+            self._entries = {}
+
+    def save(self):
+        with self._lock:
+            data = {"instances": dict(self._entries)}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            print(f"Info: No se pudo guardar la caché de instancias: {exc}")
+
+    def record(self, results):
+        now = time.time()
+        with self._lock:
+            for name, reachable in results.items():
+                self._entries[name] = {"reachable": bool(reachable), "checked_at": now}
+            # Descartar resultados vencidos
+            self._entries = {
+                name: entry for name, entry in self._entries.items()
+                if now - entry["checked_at"] <= self.ttl
+            }
+
+    def recent_reachable(self):
+        now = time.time()
+        with self._lock:
+            recent = [
+                (entry["checked_at"], name) for name, entry in self._entries.items()
+                if entry.get("reachable") and now - entry["checked_at"] <= self.ttl
+            ]
+        return [name for _, name in sorted(recent, reverse=True)]
+
+
+def _qt_length(text):
+    # Las posiciones de QTextDocument cuentan unidades UTF-16
+    return len(text.encode("utf-16-le")) // 2
+
+
+class QueryLog:
+    """Búfer circular del registro de consultas; las entradas repetidas seguidas se agrupan con un contador"""
+
+    def __init__(self, capacity=QUERY_LOG_CAPACITY, entry_chars=QUERY_LOG_ENTRY_CHARS):
+        self.entries = deque(maxlen=capacity)
+        self.entry_chars = entry_chars
+        # Cambia con cada entrada: la vista solo se vuelve a pintar si hubo cambios
+        self.version = 0
+        self._file_logger = None
+        # Entradas agregadas desde el último clear(): la primera del búfer es la número appended - len(entries)
+        self._appended = 0
+        # Lo que muestra la vista: largo de cada entrada, número de la primera y contador de la última
+        self._shown_lengths = None
+        self._shown_first = 0
+        self._shown_count = 0
+
+    def append(self, table, text):
+        text = text.strip()
+        if self._file_logger is not None:
+            self._file_logger.info("[%s] %s", table, text)
+
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if len(text) > self.entry_chars:
+            text = text[:self.entry_chars] + f"… (+{len(text) - self.entry_chars} caracteres)"
+        last = self.entries[-1] if self.entries else None
+        if last is not None and last[0] == table and last[1] == text:
+            last[2] += 1
+        else:
+            self.entries.append([table, text, 1])
+            self._appended += 1
+        self.version += 1
+
+    def clear(self):
+        self.entries.clear()
+        self._appended = 0
+        self._shown_lengths = None
+        self.version += 1
+
+    @staticmethod
+    def _body(entry):
+        table, text, count = entry
+        return f"[{table}] {text}" + (f"  (×{count})" if count > 1 else "")
+
+    def render(self):
+        """Texto completo de la vista; deja anotado lo que muestra para render_changes()"""
+        bodies = [self._body(entry) for entry in self.entries]
+        self._shown_lengths = deque(map(_qt_length, bodies))
+        self._shown_first = self._appended - len(self.entries)
+        self._shown_count = self.entries[-1][2] if self.entries else 0
+        return "\n\n".join(bodies)
+
+    def render_changes(self):
+        """Cambios desde lo último que se mostró: (unidades a quitar al principio, unidades a quitar al
+        final, texto a agregar al final), o None si hay que volver a pintar todo con render()
+        """
+        lengths = self._shown_lengths
+        first = self._appended - len(self.entries)
+        if not lengths:
+            return None
+        dropped = first - self._shown_first
+        shown_end = self._shown_first + len(lengths)
+        if dropped >= len(lengths):
+            return None
+
+        # Solo la última entrada mostrada puede haber sumado repeticiones: se reemplaza entera
+        cut = 0
+        tail = []
+        last = self.entries[shown_end - 1 - first]
+        if last[2] != self._shown_count:
+            cut = lengths.pop()
+            body = self._body(last)
+            tail.append(body)
+            lengths.append(_qt_length(body))
+        for position in range(shown_end - first, len(self.entries)):
+            body = self._body(self.entries[position])
+            tail.append("\n\n" + body)
+            lengths.append(_qt_length(body))
+        # Cada entrada descartada se lleva la línea en blanco que la separaba de la siguiente
+        trim = 0
+        for _ in range(dropped):
+            trim += lengths.popleft() + 2
+        self._shown_first = first
+        self._shown_count = self.entries[-1][2]
+        return trim, cut, "".join(tail)
+
+    def set_file(self, path):
+        """Activa (con una ruta) o desactiva (con None) la copia completa en un archivo rotativo"""
+        import logging
+        from logging.handlers import RotatingFileHandler
+
+        logger = logging.getLogger("conector_sql.consultas")
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        if path is None:
+            self._file_logger = None
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = RotatingFileHandler(
+            path, maxBytes=QUERY_LOG_FILE_BYTES, backupCount=QUERY_LOG_FILE_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        self._file_logger = logger
+
+
+def apply_query_log_changes(document, changes):
+    """Aplica a la vista el resultado de QueryLog.render_changes() sin reconstruir el texto"""
+    trim, cut, tail = changes
+    cursor = QTextCursor(document)
+    end = document.characterCount() - 1
+    if cut:
+        cursor.setPosition(end - cut)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+    if tail:
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(tail)
+    if trim:
+        cursor.setPosition(0)
+        cursor.setPosition(trim, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+
+
+class InstanceSearchWorker(QObject):
+    """Busca y verifica instancias SQL Server en su propio hilo, informando cada hallazgo"""
+
+    instance_found = pyqtSignal(str)
+    search_finished = pyqtSignal(list)
+    search_failed = pyqtSignal(str)
+    revalidated = pyqtSignal(list)
+
+    def __init__(self, cache):
+        super().__init__()
+        self.cache = cache
+
+    @pyqtSlot()
+    def search_instances(self):
+        # asyncio solo hace falta al buscar; importarlo al inicio retrasa la primera ventana
+        from ssrp_discovery import discover_instances
+
+        try:
+            instances = []
+            hostname = socket.gethostname()
+
+            # SQL Server Browser responde en milisegundos con todas las instancias de la subred
+            browser_instances = [
+                info["name"] for info in discover_instances(
+                    hosts=[hostname, "localhost"],
+                    on_instance=lambda info: self.instance_found.emit(info["name"]),
+                )
+            ]
+            if browser_instances:
+                self.cache.record({name: True for name in browser_instances})
+                instances.extend(browser_instances)
+
+            local_instances = get_local_sql_instances()
+
+            if local_instances:
+                instances.extend(local_instances)
+                for instance in local_instances:
+                    self.instance_found.emit(instance)
+            elif not browser_instances:
+                common = [
+                    f"{hostname}",
+                    f"{hostname}\\SQLEXPRESS",
+                    "localhost",
+                    "localhost\\SQLEXPRESS",
+                    ".",
+                    ".\\SQLEXPRESS",
+                    "(local)",
+                    "(local)\\SQLEXPRESS",
+                ]
+                instances.extend(common)
+
+            try:
+                sources = load_pyodbc().dataSources()
+                for key in sources.keys():
+                    if "SQL Server" in sources[key] or "SQL Server" in key:
+                        instances.append(key)
+            except Exception as exc:  # noqa: F841 - solo informativo
+                print(f"Info: No se pudieron obtener fuentes de datos: {exc}")
+
+            instances = sorted(set(instances))
+
+            if not local_instances and not browser_instances:
+                results = probe_instances(instances, self.instance_found.emit)
+                self.cache.record(results)
+                valid_instances = [name for name in instances if results.get(name)]
+                if valid_instances:
+                    instances = valid_instances
+
+            self.cache.save()
+            self.search_finished.emit(instances)
+        except Exception as exc:
+            self.search_failed.emit(str(exc))
+
+    @pyqtSlot(list)
+    def revalidate(self, instances):
+        results = probe_instances(instances)
+        self.cache.record({name: results.get(name, False) for name in instances})
+        self.cache.save()
+        self.revalidated.emit([name for name in instances if results.get(name)])
+
+
+class ExportWorker(QObject):
+    """Ejecuta conexión, carga de bases de datos y exportación fuera del hilo de la interfaz"""
+
+    connected = pyqtSignal(str)
+    connection_failed = pyqtSignal(str, str, str)
+    databases_loaded = pyqtSignal(list)
+    databases_failed = pyqtSignal(str)
+    database_selected = pyqtSignal(str)
+    database_failed = pyqtSignal(str)
+    progress = pyqtSignal(int)
+    progress_text = pyqtSignal(str)
+    table_status = pyqtSignal(str)
+    log_line = pyqtSignal(str, str)
+    scan_metrics = pyqtSignal(dict)
+    export_finished = pyqtSignal(dict)
+    fan_out_finished = pyqtSignal(dict)
+    # Error que impidió terminar la exportación (carpeta, conexión, descubrimiento de bases…)
+    export_failed = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.connection = None
+        self.connection_string = ""
+        self.database = ""
+        self._cancel = threading.Event()
+
+    def request_cancel(self):
+        """Se llama directamente desde la interfaz; la exportación se detiene al terminar el lote actual"""
+        self._cancel.set()
+
+    def reset_cancel(self):
+        """La interfaz lo llama antes de pedir una exportación: una cancelación temprana no se pierde"""
+        self._cancel.clear()
+
+    # ----------- Conexión ----------- #
+    @pyqtSlot(str, str)
+    def connect_to_server(self, instance, conn_str):
+        pyodbc = load_pyodbc()
+        try:
+            self.close_connection()
+            self.connection = pyodbc.connect(conn_str)
+            self.connection_string = conn_str
+            self.connected.emit(instance)
+        except pyodbc.Error as exc:
+            error_msg = str(exc)
+            if "Login failed" in error_msg:
+                error_msg = "Error de autenticación: Usuario o contraseña incorrectos"
+            elif "timeout" in error_msg.lower():
+                error_msg = "Timeout: No se pudo conectar al servidor"
+            self.connection_failed.emit(
+                "Error de Conexión", f"No se pudo conectar:\n\n{error_msg}", "❌ Error de conexión"
+            )
+        except Exception as exc:
+            self.connection_failed.emit("Error", f"Error inesperado:\n{exc}", "❌ Error inesperado")
+
+    @pyqtSlot()
+    def load_databases(self):
+        try:
+            self.databases_loaded.emit(list_databases(self.connection))
+        except Exception as exc:
+            self.databases_failed.emit(str(exc))
+
+    @pyqtSlot(str)
+    def select_database(self, database):
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f"USE [{database}]")
+            cursor.close()
+            self.database = database
+            self.database_selected.emit(database)
+        except Exception as exc:
+            self.database_failed.emit(str(exc))
+
+    @pyqtSlot()
+    def close_connection(self):
+        if self.connection:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+        self.connection_string = ""
+        self.database = ""
+
+    # ----------- Exportación ----------- #
+    @pyqtSlot(list, str, dict)
+    def run_export(self, selected_tables, folder, options):
+        engine = ExportEngine(
+            self.connection_string,
+            self.database,
+            options,
+            connection=self.connection,
+            cancel_event=self._cancel,
+            on_progress=self.progress.emit,
+            on_progress_text=self.progress_text.emit,
+            on_table_status=self.table_status.emit,
+            on_log=self.log_line.emit,
+            on_metrics=self.scan_metrics.emit,
+        )
+        try:
+            result = engine.run(selected_tables, folder)
+        except Exception as exc:
+            self.export_failed.emit(str(exc))
+            return
+        self.export_finished.emit(result)
+
+    @pyqtSlot(list, list, str, dict, dict)
+    def run_fan_out(self, targets, selected_tables, folder, options, settings):
+        """`targets` son pares [instancia, base]; `settings` trae workers, usuario y contraseña"""
+        user = settings.get("user", "")
+        password = settings.get("password", "")
+        fan_out = FanOutExport(
+            [ExportTarget(instance, database) for instance, database in targets],
+            lambda instance: build_connection_string(instance, user, password),
+            options,
+            workers=settings.get("workers", FANOUT_WORKERS),
+            cancel_event=self._cancel,
+            on_progress=self.progress.emit,
+            on_progress_text=self.progress_text.emit,
+            on_target_status=self.table_status.emit,
+            on_log=self.log_line.emit,
+        )
+        try:
+            summary = fan_out.run(selected_tables, folder)
+        except Exception as exc:
+            self.export_failed.emit(str(exc))
+            return
+        self.fan_out_finished.emit(summary)
+
+
+class SQLServerConnector(QMainWindow):
+    start_connect = pyqtSignal(str, str)
+    start_load_databases = pyqtSignal()
+    start_select_database = pyqtSignal(str)
+    start_export = pyqtSignal(list, str, dict)
+    start_fan_out = pyqtSignal(list, list, str, dict, dict)
+    start_disconnect = pyqtSignal()
+    start_search = pyqtSignal()
+    start_revalidate = pyqtSignal(list)
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Conector SQL Server - Exportador de Datos")
+        self.resize(950, 680)
+        self.setMinimumSize(880, 640)
+        
+        self.connected_instance = ""
+        self.selected_database = ""
+        # Credenciales de la conexión actual, para abrir las demás instancias de una exportación múltiple
+        self.credentials = ("", "")
+        self.logo_pixmap = self.load_logo()
+        self._scaled_logos = {}
+        self.query_log = QueryLog()
+        self._rendered_log_version = self.query_log.version
+        # Las páginas de base de datos y exportación se construyen la primera vez que se muestran
+        self.database_page = None
+        self.export_page = None
+
+        self.central = QWidget()
+        self.setCentralWidget(self.central)
+
+        self.central_layout = QVBoxLayout(self.central)
+        self.central_layout.setContentsMargins(0, 0, 0, 0)
+        self.central_layout.setSpacing(0)
+
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area_widget = QWidget()
+        self.scroll_area_layout = QVBoxLayout(self.scroll_area_widget)
+        self.scroll_area_layout.setContentsMargins(32, 32, 32, 32)
+        self.scroll_area_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
+        self.scroll_area.setWidget(self.scroll_area_widget)
+        self.central_layout.addWidget(self.scroll_area)
+
+        self.stacked = QStackedWidget()
+        self.scroll_area_layout.addWidget(self.stacked, alignment=Qt.AlignmentFlag.AlignHCenter)
+
+        self.setup_connection_page()
+
+        self.apply_stylesheet()
+        self.apply_window_icon()
+        self.stacked.setCurrentWidget(self.connection_page)
+        self.setup_worker()
+
+    def setup_worker(self):
+        """Crea el hilo de trabajo que ejecuta todas las operaciones contra SQL Server"""
+        self.worker_thread = QThread(self)
+        self.worker = ExportWorker()
+        self.worker.moveToThread(self.worker_thread)
+
+        self.start_connect.connect(self.worker.connect_to_server)
+        self.start_load_databases.connect(self.worker.load_databases)
+        self.start_select_database.connect(self.worker.select_database)
+        self.start_export.connect(self.worker.run_export)
+        self.start_fan_out.connect(self.worker.run_fan_out)
+        self.start_disconnect.connect(self.worker.close_connection)
+
+        self.worker.connected.connect(self.on_connected)
+        self.worker.connection_failed.connect(self.on_connection_failed)
+        self.worker.databases_loaded.connect(self.on_databases_loaded)
+        self.worker.databases_failed.connect(self.on_databases_failed)
+        self.worker.database_selected.connect(self.on_database_selected)
+        self.worker.database_failed.connect(self.on_database_failed)
+        self.worker.log_line.connect(self.log_query)
+        self.worker.export_finished.connect(self.on_export_finished)
+        self.worker.fan_out_finished.connect(self.on_fan_out_finished)
+        self.worker.export_failed.connect(self.on_export_failed)
+
+        self.worker_thread.start()
+
+        self.instance_cache = InstanceProbeCache()
+        self.search_thread = QThread(self)
+        self.search_worker = InstanceSearchWorker(self.instance_cache)
+        self.search_worker.moveToThread(self.search_thread)
+
+        self.start_search.connect(self.search_worker.search_instances)
+        self.start_revalidate.connect(self.search_worker.revalidate)
+        self.search_worker.instance_found.connect(self.on_instance_found)
+        self.search_worker.search_finished.connect(self.on_search_finished)
+        self.search_worker.search_failed.connect(self.on_search_failed)
+        self.search_worker.revalidated.connect(self.on_instances_revalidated)
+
+        self.search_thread.start()
+        self.show_cached_instances()
+
+    def get_resource_path(self, relative_path):
+        """Obtiene la ruta absoluta al recurso, funciona para desarrollo y para PyInstaller"""
+        try:
+            # PyInstaller crea una carpeta temporal y almacena la ruta en _MEIPASS
+            base_path = sys._MEIPASS
+        except Exception:
+            base_path = os.path.abspath(".")
+        
+        return os.path.join(base_path, relative_path)
+    
+    def load_logo(self):
+        """Carga el logo desde diferentes ubicaciones posibles"""
+        # Lista de posibles ubicaciones del logo (en orden de prioridad)
+        possible_paths = [
+            self.get_resource_path("resources/logo.png"),  # Para PyInstaller
+            self.get_resource_path("logo.png"),            # Para PyInstaller (raíz)
+            os.path.join(os.path.dirname(__file__), "resources", "logo.png"),  # Desarrollo
+            os.path.join(os.path.dirname(__file__), "logo.png"),  # Desarrollo (raíz)
+            "resources/logo.png",  # Ruta relativa
+            "logo.png",            # Ruta relativa directa
+        ]
+        
+        for logo_path in possible_paths:
+            if os.path.exists(logo_path):
+                pixmap = QPixmap(logo_path)
+                if not pixmap.isNull():
+                    print(f"✅ Logo cargado desde: {logo_path}")
+                    return pixmap
+        
+        # Si no se encuentra el logo, mostrar mensaje (solo en desarrollo)
+        print("⚠️ No se pudo cargar el logo. Verifica que el archivo 'logo.png' exista en la carpeta 'resources'.")
+        return None
+
+    # ----------- Configuración de páginas ----------- #
+    def setup_connection_page(self):
+        self.connection_page = QWidget()
+        layout = QVBoxLayout(self.connection_page)
+        layout.setContentsMargins(24, 24, 24, 24)
+        layout.setSpacing(24)
+
+        # Logo centrado
+        logo_label = self._create_logo_label(80)
+        if logo_label:
+            logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            layout.addWidget(logo_label, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        title = QLabel("Conector SQL Server")
+        title.setObjectName("titleLabel")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title)
+
+        subtitle = QLabel("Conecta y exporta datos a archivos TXT")
+        subtitle.setObjectName("subtitleLabel")
+        subtitle.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(subtitle)
+
+        card = QGroupBox("Credenciales de conexión")
+        card_layout = QVBoxLayout(card)
+        card_layout.setSpacing(16)
+
+        search_layout = QVBoxLayout()
+        search_label = QLabel("🔍 Buscar Instancias SQL Server")
+        search_label.setObjectName("sectionLabel")
+        search_layout.addWidget(search_label)
+
+        self.search_btn = QPushButton("Buscar Instancias Disponibles")
+        self.search_btn.clicked.connect(self.search_instances)
+        self.search_btn.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
+        self.search_btn.setMinimumWidth(240)
+        search_layout.addWidget(self.search_btn, alignment=Qt.AlignmentFlag.AlignLeft)
+
+        instance_layout = QHBoxLayout()
+        instance_label = QLabel("Instancia:")
+        self.instance_combo = QComboBox()
+        self.instance_combo.setEditable(True)
+        instance_layout.addWidget(instance_label)
+        instance_layout.addWidget(self.instance_combo)
+        search_layout.addLayout(instance_layout)
+
+        card_layout.addLayout(search_layout)
+
+        self.windows_check = QCheckBox("Usar autenticación de Windows (Recomendado)")
+        self.windows_check.setChecked(True)
+        self.windows_check.stateChanged.connect(self.toggle_credentials)
+        card_layout.addWidget(self.windows_check)
+
+        credentials_form = QFormLayout()
+        credentials_form.setSpacing(12)
+        self.user_entry = QLineEdit()
+        self.pass_entry = QLineEdit()
+        self.pass_entry.setEchoMode(QLineEdit.EchoMode.Password)
+        credentials_form.addRow("Usuario:", self.user_entry)
+        credentials_form.addRow("Contraseña:", self.pass_entry)
+        card_layout.addLayout(credentials_form)
+
+        self.connect_btn = QPushButton("Conectar al Servidor")
+        self.connect_btn.setEnabled(False)
+        self.connect_btn.clicked.connect(self.connect_to_server)
+        card_layout.addWidget(self.connect_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+
+        self.status_label = QLabel("Listo para conectar")
+        self.status_label.setObjectName("infoLabel")
+        card_layout.addWidget(self.status_label)
+
+        help_label = QLabel("💡 Consejo: Usa autenticación de Windows para una conexión más segura")
+        help_label.setObjectName("hintLabel")
+        card_layout.addWidget(help_label)
+
+        layout.addWidget(card)
+        layout.addStretch()
+        self.stacked.addWidget(self.connection_page)
+        self.toggle_credentials()
+
+    def setup_database_page(self):
+        self.database_page = QWidget()
+        layout = QVBoxLayout(self.database_page)
+        layout.setContentsMargins(24, 24, 24, 24)
+        layout.setSpacing(24)
+
+        # Logo centrado
+        logo_label = self._create_logo_label(80)
+        if logo_label:
+            logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            layout.addWidget(logo_label, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        title = QLabel("Seleccionar Base de Datos")
+        title.setObjectName("titleLabel")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title)
+
+        self.connection_info_label = QLabel("")
+        self.connection_info_label.setObjectName("successLabel")
+        self.connection_info_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.connection_info_label)
+
+        card = QGroupBox("Bases de Datos Disponibles")
+        card_layout = QVBoxLayout(card)
+        card_layout.setSpacing(18)
+
+        self.database_combo = QComboBox()
+        card_layout.addWidget(self.database_combo)
+
+        self.db_status_label = QLabel("Cargando bases de datos...")
+        self.db_status_label.setObjectName("infoLabel")
+        card_layout.addWidget(self.db_status_label)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.setSpacing(12)
+
+        self.select_db_btn = QPushButton("Seleccionar Base de Datos")
+        self.select_db_btn.setEnabled(False)
+        self.select_db_btn.clicked.connect(self.select_database)
+        buttons_layout.addWidget(self.select_db_btn)
+
+        back_btn = QPushButton("← Cambiar Conexión")
+        back_btn.clicked.connect(self.back_to_connection)
+        buttons_layout.addWidget(back_btn)
+
+        card_layout.addLayout(buttons_layout)
+
+        self.final_status_label = QLabel("")
+        self.final_status_label.setObjectName("infoLabel")
+        card_layout.addWidget(self.final_status_label)
+
+        layout.addWidget(card)
+        layout.addStretch()
+        self.stacked.addWidget(self.database_page)
+
+    def setup_export_page(self):
+        self.export_page = QWidget()
+        page_layout = QVBoxLayout(self.export_page)
+        page_layout.setContentsMargins(24, 24, 24, 24)
+        page_layout.setSpacing(24)
+
+        # Logo centrado
+        logo_label = self._create_logo_label(80)
+        if logo_label:
+            logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            page_layout.addWidget(logo_label, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        title = QLabel("Exportar Datos a TXT")
+        title.setObjectName("titleLabel")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        page_layout.addWidget(title)
+
+        self.export_info_label = QLabel("")
+        self.export_info_label.setObjectName("successLabel")
+        self.export_info_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        page_layout.addWidget(self.export_info_label)
+
+        # Sección MAESTROS
+        maestros_group = QGroupBox("📋 MAESTROS")
+        maestros_layout = QVBoxLayout(maestros_group)
+        maestros_layout.setSpacing(16)
+
+        self.maestros_grid = QGridLayout()
+        self.maestros_grid.setHorizontalSpacing(20)
+        self.maestros_grid.setVerticalSpacing(10)
+
+        self.maestros_checkboxes = {}
+        # SOLO los nombres de las tablas, sin descripciones
+        for index, table in enumerate(MAESTROS_TABLES):
+            checkbox = QCheckBox(table)
+            checkbox.setChecked(True)
+            
+            row = index // 3  # 3 columnas
+            col = index % 3
+            self.maestros_grid.addWidget(checkbox, row, col, alignment=Qt.AlignmentFlag.AlignLeft)
+            self.maestros_checkboxes[table] = checkbox
+
+        maestros_layout.addLayout(self.maestros_grid)
+
+        maestros_buttons_layout = QHBoxLayout()
+        maestros_buttons_layout.setSpacing(12)
+        maestros_select_all_btn = QPushButton("✅ Seleccionar Todo")
+        maestros_select_all_btn.clicked.connect(lambda: self.select_all_tables("maestros"))
+        maestros_deselect_all_btn = QPushButton("❌ Deseleccionar Todo")
+        maestros_deselect_all_btn.clicked.connect(lambda: self.deselect_all_tables("maestros"))
+        maestros_buttons_layout.addWidget(maestros_select_all_btn)
+        maestros_buttons_layout.addWidget(maestros_deselect_all_btn)
+        maestros_buttons_layout.addStretch()
+        maestros_layout.addLayout(maestros_buttons_layout)
+
+        page_layout.addWidget(maestros_group)
+
+        # Sección RELACIONES
+        relaciones_group = QGroupBox("🔗 RELACIONES")
+        relaciones_layout = QVBoxLayout(relaciones_group)
+        relaciones_layout.setSpacing(16)
+
+        self.relaciones_grid = QGridLayout()
+        self.relaciones_grid.setHorizontalSpacing(20)
+        self.relaciones_grid.setVerticalSpacing(10)
+
+        self.relaciones_checkboxes = {}
+        # SOLO los nombres de las relaciones, sin descripciones
+        for index, table in enumerate(RELACIONES_TABLES):
+            checkbox = QCheckBox(table)
+            checkbox.setChecked(True)
+            
+            row = index // 3  # 3 columnas
+            col = index % 3
+            self.relaciones_grid.addWidget(checkbox, row, col, alignment=Qt.AlignmentFlag.AlignLeft)
+            self.relaciones_checkboxes[table] = checkbox
+
+        relaciones_layout.addLayout(self.relaciones_grid)
+
+        relaciones_buttons_layout = QHBoxLayout()
+        relaciones_buttons_layout.setSpacing(12)
+        relaciones_select_all_btn = QPushButton("✅ Seleccionar Todo")
+        relaciones_select_all_btn.clicked.connect(lambda: self.select_all_tables("relaciones"))
+        relaciones_deselect_all_btn = QPushButton("❌ Deseleccionar Todo")
+        relaciones_deselect_all_btn.clicked.connect(lambda: self.deselect_all_tables("relaciones"))
+        relaciones_buttons_layout.addWidget(relaciones_select_all_btn)
+        relaciones_buttons_layout.addWidget(relaciones_deselect_all_btn)
+        relaciones_buttons_layout.addStretch()
+        relaciones_layout.addLayout(relaciones_buttons_layout)
+
+        page_layout.addWidget(relaciones_group)
+
+        destination_group = QGroupBox("📁 Carpeta de Destino")
+        destination_layout = QHBoxLayout(destination_group)
+        destination_layout.setSpacing(12)
+
+        self.folder_path = os.path.join(os.path.expanduser("Maestros TXT"))
+        self.folder_entry = QLineEdit(self.folder_path)
+        self.folder_entry.setReadOnly(True)
+        destination_layout.addWidget(self.folder_entry)
+
+        browse_btn = QPushButton("Examinar…")
+        browse_btn.clicked.connect(self.browse_folder)
+        destination_layout.addWidget(browse_btn)
+
+        page_layout.addWidget(destination_group)
+
+        fan_out_group = QGroupBox("🏪 Varias Bases de Datos")
+        fan_out_layout = QVBoxLayout(fan_out_group)
+        fan_out_layout.setSpacing(12)
+
+        self.fan_out_check = QCheckBox("Exportar las bases marcadas a la vez (una subcarpeta por base)")
+        self.fan_out_check.toggled.connect(self.toggle_fan_out)
+        fan_out_layout.addWidget(self.fan_out_check)
+
+        self.fan_out_list = QListWidget()
+        self.fan_out_list.setMinimumHeight(140)
+        fan_out_layout.addWidget(self.fan_out_list)
+
+        fan_out_buttons = QHBoxLayout()
+        fan_out_buttons.setSpacing(12)
+        self.fan_out_load_btn = QPushButton("📄 Cargar lista de destinos…")
+        self.fan_out_load_btn.setToolTip(
+            "Archivo de texto con una línea 'INSTANCIA;BASE' por base ('INSTANCIA' sola = todas sus bases)"
+        )
+        self.fan_out_load_btn.clicked.connect(self.load_fan_out_targets)
+        fan_out_buttons.addWidget(self.fan_out_load_btn)
+        fan_out_buttons.addStretch()
+        fan_out_buttons.addWidget(QLabel("Bases a la vez:"))
+        self.fan_out_spin = QSpinBox()
+        self.fan_out_spin.setRange(1, FANOUT_MAX_WORKERS)
+        self.fan_out_spin.setValue(FANOUT_WORKERS)
+        fan_out_buttons.addWidget(self.fan_out_spin)
+        fan_out_layout.addLayout(fan_out_buttons)
+
+        page_layout.addWidget(fan_out_group)
+        self.toggle_fan_out(False)
+
+        options_group = QGroupBox("⚙️ Opciones de Exportación")
+        options_layout = QFormLayout(options_group)
+        options_layout.setSpacing(12)
+
+        self.parallel_spin = QSpinBox()
+        self.parallel_spin.setRange(1, EXPORT_PARALLEL_MAX)
+        # Una sola conexión salvo que el usuario elija más: cada tabla en paralelo abre otra en el servidor
+        self.parallel_spin.setValue(1)
+        self.parallel_spin.setToolTip(
+            "Cantidad de tablas que se exportan al mismo tiempo, cada una con su propia conexión "
+            f"(en servidores con capacidad de sobra: {EXPORT_PARALLEL_TABLES})"
+        )
+        options_layout.addRow("Tablas en paralelo:", self.parallel_spin)
+
+        self.cache_spin = QSpinBox()
+        self.cache_spin.setRange(0, EXPORT_CACHE_MAX_MB)
+        self.cache_spin.setValue(EXPORT_CACHE_MB)
+        self.cache_spin.setSuffix(" MB")
+        self.cache_spin.setToolTip("Memoria por tabla para reutilizar textos ya normalizados (0 = desactivada)")
+        options_layout.addRow("Caché de normalización:", self.cache_spin)
+
+        self.processes_spin = QSpinBox()
+        self.processes_spin.setRange(0, min(SANITIZE_PROCESSES_MAX, os.cpu_count() or 1))
+        self.processes_spin.setValue(0)
+        self.processes_spin.setSpecialValueText("En el mismo proceso")
+        self.processes_spin.setToolTip(
+            f"Procesos que limpian y formatean en paralelo las tablas de más de {SANITIZE_PROCESS_MIN_ROWS} filas "
+            "(no se usa con la exportación incremental)"
+        )
+        options_layout.addRow("Procesos de limpieza:", self.processes_spin)
+
+        self.columnar_check = QCheckBox("Limpiar y formatear cada lote por columnas")
+        self.columnar_check.setToolTip(
+            "Normaliza una sola vez cada texto repetido dentro del lote; el archivo resultante es el mismo"
+        )
+        options_layout.addRow("Limpieza por columnas:", self.columnar_check)
+
+        self.incremental_combo = QComboBox()
+        self.incremental_combo.addItem("Desactivada", None)
+        self.incremental_combo.addItem("Archivo completo + manifiesto", "full")
+        self.incremental_combo.addItem("Archivos delta (nuevos, modificados, eliminados)", "delta")
+        self.incremental_combo.setToolTip(
+            "Compara con la exportación anterior de la carpeta de destino usando el manifiesto de cada archivo"
+        )
+        options_layout.addRow("Exportación incremental:", self.incremental_combo)
+
+        self.escape_combo = QComboBox()
+        self.escape_combo.addItem("En el servidor (REPLACE en las consultas)", "server")
+        self.escape_combo.addItem("En el cliente (columnas crudas)", "client")
+        self.escape_combo.setToolTip(
+            "Dónde se cambia por un espacio el ';' dentro de los textos; el archivo es el mismo, "
+            "en el cliente el servidor trabaja menos"
+        )
+        options_layout.addRow("Separador en los textos:", self.escape_combo)
+
+        self.dedupe_check = QCheckBox("Descartar las filas repetidas en el cliente")
+        self.dedupe_check.setToolTip(
+            "Proveedores y Códigos de Barras se leen sin ROW_NUMBER() y se conserva la primera fila de cada "
+            "clave; el servidor no ordena toda la tabla en tempdb"
+        )
+        options_layout.addRow("Repetidas:", self.dedupe_check)
+
+        self.batch_small_check = QCheckBox("Pedir los maestros pequeños en un solo lote")
+        self.batch_small_check.setToolTip(
+            "Categoría, Marcas, Usos, Bancos y Forma de Pago viajan en una sola consulta (útil con enlaces lentos)"
+        )
+        options_layout.addRow("Viajes al servidor:", self.batch_small_check)
+
+        self.resumable_check = QCheckBox("Leer las tablas grandes por páginas y reanudar si se corta")
+        self.resumable_check.setToolTip(
+            "Artículos, Códigos de Barras, Componentes, Unidades de Medida, Usos e Impuesto se leen en páginas "
+            "ordenadas por su clave; si la conexión se cae, la próxima exportación continúa desde la última página"
+        )
+        options_layout.addRow("Exportación reanudable:", self.resumable_check)
+
+        self.trace_memory_check = QCheckBox("Medir el pico de memoria (tracemalloc, más lento)")
+        self.trace_memory_check.setToolTip(
+            "Las métricas de cada exportación se guardan en la subcarpeta metricas del destino"
+        )
+        options_layout.addRow("Métricas:", self.trace_memory_check)
+
+        page_layout.addWidget(options_group)
+
+        progress_group = QGroupBox("🚀 Progreso de Exportación")
+        progress_layout = QVBoxLayout(progress_group)
+        progress_layout.setSpacing(16)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        progress_layout.addWidget(self.progress_bar)
+
+        self.progress_label = QLabel("Listo para exportar")
+        self.progress_label.setObjectName("infoLabel")
+        self.progress_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        progress_layout.addWidget(self.progress_label)
+
+        self.export_status_label = QLabel("")
+        self.export_status_label.setObjectName("successLabel")
+        self.export_status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        progress_layout.addWidget(self.export_status_label)
+
+        query_label = QLabel("Consultas ejecutadas:")
+        query_label.setObjectName("sectionLabel")
+        progress_layout.addWidget(query_label)
+
+        self.query_text = QTextEdit()
+        self.query_text.setReadOnly(True)
+        progress_layout.addWidget(self.query_text)
+
+        self.query_log_file_check = QCheckBox(f"Guardar el registro completo en {QUERY_LOG_PATH}")
+        self.query_log_file_check.toggled.connect(self.toggle_query_log_file)
+        progress_layout.addWidget(self.query_log_file_check)
+
+        # El registro se pinta por lotes: las entradas solo se agregan al búfer
+        self.query_log_timer = QTimer(self)
+        self.query_log_timer.setInterval(QUERY_LOG_RENDER_MS)
+        self.query_log_timer.timeout.connect(self.render_query_log)
+        self.query_log_timer.start()
+
+        self.metrics_check = QCheckBox("Mostrar métricas por consulta (servidor, red y cliente)")
+        self.metrics_check.toggled.connect(lambda checked: self.metrics_table.setVisible(checked))
+        progress_layout.addWidget(self.metrics_check)
+
+        self.metrics_table = QTableWidget(0, len(METRICS_COLUMNS))
+        self.metrics_table.setHorizontalHeaderLabels([header for header, _ in METRICS_COLUMNS])
+        self.metrics_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.metrics_table.verticalHeader().setVisible(False)
+        self.metrics_table.setMinimumHeight(180)
+        self.metrics_table.setVisible(False)
+        progress_layout.addWidget(self.metrics_table)
+
+        export_buttons = QHBoxLayout()
+        export_buttons.addStretch()
+        self.export_btn = QPushButton("🎯 Iniciar Exportación")
+        self.export_btn.clicked.connect(self.execute_and_export)
+        export_buttons.addWidget(self.export_btn)
+        self.cancel_btn = QPushButton("⏹️ Cancelar")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_export)
+        export_buttons.addWidget(self.cancel_btn)
+        export_buttons.addStretch()
+        progress_layout.addLayout(export_buttons)
+
+        page_layout.addWidget(progress_group)
+
+        # Durante la exportación no se navega: USE y desconexión esperarían detrás de ella en el mismo hilo
+        self.export_back_btn = QPushButton("← Cambiar Base de Datos")
+        self.export_back_btn.clicked.connect(self.back_to_database_selection)
+        page_layout.addWidget(self.export_back_btn, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        page_layout.addStretch()
+        self.stacked.addWidget(self.export_page)
+
+        self.worker.progress.connect(self.progress_bar.setValue)
+        self.worker.progress_text.connect(self.progress_label.setText)
+        self.worker.table_status.connect(self.export_status_label.setText)
+        self.worker.scan_metrics.connect(self.add_scan_metrics)
+
+    def ensure_page(self, name):
+        """Devuelve la página indicada ("database" o "export"), construyéndola si aún no existe"""
+        page = getattr(self, f"{name}_page")
+        if page is None:
+            getattr(self, f"setup_{name}_page")()
+            page = getattr(self, f"{name}_page")
+        return page
+
+    # ----------- Métodos auxiliares ----------- #
+    def _create_logo_label(self, height=60):
+        if not self.logo_pixmap:
+            return None
+        if height not in self._scaled_logos:
+            self._scaled_logos[height] = self.logo_pixmap.scaledToHeight(
+                height, Qt.TransformationMode.SmoothTransformation
+            )
+        label = QLabel()
+        label.setPixmap(self._scaled_logos[height])
+        label.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
+        return label
+
+    def apply_window_icon(self):
+        if self.logo_pixmap:
+            self.setWindowIcon(QIcon(self.logo_pixmap))
+
+    def apply_stylesheet(self):
+        self.setStyleSheet(
+            """
+            QWidget {
+                background: #181818;
+                color: #f5f5f5;
+                font-family: 'Segoe UI', Arial, sans-serif;
+                font-size: 10.5pt;
+            }
+            QScrollArea {
+                border: none;
+            }
+            QGroupBox {
+                background: #1f1f1f;
+                border: 1px solid #2d2d2d;
+                border-radius: 10px;
+                padding: 18px;
+            }
+            QPushButton {
+                background: #3a86ff;
+                color: #ffffff;
+                border: none;
+                border-radius: 6px;
+                padding: 9px 18px;
+                font-weight: 600;
+            }
+            QPushButton:disabled {
+                background: #3c3c3c;
+                color: #9e9e9e;
+            }
+            QPushButton:hover:!disabled {
+                background: #2f6ddb;
+            }
+            QPushButton:pressed:!disabled {
+                background: #2556af;
+            }
+            QLineEdit, QComboBox, QTextEdit, QSpinBox {
+                background: #222222;
+                border: 1px solid #333333;
+                border-radius: 6px;
+                padding: 7px;
+                selection-background-color: #3a86ff;
+                selection-color: #ffffff;
+            }
+            QComboBox QAbstractItemView {
+                background: #222222;
+                border: 1px solid #333333;
+                selection-background-color: #3a86ff;
+                selection-color: #ffffff;
+            }
+            QTextEdit {
+                min-height: 120px;
+            }
+            QProgressBar {
+                background: #222222;
+                border: 1px solid #333333;
+                border-radius: 6px;
+                text-align: center;
+            }
+            QProgressBar::chunk {
+                background: #3a86ff;
+                border-radius: 6px;
+            }
+            QCheckBox {
+                spacing: 8px;
+            }
+            QCheckBox::indicator {
+                width: 18px;
+                height: 18px;
+                border-radius: 4px;
+                border: 1px solid #3a3a3a;
+                background: #222222;
+            }
+            QCheckBox::indicator:checked {
+                background: #3a86ff;
+                border: 1px solid #3a86ff;
+            }
+            #titleLabel {
+                font-size: 20pt;
+                font-weight: 700;
+            }
+            #subtitleLabel {
+                font-size: 11pt;
+                font-weight: 600;
+                color: #b0bec5;
+            }
+            #sectionLabel {
+                font-size: 11pt;
+                font-weight: 600;
+                color: #cfd8dc;
+            }
+            #infoLabel {
+                color: #64b5f6;
+                font-size: 10pt;
+            }
+            #successLabel {
+                color: #81c784;
+                font-size: 10pt;
+            }
+            #hintLabel {
+                color: #a0a0a0;
+                font-size: 9.5pt;
+            }
+            QScrollBar:vertical {
+                background: #1c1c1c;
+                width: 12px;
+                margin: 6px 0 6px 0;
+                border-radius: 6px;
+            }
+            QScrollBar::handle:vertical {
+                background: #2f2f2f;
+                border-radius: 6px;
+            }
+            QScrollBar::handle:vertical:hover {
+                background: #3a3a3a;
+            }
+            QScrollBar::add-line:vertical,
+            QScrollBar::sub-line:vertical {
+                height: 0;
+            }
+            """
+        )
+
+    def toggle_credentials(self):
+        enabled = not self.windows_check.isChecked()
+        self.user_entry.setEnabled(enabled)
+        self.pass_entry.setEnabled(enabled)
+
+    def search_instances(self):
+        self.search_btn.setEnabled(False)
+        self.status_label.setText("Buscando instancias...")
+        self.start_search.emit()
+
+    def on_instance_found(self, instance):
+        if self.instance_combo.findText(instance) < 0:
+            self.instance_combo.addItem(instance)
+        if self.instance_combo.currentIndex() < 0:
+            self.instance_combo.setCurrentIndex(0)
+        self.connect_btn.setEnabled(True)
+        self.status_label.setText(f"Buscando instancias... ({self.instance_combo.count()} encontrada(s))")
+
+    def on_search_finished(self, instances):
+        current = self.instance_combo.currentText()
+        self.instance_combo.clear()
+        self.instance_combo.addItems(instances)
+        if instances:
+            index = self.instance_combo.findText(current)
+            self.instance_combo.setCurrentIndex(index if index >= 0 else 0)
+            self.status_label.setText(f"✅ Se encontraron {len(instances)} instancia(s)")
+        else:
+            self.status_label.setText("⚠️ No se encontraron instancias. Ingresa manualmente.")
+        self.connect_btn.setEnabled(True)
+        self.search_btn.setEnabled(True)
+
+    def on_search_failed(self, error):
+        self.status_label.setText("❌ Error en la búsqueda")
+        QMessageBox.critical(self, "Error", f"Error al buscar instancias:\n{error}")
+        self.search_btn.setEnabled(True)
+
+    def show_cached_instances(self):
+        """Muestra de inmediato las instancias válidas recientes y las vuelve a verificar en segundo plano"""
+        instances = self.instance_cache.recent_reachable()
+        if not instances:
+            return
+        self.instance_combo.addItems(instances)
+        self.instance_combo.setCurrentIndex(0)
+        self.connect_btn.setEnabled(True)
+        self.status_label.setText(f"Instancias recientes: {len(instances)} (verificando…)")
+        self.start_revalidate.emit(instances)
+
+    def on_instances_revalidated(self, reachable):
+        if not self.search_btn.isEnabled():
+            # Hay una búsqueda completa en curso; su resultado reemplazará la lista
+            return
+        for index in range(self.instance_combo.count() - 1, -1, -1):
+            instance = self.instance_combo.itemText(index)
+            if instance not in reachable and instance != self.instance_combo.currentText():
+                self.instance_combo.removeItem(index)
+        if reachable:
+            self.status_label.setText(f"✅ {len(reachable)} instancia(s) reciente(s) disponibles")
+        else:
+            self.status_label.setText("Listo para conectar")
+
+    def connect_to_server(self):
+        instance = self.instance_combo.currentText().strip()
+        if not instance:
+            QMessageBox.warning(self, "Advertencia", "Por favor selecciona una instancia")
+            return
+        
+        try:
+            if self.windows_check.isChecked():
+                conn_str = build_connection_string(instance)
+                self.credentials = ("", "")
+            else:
+                username = self.user_entry.text().strip()
+                password = self.pass_entry.text()
+                if not username or not password:
+                    QMessageBox.warning(self, "Advertencia", "Por favor ingresa usuario y contraseña")
+                    return
+                conn_str = build_connection_string(instance, username, password)
+                self.credentials = (username, password)
+
+            self.status_label.setText("Conectando…")
+            self.connect_btn.setEnabled(False)
+            self.start_connect.emit(instance, conn_str)
+        except Exception as exc:
+            QMessageBox.critical(self, "Error", f"Error inesperado:\n{exc}")
+            self.connect_btn.setEnabled(True)
+            self.status_label.setText("❌ Error inesperado")
+
+    def on_connected(self, instance):
+        self.connected_instance = instance
+        database_page = self.ensure_page("database")
+        self.connection_info_label.setText(f"Conectado a: {instance}")
+        self.stacked.setCurrentWidget(database_page)
+
+        QTimer.singleShot(100, self.load_databases)
+
+    def on_connection_failed(self, title, message, status):
+        QMessageBox.critical(self, title, message)
+        self.connect_btn.setEnabled(True)
+        self.status_label.setText(status)
+
+    def load_databases(self):
+        self.database_combo.clear()
+        self.db_status_label.setText("Cargando bases de datos...")
+        self.select_db_btn.setEnabled(False)
+        self.start_load_databases.emit()
+
+    def on_databases_loaded(self, databases):
+        if databases:
+            self.database_combo.addItems(databases)
+            self.database_combo.setCurrentIndex(0)
+            self.select_db_btn.setEnabled(True)
+            self.db_status_label.setText(f"✅ Se encontraron {len(databases)} base(s) de datos")
+        else:
+            self.db_status_label.setText("⚠️ No se encontraron bases de datos")
+
+    def on_databases_failed(self, error):
+        self.db_status_label.setText("❌ Error al cargar bases de datos")
+        QMessageBox.critical(self, "Error", f"No se pudieron cargar las bases de datos:\n{error}")
+
+    def select_database(self):
+        database = self.database_combo.currentText()
+        if not database:
+            QMessageBox.warning(self, "Advertencia", "Por favor selecciona una base de datos")
+            return
+
+        self.final_status_label.setText("Conectando a la base de datos…")
+        self.select_db_btn.setEnabled(False)
+        self.start_select_database.emit(database)
+
+    def on_database_selected(self, database):
+        self.selected_database = database
+        self.final_status_label.setText(f"✅ Conectado exitosamente a: {database}")
+
+        def switch_to_export():
+            export_page = self.ensure_page("export")
+            self.fill_fan_out_targets()
+            self.export_info_label.setText(
+                f"Conectado a: {self.connected_instance} → {self.selected_database}"
+            )
+            if not os.path.exists(self.folder_path):
+                os.makedirs(self.folder_path, exist_ok=True)
+            self.folder_entry.setText(self.folder_path)
+            self.clear_query_log()
+            self.progress_bar.setValue(0)
+            self.progress_label.setText("Listo para exportar")
+            self.export_status_label.clear()
+            self.stacked.setCurrentWidget(export_page)
+
+        QTimer.singleShot(600, switch_to_export)
+
+    def on_database_failed(self, error):
+        self.final_status_label.setText("❌ Error al seleccionar base de datos")
+        self.select_db_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"No se pudo seleccionar la base de datos:\n{error}")
+
+    # ----------- Exportación ----------- #
+    def browse_folder(self):
+        folder = QFileDialog.getExistingDirectory(
+            self, "Seleccionar Carpeta", self.folder_path, QFileDialog.Option.ShowDirsOnly
+        )
+        if folder:
+            self.folder_path = folder
+            self.folder_entry.setText(folder)
+            if not os.path.exists(folder):
+                os.makedirs(folder, exist_ok=True)
+
+    def select_all_tables(self, section):
+        if section == "maestros":
+            for checkbox in self.maestros_checkboxes.values():
+                checkbox.setChecked(True)
+        elif section == "relaciones":
+            for checkbox in self.relaciones_checkboxes.values():
+                checkbox.setChecked(True)
+
+    def deselect_all_tables(self, section):
+        if section == "maestros":
+            for checkbox in self.maestros_checkboxes.values():
+                checkbox.setChecked(False)
+        elif section == "relaciones":
+            for checkbox in self.relaciones_checkboxes.values():
+                checkbox.setChecked(False)
+
+    def log_query(self, table, query):
+        self.query_log.append(table, query)
+
+    def render_query_log(self):
+        if self.query_log.version == self._rendered_log_version:
+            return
+        self._rendered_log_version = self.query_log.version
+        changes = self.query_log.render_changes()
+        if changes is None:
+            self.query_text.setPlainText(self.query_log.render())
+        else:
+            apply_query_log_changes(self.query_text.document(), changes)
+        scrollbar = self.query_text.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def clear_query_log(self):
+        self.query_log.clear()
+        self.render_query_log()
+
+    def toggle_query_log_file(self, enabled):
+        try:
+            self.query_log.set_file(QUERY_LOG_PATH if enabled else None)
+        except OSError as exc:
+            QMessageBox.warning(self, "Advertencia", f"No se pudo abrir el archivo de registro:\n{exc}")
+            self.query_log_file_check.setChecked(False)
+
+    def add_scan_metrics(self, metrics):
+        row = self.metrics_table.rowCount()
+        self.metrics_table.insertRow(row)
+        for column, (_, value) in enumerate(METRICS_COLUMNS):
+            self.metrics_table.setItem(row, column, QTableWidgetItem(value(metrics)))
+        if self.metrics_table.isVisible():
+            self.metrics_table.scrollToBottom()
+
+    def add_fan_out_target(self, instance, database, checked):
+        label = f"{instance} → todas las bases" if database == ALL_DATABASES else f"{instance} → {database}"
+        for row in range(self.fan_out_list.count()):
+            if self.fan_out_list.item(row).text() == label:
+                return
+        item = QListWidgetItem(label)
+        item.setData(Qt.ItemDataRole.UserRole, [instance, database])
+        item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+        item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+        self.fan_out_list.addItem(item)
+
+    def fill_fan_out_targets(self):
+        """Ofrece las bases encontradas en la instancia actual; la seleccionada queda marcada"""
+        self.fan_out_list.clear()
+        for index in range(self.database_combo.count()):
+            database = self.database_combo.itemText(index)
+            self.add_fan_out_target(self.connected_instance, database, database == self.selected_database)
+
+    def load_fan_out_targets(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Lista de destinos", "", "Texto (*.txt *.csv);;Todos (*)")
+        if not path:
+            return
+        try:
+            targets = load_targets(path)
+        except (OSError, ValueError) as exc:
+            QMessageBox.warning(self, "Advertencia", f"No se pudo leer la lista de destinos:\n{exc}")
+            return
+        for target in targets:
+            self.add_fan_out_target(target.instance, target.database, True)
+        self.fan_out_check.setChecked(True)
+
+    def toggle_fan_out(self, enabled):
+        self.fan_out_list.setEnabled(enabled)
+        self.fan_out_spin.setEnabled(enabled)
+
+    def checked_fan_out_targets(self):
+        return [
+            self.fan_out_list.item(row).data(Qt.ItemDataRole.UserRole)
+            for row in range(self.fan_out_list.count())
+            if self.fan_out_list.item(row).checkState() == Qt.CheckState.Checked
+        ]
+
+    def execute_and_export(self):
+        # Combinar selecciones de ambas secciones
+        selected_maestros = [name for name, cb in self.maestros_checkboxes.items() if cb.isChecked()]
+        selected_relaciones = [name for name, cb in self.relaciones_checkboxes.items() if cb.isChecked()]
+        
+        selected_tables = selected_maestros + selected_relaciones
+        if not selected_tables:
+            QMessageBox.warning(self, "Advertencia", "Selecciona al menos una tabla o relación")
+            return
+
+        folder = self.folder_entry.text()
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError as exc:
+            QMessageBox.critical(self, "Error", f"No se pudo crear la carpeta de destino:\n{exc}")
+            return
+
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("Iniciando exportación…")
+        self.export_status_label.clear()
+        self.clear_query_log()
+        self.metrics_table.setRowCount(0)
+        options = {
+            "parallel_tables": self.parallel_spin.value(),
+            "cache_mb": self.cache_spin.value(),
+            "incremental": self.incremental_combo.currentData(),
+            "batch_small_tables": self.batch_small_check.isChecked(),
+            "trace_memory": self.trace_memory_check.isChecked(),
+            "resumable": self.resumable_check.isChecked(),
+            "sanitize_processes": self.processes_spin.value(),
+            "columnar": self.columnar_check.isChecked(),
+            "delimiter_escape": self.escape_combo.currentData(),
+            "client_dedupe": self.dedupe_check.isChecked(),
+        }
+        if self.fan_out_check.isChecked():
+            targets = self.checked_fan_out_targets()
+            if not targets:
+                QMessageBox.warning(self, "Advertencia", "Marca al menos una base de datos")
+                return
+            user, password = self.credentials
+            settings = {"workers": self.fan_out_spin.value(), "user": user, "password": password}
+            self.set_export_running(True)
+            self.start_fan_out.emit(targets, selected_tables, folder, options, settings)
+            return
+        self.set_export_running(True)
+        self.start_export.emit(selected_tables, folder, options)
+
+    def set_export_running(self, running):
+        if running:
+            self.worker.reset_cancel()
+        self.export_btn.setEnabled(not running)
+        self.cancel_btn.setEnabled(running)
+        self.export_back_btn.setEnabled(not running)
+
+    def cancel_export(self):
+        self.worker.request_cancel()
+        self.cancel_btn.setEnabled(False)
+        self.progress_label.setText("Cancelando… la exportación se detiene al terminar el lote actual")
+
+    def on_export_finished(self, result):
+        cancelled = result["cancelled"]
+        self.progress_bar.setValue(100)
+        self.progress_label.setText("Exportación cancelada" if cancelled else "Exportación completada")
+        self.set_export_running(False)
+
+        folder = result["folder"]
+        total_tables = result["total_tables"]
+        exported_files = result["exported_files"]
+        total_records = result["total_records"]
+
+        summary = "\n".join(exported_files)
+        heading = "✅ Exportación completada!"
+        if cancelled:
+            heading = "⚠️ Exportación cancelada"
+            summary += "\n\nCanceladas (sin archivo nuevo):\n" + "\n".join(f"• {table}" for table in cancelled)
+        message = (
+            heading + "\n\n"
+            f"Tablas: {len(exported_files)}/{total_tables}\n"
+            f"Registros: {total_records}\n"
+            f"Ubicación: {folder}\n\n"
+            f"Archivos:\n{summary}"
+        )
+        if result["metrics_file"]:
+            message += f"\n\nMétricas: {result['metrics_file']}"
+        self.offer_open_folder(message, folder)
+
+    def on_export_failed(self, error):
+        self.progress_label.setText("❌ Error en la exportación")
+        self.set_export_running(False)
+        QMessageBox.critical(self, "Error", f"No se pudo completar la exportación:\n{error}")
+
+    def on_fan_out_finished(self, summary):
+        self.progress_bar.setValue(100)
+        self.progress_label.setText("Exportación de varias bases completada")
+        self.set_export_running(False)
+
+        message = f"✅ Exportación de varias bases terminada!\n\n{format_summary(summary)}"
+        if summary["summary_file"]:
+            message += f"\n\nResumen: {summary['summary_file']}"
+        self.offer_open_folder(message, summary["folder"])
+
+    def offer_open_folder(self, message, folder):
+        reply = QMessageBox.question(self, "Éxito", f"{message}\n\n¿Abrir carpeta?")
+        if reply == QMessageBox.StandardButton.Yes:
+            try:
+                os.startfile(folder)
+            except Exception:
+                # Para sistemas no Windows
+                import subprocess
+                import platform
+                system = platform.system()
+                if system == "Darwin":  # macOS
+                    subprocess.run(["open", folder])
+                else:  # Linux
+                    subprocess.run(["xdg-open", folder])
+
+    # ----------- Navegación ----------- #
+    def back_to_database_selection(self):
+        self.clear_query_log()
+        self.metrics_table.setRowCount(0)
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("Listo para exportar")
+        self.export_status_label.clear()
+        self.stacked.setCurrentWidget(self.database_page)
+
+    def back_to_connection(self):
+        self.start_disconnect.emit()
+        self.select_db_btn.setEnabled(False)
+        self.instance_combo.clear()
+        self.status_label.setText("Listo para conectar")
+        self.final_status_label.clear()
+        self.db_status_label.setText("Cargando bases de datos...")
+        self.connected_instance = ""
+        self.selected_database = ""
+        self.stacked.setCurrentWidget(self.connection_page)
+
+    def closeEvent(self, event):  # noqa: N802
+        # Detener la exportación en curso y esperar al hilo antes de cerrar la conexión
+        self.worker.request_cancel()
+        self.worker_thread.quit()
+        if not self.worker_thread.wait(EXPORT_CLOSE_WAIT_MS):
+            # Una consulta que el servidor todavía no responde no mira la cancelación. Cortar el hilo a la
+            # fuerza puede dejar bloqueado el controlador ODBC: se termina el proceso, que cierra la
+            # conexión; el temporal de la tabla a medias no reemplaza ningún .txt
+            event.accept()
+            os._exit(0)
+        self.worker.close_connection()
+        self.search_thread.quit()
+        self.search_thread.wait()
+        event.accept()
+
+
+def measure_import_time():
+    """Importa este módulo en un proceso limpio con -X importtime; devuelve (ms, importaciones más lentas)"""
+    import subprocess
+
+    script = (
+        "import importlib.util, time\n"
+        "start = time.perf_counter()\n"
+        f"spec = importlib.util.spec_from_file_location('conector_sql', {os.path.abspath(__file__)!r})\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True, check=True
+    )
+    elapsed_ms = float(result.stdout.strip().splitlines()[-1])
+
+    # Formato de -X importtime: "import time: propio [us] | acumulado [us] | paquete"
+    slowest = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            slowest.append((int(parts[1]) / 1000, parts[2].rstrip()))
+    slowest.sort(reverse=True)
+    return elapsed_ms, slowest[:8]
+
+
+def check_startup_budget(started):
+    """Compara importación y primer pintado con el presupuesto; devuelve el código de salida"""
+    first_paint_ms = (time.perf_counter() - started) * 1000
+    import_ms, slowest = measure_import_time()
+    print(f"⏱️ Importación: {import_ms:.0f} ms (presupuesto {IMPORT_BUDGET_MS} ms)")
+    print(f"⏱️ Primer pintado: {first_paint_ms:.0f} ms (presupuesto {FIRST_PAINT_BUDGET_MS} ms)")
+    if import_ms <= IMPORT_BUDGET_MS and first_paint_ms <= FIRST_PAINT_BUDGET_MS:
+        print("✅ Arranque dentro del presupuesto")
+        return 0
+    print("❌ Arranque fuera del presupuesto. Importaciones más lentas:")
+    for cumulative_ms, package in slowest:
+        print(f"  {cumulative_ms:8.1f} ms {package}")
+    return 1
+
+
+def main():
+    # En el ejecutable de PyInstaller los procesos de limpieza arrancan este mismo programa
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    measure_startup = STARTUP_CHECK_ARG in sys.argv[1:]
+    started = time.perf_counter()
+    app = QApplication([])
+    window = SQLServerConnector()
+    window.showMaximized()
+
+    exit_code = 0
+    if measure_startup:
+        def finish_startup_check():
+            nonlocal exit_code
+            exit_code = check_startup_budget(started)
+            window.close()
+
+        # El temporizador se atiende después de los eventos de pintado pendientes de la primera ventana
+        QTimer.singleShot(0, finish_startup_check)
+
+    app.exec()
+    if measure_startup:
+        sys.exit(exit_code)
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""Descubrimiento de instancias SQL Server mediante el servicio SQL Server Browser (SSRP, UDP 1434)"""
+
+import asyncio
+import socket
+
+SSRP_PORT = 1434
+SSRP_TIMEOUT = 0.6
+
+# Mensajes del protocolo SQL Server Resolution Protocol
+CLNT_BCAST_EX = b"\x02"
+CLNT_UCAST_EX = b"\x03"
+SVR_RESP = 0x05
+
+# Alias locales que el Browser no entiende como nombre de host
+LOCAL_ALIASES = {".", "(local)", "localhost"}
+
+
+def parse_ssrp_response(data):
+    """Convierte una respuesta SVR_RESP en una lista de instancias (dict con las claves del servidor)"""
+    if len(data) < 3 or data[0] != SVR_RESP:
+        return []
+
+    size = int.from_bytes(data[1:3], "little")
+    payload = data[3:3 + size]
+    try:
+        text = payload.decode("utf-8")
+    except UnicodeDecodeError:
+        text = payload.decode("latin-1")
+
+    # Cada instancia es clave;valor;...;clave;valor;; pero un valor también puede venir vacío (Version;;),
+    # así que no se parte en ";;": se leen los pares en orden y cada ServerName empieza una instancia
+    records = []
+    fields = None
+    tokens = text.split(";")
+    position = 0
+    while position < len(tokens):
+        key = tokens[position]
+        if not key:
+            # Fin de instancia: donde se espera una clave solo puede aparecer el ";" final
+            position += 1
+            continue
+        value = tokens[position + 1] if position + 1 < len(tokens) else ""
+        position += 2
+        if key == "ServerName":
+            fields = {}
+            records.append(fields)
+        if fields is not None:
+            fields[key] = value
+
+    instances = []
+    for fields in records:
+        if "InstanceName" not in fields:
+            continue
+        instances.append(
+            {
+                "server": fields["ServerName"],
+                "instance": fields["InstanceName"],
+                "name": instance_connection_name(fields["ServerName"], fields["InstanceName"]),
+                "version": fields.get("Version", ""),
+                "clustered": fields.get("IsClustered", "No") == "Yes",
+                "tcp_port": int(fields["tcp"]) if fields.get("tcp", "").isdigit() else None,
+            }
+        )
+    return instances
+
+
+def instance_connection_name(server, instance):
+    if instance.upper() == "MSSQLSERVER":
+        return server
+    return f"{server}\\{instance}"
+
+
+class _SSRPClientProtocol(asyncio.DatagramProtocol):
+    def __init__(self, on_instance):
+        self.on_instance = on_instance
+        self.instances = {}
+
+    def datagram_received(self, data, addr):
+        for info in parse_ssrp_response(data):
+            key = info["name"].upper()
+            if key in self.instances:
+                continue
+            info["address"] = addr[0]
+            self.instances[key] = info
+            if self.on_instance is not None:
+                self.on_instance(info)
+
+    def error_received(self, exc):
+        # ICMP "puerto inalcanzable" de hosts sin Browser: no es un error de la búsqueda
+        pass
+
+
+async def _resolve(loop, host, port):
+    if host.lower() in LOCAL_ALIASES:
+        host = "127.0.0.1"
+    try:
+        infos = await loop.getaddrinfo(host, port, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+    except (OSError, UnicodeError):
+        return None
+    return infos[0][4] if infos else None
+
+
+async def discover_instances_async(hosts=(), broadcast=True, timeout=SSRP_TIMEOUT, port=SSRP_PORT, on_instance=None):
+    """Envía CLNT_BCAST_EX a la subred y CLNT_UCAST_EX a cada host, y reúne las respuestas durante `timeout` segundos"""
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _SSRPClientProtocol(on_instance),
+        local_addr=("0.0.0.0", 0),
+        allow_broadcast=broadcast,
+    )
+    try:
+        if broadcast:
+            try:
+                transport.sendto(CLNT_BCAST_EX, ("255.255.255.255", port))
+            except OSError as exc:
+                print(f"Info: No se pudo enviar la difusión SSRP: {exc}")
+
+        addresses = await asyncio.gather(*(_resolve(loop, host, port) for host in hosts))
+        for address in set(address for address in addresses if address):
+            try:
+                transport.sendto(CLNT_UCAST_EX, address)
+            except OSError:
+                continue
+
+        await asyncio.sleep(timeout)
+    finally:
+        transport.close()
+
+    return list(protocol.instances.values())
+
+
+def discover_instances(hosts=(), broadcast=True, timeout=SSRP_TIMEOUT, port=SSRP_PORT, on_instance=None):
+    """Versión bloqueante de discover_instances_async para usar desde hilos de trabajo"""
+    try:
+        return asyncio.run(
+            discover_instances_async(hosts, broadcast=broadcast, timeout=timeout, port=port, on_instance=on_instance)
+        )
+    except OSError as exc:
+        print(f"Info: No se pudo consultar SQL Server Browser: {exc}")
+        return []
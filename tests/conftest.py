@@ -0,0 +1,36 @@
+"""Los módulos del exportador están en la raíz del repositorio, sin paquete; fixtures comunes de las pruebas"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def fake_odbc(monkeypatch):
+    """Instala un FakeDatabase como módulo pyodbc del motor; devuelve la función que lo crea"""
+    import export_engine
+    from fakes import FakeDatabase
+
+    def install(results, **kwargs):
+        database = FakeDatabase(results, **kwargs)
+        monkeypatch.setattr(export_engine, "_pyodbc", database)
+        return database
+
+    return install
+
+
+@pytest.fixture(scope="session")
+def gui():
+    """El módulo de la ventana (master-MRv6.py, sin nombre importable); requiere PyQt6"""
+    pytest.importorskip("PyQt6")
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location("conector_sql", os.path.join(ROOT, "master-MRv6.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
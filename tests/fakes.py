@@ -0,0 +1,114 @@
+"""Controlador ODBC de prueba: responde las consultas exactas que arma el exportador, sin servidor"""
+
+import threading
+
+
+class FakeOdbcError(Exception):
+    pass
+
+
+def describe(columns):
+    """[(nombre, tipo), …] → cursor.description de pyodbc"""
+    return [(name, kind, None, None, None, None, True) for name, kind in columns]
+
+
+class FakeDatabase:
+    """Hace las veces del módulo pyodbc (connect y Error) para una base con resultados fijos.
+
+    `results` es {consulta: (columnas, filas)}; una consulta que no está ahí falla como un objeto
+    inexistente. `fail` son consultas que fallan al ejecutarse (también dentro de un lote, donde el
+    error llega al pasar a su resultado con nextset), `reject` hace que el servidor rechace entero
+    cualquier lote que las contenga, y `batch_limit` corta los lotes tras esa cantidad de resultados.
+    """
+
+    Error = FakeOdbcError
+
+    def __init__(self, results, fail=(), reject=(), batch_limit=None, estimates=None):
+        self.results = results
+        self.fail = set(fail)
+        self.reject = set(reject)
+        self.batch_limit = batch_limit
+        self.estimates = estimates or {}
+        self.connections = []
+        # Texto de cada cursor.execute (lotes enteros) y cada consulta respondida (sentencias del lote)
+        self.sent = []
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def connect(self, conn_str, **kwargs):
+        connection = FakeConnection(self)
+        with self._lock:
+            self.connections.append(connection)
+        return connection
+
+    def dataSources(self):  # noqa: N802
+        return {}
+
+    def run(self, query, params=()):
+        with self._lock:
+            self.queries.append(query)
+        if "sys.partitions" in query:
+            rows = [(name, self.estimates[name]) for name in params if name in self.estimates]
+            return describe([("name", str), ("rows", int)]), rows
+        if query in self.fail or query not in self.results:
+            raise FakeOdbcError(f"Invalid object name in: {query[:60]}")
+        columns, rows = self.results[query]
+        return describe(columns), list(rows)
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+        self.closed = False
+
+    def cursor(self):
+        if self.closed:
+            raise FakeOdbcError("Connection closed")
+        return FakeCursor(self.database)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, database):
+        self.database = database
+        self.description = None
+        self._rows = []
+        self._pending = []
+
+    def execute(self, query, *params):
+        self.database.sent.append(query)
+        self.description = None
+        self._rows = []
+        self._pending = []
+        if query.startswith("USE "):
+            return self
+        if query.startswith("SET NOCOUNT ON;\n"):
+            statements = query[len("SET NOCOUNT ON;\n"):].split(";\n")
+            if any(statement in self.database.reject for statement in statements):
+                raise FakeOdbcError("Incorrect syntax: the batch was not compiled")
+            if self.database.batch_limit is not None:
+                statements = statements[: self.database.batch_limit]
+            self._pending = statements[1:]
+            self.description, self._rows = self.database.run(statements[0])
+            return self
+        self.description, self._rows = self.database.run(query, params)
+        return self
+
+    def nextset(self):
+        if not self._pending:
+            return False
+        self.description, self._rows = self.database.run(self._pending.pop(0))
+        return True
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
@@ -0,0 +1,98 @@
+"""Lote de consultas pequeñas (batch_small_tables): rechazo del lote, error a mitad y lote que termina antes"""
+
+import os
+
+from export_engine import BATCHED_TABLES, ExportEngine, export_filename, get_query_for_table
+
+TABLES = list(BATCHED_TABLES)
+BATCH_PREFIX = "SET NOCOUNT ON;\n"
+
+
+def table_results(rows=40):
+    return {
+        get_query_for_table(table): (
+            [("Codigo", str), ("Descripcion", str)],
+            [(f"{index:03d}", f"{table} {index}") for index in range(rows)],
+        )
+        for table in TABLES
+    }
+
+
+def run(database, folder):
+    logs = []
+    engine = ExportEngine(
+        "cadena",
+        options={"batch_small_tables": True, "save_metrics": False},
+        connection=database.connect(""),
+        on_log=lambda table, message: logs.append((table, message)),
+    )
+    return engine.run(TABLES, str(folder)), logs
+
+
+def batches(database):
+    """Tablas de cada lote enviado, en orden"""
+    by_query = {get_query_for_table(table): table for table in TABLES}
+    return [
+        [by_query[statement] for statement in query[len(BATCH_PREFIX):].split(";\n")]
+        for query in database.sent
+        if query.startswith(BATCH_PREFIX)
+    ]
+
+
+def assert_exported(folder, result, tables):
+    assert sorted(result["exported_files"]) == sorted(f"• {export_filename(table)} (40 registros)" for table in tables)
+    for table in TABLES:
+        assert os.path.exists(folder / export_filename(table)) == (table in tables)
+    assert not [name for name in os.listdir(folder) if name.endswith(".tmp")]
+
+
+def test_whole_batch_in_one_trip(fake_odbc, tmp_path):
+    database = fake_odbc(table_results())
+    result, _ = run(database, tmp_path)
+    assert result["failed"] == {}
+    assert batches(database) == [TABLES]
+    assert_exported(tmp_path, result, TABLES)
+
+
+def test_rejected_batch_falls_back_to_one_query_per_table(fake_odbc, tmp_path):
+    broken = get_query_for_table("Usos")
+    database = fake_odbc(table_results(), reject={broken}, fail={broken})
+    result, logs = run(database, tmp_path)
+
+    # Solo falla la tabla con el error, no la primera del lote
+    assert list(result["failed"]) == ["Usos"]
+    assert batches(database) == [TABLES]
+    sent_alone = [query for query in database.sent if not query.startswith((BATCH_PREFIX, "USE ")) and "sys." not in query]
+    assert sent_alone == [get_query_for_table(table) for table in TABLES]
+    assert any(table == "Lote" and "rechazó" in message for table, message in logs)
+    assert_exported(tmp_path, result, [table for table in TABLES if table != "Usos"])
+
+
+def test_failure_mid_batch_resends_the_rest(fake_odbc, tmp_path):
+    database = fake_odbc(table_results(), fail={get_query_for_table("Usos")})
+    result, _ = run(database, tmp_path)
+
+    assert list(result["failed"]) == ["Usos"]
+    # El lote llega hasta Usos; las tablas siguientes van en un lote nuevo
+    assert batches(database) == [TABLES, TABLES[3:]]
+    assert_exported(tmp_path, result, [table for table in TABLES if table != "Usos"])
+
+
+def test_failure_in_first_result(fake_odbc, tmp_path):
+    # El error llega en execute(), antes de cualquier resultado: no se distingue de un lote rechazado
+    database = fake_odbc(table_results(), fail={get_query_for_table(TABLES[0])})
+    result, _ = run(database, tmp_path)
+    assert list(result["failed"]) == [TABLES[0]]
+    assert batches(database) == [TABLES]
+    assert_exported(tmp_path, result, TABLES[1:])
+
+
+def test_nextset_ends_early(fake_odbc, tmp_path):
+    # El lote devuelve solo dos resultados: la tercera tabla queda fallida y el resto se reenvía
+    database = fake_odbc(table_results(), batch_limit=2)
+    result, _ = run(database, tmp_path)
+
+    assert list(result["failed"]) == [TABLES[2]]
+    assert "terminó sin devolver" in result["failed"][TABLES[2]]
+    assert batches(database) == [TABLES, TABLES[3:]]
+    assert_exported(tmp_path, result, TABLES[:2] + TABLES[3:])
@@ -0,0 +1,43 @@
+"""Tamaño de lote adaptable: acotado entre mínimo y máximo, y cambios de a lo sumo el doble o la mitad"""
+
+import pytest
+
+from export_engine import AdaptiveBatchSizer
+
+
+@pytest.mark.parametrize("initial, expected", [(10, 100), (500, 500), (10**9, 1000)])
+def test_initial_size_is_clamped(initial, expected):
+    assert AdaptiveBatchSizer(initial, minimum=100, maximum=1000).batch_size == expected
+
+
+def test_maximum_below_minimum_is_raised():
+    sizer = AdaptiveBatchSizer(50, minimum=200, maximum=100)
+    assert sizer.minimum == sizer.maximum == sizer.batch_size == 200
+
+
+def test_fast_narrow_rows_grow_by_doubling_up_to_the_maximum():
+    sizer = AdaptiveBatchSizer(100, minimum=50, maximum=1000, target_bytes=10**9, target_seconds=1.0)
+    sizes = [sizer.record(sizer.batch_size, 0.0, sizer.batch_size * 10) for _ in range(6)]
+    assert sizes == [200, 400, 800, 1000, 1000, 1000]
+
+
+def test_wide_or_slow_rows_shrink_by_halving_down_to_the_minimum():
+    sizer = AdaptiveBatchSizer(800, minimum=50, maximum=1000, target_bytes=1000, target_seconds=1.0)
+    sizes = [sizer.record(sizer.batch_size, 0.01, sizer.batch_size * 10**6) for _ in range(6)]
+    assert sizes == [400, 200, 100, 50, 50, 50]
+
+    slow = AdaptiveBatchSizer(800, minimum=50, maximum=1000, target_bytes=10**9, target_seconds=0.1)
+    assert slow.record(800, 60.0, 800) == 400
+
+
+def test_target_is_reached_within_the_bounds():
+    sizer = AdaptiveBatchSizer(100, minimum=10, maximum=10**6, target_bytes=30_000, target_seconds=10.0)
+    for _ in range(10):
+        sizer.record(sizer.batch_size, 0.001, sizer.batch_size * 100)
+    # 30 000 bytes / 100 bytes por fila
+    assert sizer.batch_size == 300
+
+
+def test_empty_fetch_keeps_the_size():
+    sizer = AdaptiveBatchSizer(300, minimum=100, maximum=1000)
+    assert sizer.record(0, 1.0, 0) == 300
@@ -0,0 +1,12 @@
+"""Códigos de salida del modo por lotes"""
+
+import export_cli
+
+
+def test_fan_out_error_returns_2(tmp_path, capsys):
+    blocked = tmp_path / "archivo"
+    blocked.write_text("")
+    # La carpeta de destino no se puede crear: error general, no de una base
+    code = export_cli.main(["-S", "srv", "-d", "A", "B", "-t", "Marcas", "-o", str(blocked / "sub"), "-q"])
+    assert code == 2
+    assert "❌ Error en la exportación" in capsys.readouterr().err
@@ -0,0 +1,138 @@
+"""Depuración en el cliente: mismo resultado que ROW_NUMBER() = 1 con la intercalación CI del servidor"""
+
+import os
+import random
+
+import pytest
+
+from export_dedupe import DEDUPE_SPILL_MIN, PARTITION_NORMALIZERS, StreamingDedupe
+from export_engine import CLIENT_DEDUPE_QUERIES
+
+PROVEEDORES_KEY = CLIENT_DEDUPE_QUERIES["Proveedores"]["key"]
+BARRAS_KEY = CLIENT_DEDUPE_QUERIES["Artículos - Códigos de Barras"]["key"]
+
+# Expresiones del PARTITION BY original, escritas como en SQL
+SQL_EXPRESSIONS = {
+    "text": lambda value: value,
+    "delimited": lambda value: value.replace(";", " "),
+    "compact": lambda value: value.replace(";", " ").replace(" ", "").upper(),
+}
+
+
+def sql_equal(left, right):
+    # Intercalación CI de SQL Server: sin mayúsculas y con espacios finales ignorados; NULL con NULL en PARTITION BY
+    if left is None or right is None:
+        return left is right
+    return left.rstrip(" ").upper() == right.rstrip(" ").upper()
+
+
+def row_number_first(rows, key):
+    """ROW_NUMBER() OVER (PARTITION BY … ORDER BY orden de llegada) = 1, comparando fila contra partición"""
+    partitions = []
+    kept = []
+    for row in rows:
+        values = [None if row[position] is None else SQL_EXPRESSIONS[kind](row[position]) for position, kind in key]
+        if not any(all(map(sql_equal, values, partition)) for partition in partitions):
+            partitions.append(values)
+            kept.append(row)
+    return kept
+
+
+def client_dedupe(rows, key, batch=97, **kwargs):
+    dedupe = StreamingDedupe(key, **kwargs)
+    try:
+        kept = []
+        for start in range(0, len(rows), batch):
+            kept.extend(dedupe.filter(rows[start:start + batch]))
+        return kept, dedupe.to_dict()
+    finally:
+        dedupe.close()
+
+
+def spellings(rng, word):
+    """La misma palabra con otras mayúsculas, espacios finales o ';' en lugar de espacio"""
+    word = "".join(char.upper() if rng.random() < 0.5 else char.lower() for char in word)
+    if rng.random() < 0.3:
+        word = word.replace(" ", ";", 1)
+    return word + " " * rng.randint(0, 2)
+
+
+def proveedores(rng, count):
+    names = ["Drogueria Central", "Acme Farma", "Distribuidora Sur", "Laboratorio Andino"]
+    rows = []
+    for code in range(count):
+        rif = rng.choice(["J-1234", "j-1234", "V-777", "E-9"]) if rng.random() > 0.05 else None
+        name = spellings(rng, rng.choice(names)) if rng.random() > 0.05 else None
+        rows.append((f"P{code:04d}", name, "NULL", rif + " " * rng.randint(0, 1) if rif else rif, "", "", "", "NULL"))
+    return rows
+
+
+@pytest.mark.parametrize(
+    "kind, left, right",
+    [
+        ("text", "ABC", "abc  "),
+        ("delimited", "a;b", "A B "),
+        ("compact", "Acme  Farma", "ACME;FARMA "),
+        ("compact", "acme farma", "ACMEFARMA"),
+    ],
+)
+def test_normalizers_match_collation(kind, left, right):
+    normalize = PARTITION_NORMALIZERS[kind]
+    assert normalize(left) == normalize(right)
+    assert sql_equal(SQL_EXPRESSIONS[kind](left), SQL_EXPRESSIONS[kind](right))
+
+
+@pytest.mark.parametrize("kind", ["text", "delimited"])
+def test_normalizers_keep_distinct_values(kind):
+    normalize = PARTITION_NORMALIZERS[kind]
+    # Un espacio al principio o en medio sí cuenta
+    assert normalize(" abc") != normalize("abc")
+    assert normalize("a bc") != normalize("abc")
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_hashed_mode_matches_row_number(seed):
+    rows = proveedores(random.Random(seed), 400)
+    kept, stats = client_dedupe(rows, PROVEEDORES_KEY)
+    assert kept == row_number_first(rows, PROVEEDORES_KEY)
+    assert stats["mode"] == "memoria"
+    assert stats["dropped"] == len(rows) - len(kept) > 0
+
+
+def test_sorted_mode_matches_row_number():
+    rng = random.Random(5)
+    codes = ["7591001", "ABC-1", "abc-1 ", "Abc-1", "X9", "x9  ", "Z"]
+    rows = [(f"A{index:04d}", rng.choice(codes), rng.randint(0, 1)) for index in range(300)]
+    # Orden del servidor: CodigoBarra (CI, sin espacios finales), EsPrincipal DESC, CodigoArticulo
+    rows.sort(key=lambda row: (row[1].rstrip(" ").upper(), -row[2], row[0]))
+    kept, stats = client_dedupe(rows, BARRAS_KEY, sorted_by_key=True)
+    assert kept == row_number_first(rows, BARRAS_KEY)
+    assert len(kept) == 4
+    assert stats["mode"] == "ordenada"
+    assert stats["peak_memory_mb"] == 0
+    assert client_dedupe(rows, BARRAS_KEY)[0] == kept
+
+
+def test_spill_to_disk_keeps_the_same_rows():
+    rng = random.Random(9)
+    keys = DEDUPE_SPILL_MIN * 2
+    rows = [(f"P{index:06d}", f"Nombre {rng.randrange(keys)}", "NULL", f"J-{rng.randrange(keys)}") for index in range(keys * 2)]
+    key = ((3, "delimited"), (1, "compact"))
+
+    in_memory, memory_stats = client_dedupe(rows, key, batch=5000)
+    dedupe = StreamingDedupe(key, spill_keys=1)
+    try:
+        spilled = []
+        for start in range(0, len(rows), 5000):
+            spilled.extend(dedupe.filter(rows[start:start + 5000]))
+        path = dedupe.seen.path
+        assert dedupe.seen.on_disk and os.path.exists(path)
+        stats = dedupe.to_dict()
+    finally:
+        dedupe.close()
+
+    assert not os.path.exists(path)
+    assert spilled == in_memory
+    assert memory_stats["mode"] == "memoria"
+    assert stats["mode"] == "disco"
+    assert stats["keys"] == memory_stats["keys"] == len(in_memory)
@@ -0,0 +1,56 @@
+"""Exportación incremental: claves repetidas y líneas idénticas se comparan como multiconjunto"""
+
+from export_engine import _TableOutput
+
+# "Artículos" usa la columna 0 como clave y el JOIN con InvMinMax repite el código
+ARTICULOS = [
+    "A001;Acetaminofen;;;;10;1;NULL;0",
+    "A001;Acetaminofen;;;;20;2;NULL;0",
+    "A002;Ibuprofeno;;;;5;1;NULL;0",
+    "A003;Loratadina;;;;8;1;NULL;1",
+    "A003;Loratadina;;;;8;1;NULL;1",
+]
+# Tabla sin columnas clave: la línea completa es la clave
+ATRIBUTOS = ["A001;MEDICINA", "A001;MEDICINA", "A002;MEDICINA", "A002;MEDICINA", "A003;Generico"]
+
+
+def export(folder, table, lines):
+    output = _TableOutput(table, str(folder), "full")
+    output.write(lines)
+    changed, changes = output.commit()
+    return changed, changes
+
+
+def counts(changes):
+    return changes.inserted, changes.updated, changes.deleted
+
+
+def test_same_data_twice_has_no_changes(tmp_path):
+    for table, lines in (("Artículos", ARTICULOS), ("Artículos - Atributos (Medicina)", ATRIBUTOS)):
+        _, first = export(tmp_path, table, lines)
+        assert not first.baseline
+        changed, second = export(tmp_path, table, lines)
+        assert not changed
+        assert second.baseline
+        assert counts(second) == (0, 0, 0)
+        # El orden de las filas repetidas no es un cambio
+        _, reordered = export(tmp_path, table, list(reversed(lines)))
+        assert counts(reordered) == (0, 0, 0)
+
+
+def test_duplicate_keys_count_each_row(tmp_path):
+    export(tmp_path, "Artículos", ARTICULOS)
+    lines = list(ARTICULOS)
+    # Una de las dos filas de A001 cambia, se agrega una tercera y se quita una de las dos de A003
+    lines[1] = "A001;Acetaminofen;;;;30;2;NULL;0"
+    lines.append("A001;Acetaminofen;;;;40;4;NULL;0")
+    del lines[4]
+    _, changes = export(tmp_path, "Artículos", lines)
+    assert counts(changes) == (1, 1, 1)
+
+
+def test_keyless_identical_lines(tmp_path):
+    export(tmp_path, "Artículos - Atributos (Medicina)", ATRIBUTOS)
+    _, changes = export(tmp_path, "Artículos - Atributos (Medicina)", ATRIBUTOS[:3] + ["A004;MEDICINA"] * 2)
+    # Sin clave no hay modificados: una copia de A002 y A003 se dieron de baja, dos de A004 de alta
+    assert counts(changes) == (2, 0, 2)
@@ -0,0 +1,140 @@
+"""Unión en el cliente con los índices de dimensión: mismo resultado que el INNER JOIN del servidor"""
+
+import random
+
+import pytest
+
+from export_dimensions import DimensionCache, DimensionIndex
+from export_engine import (
+    CLIENT_JOIN_QUERIES,
+    DIMENSION_QUERIES,
+    ExportEngine,
+    export_filename,
+    get_query_for_table,
+)
+from fakes import describe
+
+CODE = ("Codigo", str, None, None, None, None, True)
+
+
+def index_of(rows, name="InvUso"):
+    return DimensionIndex(name, rows, CODE)
+
+
+@pytest.mark.parametrize(
+    "ids, kind",
+    [
+        (range(1, 500), "lista"),
+        # Huecos moderados siguen siendo densos
+        (range(1000, 4000, 2), "lista"),
+        # Id enteros muy dispersos: una lista sería casi toda vacía
+        ([1, 10 ** 6, 10 ** 9], "dict"),
+        (["A", "B", "C"], "dict"),
+        ([1, "2", 3], "dict"),
+        ([], "dict"),
+    ],
+)
+def test_index_kind(ids, kind):
+    index = index_of([(value, f"C{value}") for value in ids])
+    assert index.kind == kind
+    get = index.getter()
+    for value in ids:
+        assert get(value) == f"C{value}"
+
+
+@pytest.mark.parametrize("rows", [[(value, f"C{value}") for value in range(10, 60)], [(10 ** 7 * value, f"C{value}") for value in range(50)]])
+def test_getter_missing_ids(rows):
+    index = index_of(rows + [(rows[-1][0] + 1, None)])
+    get = index.getter()
+    missing = get(-1)
+    # Un código NULL es válido; un Id nulo, fuera de rango o de otro tipo no existe
+    assert get(rows[-1][0] + 1) is None
+    for value in (None, rows[0][0] - 1, rows[-1][0] + 2, str(rows[0][0]), 10 ** 12):
+        assert get(value) is missing
+
+
+def server_join(relation, dimensions, columns):
+    """INNER JOIN fila a fila: cada Id debe existir en su dimensión (un Id NULL nunca coincide)"""
+    joined = []
+    for row in relation:
+        values = list(row)
+        for position, name in columns.items():
+            matches = [code for value, code in dimensions[name] if row[position] is not None and value == row[position]]
+            if not matches:
+                break
+            values[position] = matches[0]
+        else:
+            joined.append(values)
+    return joined
+
+
+def dimension_rows(rng, sparse):
+    ids = rng.sample(range(1, 10 ** 8), 200) if sparse else list(range(1, 201))
+    rows = [(value, f"{value:08d}") for value in ids]
+    rows[7] = (rows[7][0], None)
+    return rows
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_row_joiner_matches_server_join(fake_odbc, sparse):
+    rng = random.Random(3 if sparse else 4)
+    dimensions = {"InvArticulo": dimension_rows(rng, sparse), "InvComponente": dimension_rows(rng, not sparse)}
+    ids = {name: [value for value, _ in rows] for name, rows in dimensions.items()}
+    relation = [
+        (
+            rng.choice(ids["InvArticulo"] + [None, -5, 10 ** 9 + 1]),
+            rng.choice(ids["InvComponente"] + [None, 0]),
+        )
+        for _ in range(2000)
+    ]
+    database = fake_odbc(
+        {DIMENSION_QUERIES[name]: ([("Id", int), ("Codigo", str)], rows) for name, rows in dimensions.items()}
+    )
+    cache = DimensionCache(DIMENSION_QUERIES)
+    connection = database.connect("")
+    columns = CLIENT_JOIN_QUERIES["Artículos - Componentes"]["columns"]
+    for name in columns.values():
+        cache.get(connection, name)
+    description, join_rows = cache.row_joiner(describe([("InvArticuloId", int), ("InvComponenteId", int)]), columns)
+
+    assert [column[0] for column in description] == ["Codigo", "Codigo"]
+    assert {name: cache.get(connection, name).kind for name in columns.values()} == {
+        "InvArticulo": "dict" if sparse else "lista",
+        "InvComponente": "lista" if sparse else "dict",
+    }
+    joined = []
+    for start in range(0, len(relation), 128):
+        joined.extend(join_rows(relation[start:start + 128]))
+    expected = server_join(relation, dimensions, columns)
+    assert joined == expected
+    assert 0 < len(joined) < len(relation)
+    # Cada dimensión se cargó una sola vez
+    assert sorted(database.queries) == sorted(DIMENSION_QUERIES[name] for name in columns.values())
+
+
+def test_client_join_export_matches_server_query(fake_odbc, tmp_path):
+    table = "Artículos - Usos"
+    rng = random.Random(8)
+    dimensions = {
+        "InvArticulo": [(value, f"A{value:05d}") for value in range(1, 400)],
+        "InvUso": [(value * 1000, f"U{value:02d}") for value in range(1, 30)],
+    }
+    relation = [(rng.randint(0, 410), rng.choice([None, 5, 7000] + [value for value, _ in dimensions["InvUso"]])) for _ in range(1500)]
+    columns = CLIENT_JOIN_QUERIES[table]["columns"]
+    results = {DIMENSION_QUERIES[name]: ([("Id", int), ("Codigo", str)], rows) for name, rows in dimensions.items()}
+    results[CLIENT_JOIN_QUERIES[table]["query"]] = ([("InvArticuloId", int), ("InvUsoId", int)], relation)
+    results[get_query_for_table(table)] = (
+        [("CodigoArticulo", str), ("Codigo", str)],
+        [tuple(row) for row in server_join(relation, dimensions, columns)],
+    )
+
+    outputs = []
+    for client_join in ((), (table,)):
+        database = fake_odbc(results)
+        folder = tmp_path / str(len(client_join))
+        options = {"client_join": client_join, "save_metrics": False, "batch_size": 100}
+        result = ExportEngine("cadena", options=options, connection=database.connect("")).run([table], str(folder))
+        assert result["failed"] == {}
+        outputs.append((folder / export_filename(table)).read_bytes())
+    assert outputs[0] == outputs[1]
+    assert outputs[0]
@@ -0,0 +1,94 @@
+"""Sondeo de instancias con límite de tiempo y caché en disco con vencimiento"""
+
+import json
+import threading
+import time
+
+
+def stub_reachable(monkeypatch, gui, answers, slow=(), delay=2.0):
+    """Reemplaza la conexión de prueba: `answers` {instancia: alcanzable}; las de `slow` tardan `delay` s"""
+    probed = []
+    lock = threading.Lock()
+
+    def reachable(name):
+        with lock:
+            probed.append(name)
+        if name in slow:
+            time.sleep(delay)
+        return answers.get(name, False)
+
+    monkeypatch.setattr(gui, "is_instance_reachable", reachable)
+    return probed
+
+
+def test_slow_probe_is_cut_off_by_the_deadline(gui, monkeypatch):
+    stub_reachable(monkeypatch, gui, {"RAPIDA": True, "LENTA": True, "CAIDA": False}, slow={"LENTA"})
+    found = []
+    started = time.perf_counter()
+    results = gui.probe_instances(["RAPIDA", "LENTA", "CAIDA"], found.append, deadline=0.3)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.5
+    assert results == {"RAPIDA": True, "CAIDA": False}
+    assert found == ["RAPIDA"]
+
+
+def test_no_candidates(gui):
+    assert gui.probe_instances([]) == {}
+
+
+def write_cache(path, entries):
+    path.write_text(json.dumps({"instances": entries}), encoding="utf-8")
+
+
+def test_fresh_cache_hit_survives_a_restart(gui, tmp_path):
+    path = tmp_path / "instancias.json"
+    cache = gui.InstanceProbeCache(str(path), ttl=3600)
+    cache.record({"SRV\\SQLEXPRESS": True, "SRV": True, "CAIDA": False})
+    cache.save()
+
+    reloaded = gui.InstanceProbeCache(str(path), ttl=3600)
+    assert set(reloaded.recent_reachable()) == {"SRV\\SQLEXPRESS", "SRV"}
+
+
+def test_expired_entry_is_probed_again(gui, tmp_path, monkeypatch):
+    path = tmp_path / "instancias.json"
+    now = time.time()
+    write_cache(path, {
+        "RECIENTE": {"reachable": True, "checked_at": now - 60},
+        "VENCIDA": {"reachable": True, "checked_at": now - 7200},
+        "ROTA": {"sin": "fecha"},
+    })
+    cache = gui.InstanceProbeCache(str(path), ttl=3600)
+    # La vencida no se muestra al iniciar; la reciente sí, sin esperar a sondearla
+    assert cache.recent_reachable() == ["RECIENTE"]
+
+    probed = stub_reachable(monkeypatch, gui, {"RECIENTE": False, "VENCIDA": True})
+    worker = gui.InstanceSearchWorker(cache)
+    revalidated = []
+    worker.revalidated.connect(revalidated.append)
+    worker.revalidate(["RECIENTE", "VENCIDA"])
+
+    assert sorted(probed) == ["RECIENTE", "VENCIDA"]
+    assert revalidated == [["VENCIDA"]]
+    # El nuevo sondeo renueva la entrada vencida y da de baja la que dejó de responder
+    assert gui.InstanceProbeCache(str(path), ttl=3600).recent_reachable() == ["VENCIDA"]
+    saved = json.loads(path.read_text(encoding="utf-8"))["instances"]
+    assert saved["VENCIDA"]["checked_at"] > now - 60
+    assert saved["RECIENTE"]["reachable"] is False
+
+
+def test_record_drops_expired_entries(gui, tmp_path):
+    path = tmp_path / "instancias.json"
+    write_cache(path, {"VIEJA": {"reachable": True, "checked_at": time.time() - 10}})
+    cache = gui.InstanceProbeCache(str(path), ttl=5)
+    cache.record({"NUEVA": True})
+    cache.save()
+    assert list(json.loads(path.read_text(encoding="utf-8"))["instances"]) == ["NUEVA"]
+
+
+def test_unreadable_cache_is_empty(gui, tmp_path):
+    path = tmp_path / "instancias.json"
+    path.write_text("{no es json", encoding="utf-8")
+    assert gui.InstanceProbeCache(str(path)).recent_reachable() == []
+    assert gui.InstanceProbeCache(str(tmp_path / "no_existe.json")).recent_reachable() == []
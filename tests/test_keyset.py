@@ -0,0 +1,83 @@
+"""Exportación por páginas: una página cortada entre filas con el mismo código no pierde filas"""
+
+import os
+
+from export_engine import KEYSET_PAGE_MIN, KEYSET_QUERIES, ExportEngine, export_filename
+
+TABLE = "Artículos - Unidades de Medida"
+
+
+class _PagedCursor:
+    """Responde las consultas por páginas ordenando y filtrando por la clave completa de la especificación"""
+
+    def __init__(self, rows, queries):
+        self.rows = rows
+        self.queries = queries
+        self.description = None
+        self._pending = []
+
+    def execute(self, query, *params):
+        self.queries.append((query, params))
+        self._pending = []
+        self.description = None
+        if "TOP (" not in query:
+            return self
+        spec = KEYSET_QUERIES[TABLE]
+        page = int(query.split("TOP (", 1)[1].split(")", 1)[0])
+        positions = spec["positions"]
+        rows = sorted(self.rows, key=lambda row: [row[position] for position in positions])
+        if params:
+            after = list(params[-len(positions):])
+            rows = [row for row in rows if [row[position] for position in positions] > after]
+        self._pending = rows[:page]
+        self.description = [(f"c{index}", str if index in (0, 1, 2, 4) else int) for index in range(7)]
+        return self
+
+    def fetchmany(self, size):
+        rows, self._pending = self._pending[:size], self._pending[size:]
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self._pending))
+
+    def nextset(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class _Connection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def cursor(self):
+        return _PagedCursor(self.rows, self.queries)
+
+
+def test_duplicate_codes_across_page_boundary(tmp_path):
+    # Cada artículo tiene la misma unidad tres veces (Id distintos): los cortes de página caen entre ellas
+    rows = [
+        (f"A{index // 3:05d}", "UND", "UND", 1, "UND", 1, index + 1)
+        for index in range(KEYSET_PAGE_MIN * 2 + 500)
+    ]
+    connection = _Connection(rows)
+    logs = []
+    engine = ExportEngine(
+        "",
+        options={"resumable": True, "page_size": KEYSET_PAGE_MIN, "save_metrics": False},
+        connection=connection,
+        on_log=lambda table, message: logs.append(message),
+    )
+    result = engine.run([TABLE], str(tmp_path))
+
+    assert result["failed"] == {}
+    pages = [params for query, params in connection.queries if "TOP (" in query]
+    assert len(pages) == 3
+    with open(os.path.join(tmp_path, export_filename(TABLE)), encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    # Todas las filas, sin la columna oculta del Id
+    assert len(lines) == len(rows)
+    assert lines[0] == "A00000;UND;UND;1;UND;1"
+    assert any(message.startswith("Caché de normalización") for message in logs)
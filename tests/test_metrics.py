@@ -0,0 +1,77 @@
+"""Métricas de la exportación: metricas/metricas_<fecha>.json con totales, etapas y detalle por consulta"""
+
+import json
+import os
+
+from export_engine import ExportEngine, get_query_for_table
+from export_metrics import METRICS_FOLDER, METRICS_VERSION, SCAN_STAGES
+
+TABLES = ["Marcas", "Bancos", "Usos"]
+
+
+def table_results(tables, rows):
+    return {
+        get_query_for_table(table): (
+            [("Codigo", str), ("Descripcion", str)],
+            [(f"{table[:3].upper()}{index:04d}", f"Descripción {index}") for index in range(rows)],
+        )
+        for table in tables
+    }
+
+
+def run_with_metrics(fake_odbc, tmp_path, fail=()):
+    fake_odbc(table_results(TABLES, 120), fail={get_query_for_table(table) for table in fail})
+    logs = []
+    engine = ExportEngine(
+        "cadena",
+        "Farmacia",
+        {"save_metrics": True, "batch_size": 50},
+        on_log=lambda table, text: logs.append(text),
+    )
+    result = engine.run(TABLES, str(tmp_path))
+    return result, logs
+
+
+def test_metrics_file_is_written_with_totals_and_stages(fake_odbc, tmp_path):
+    result, logs = run_with_metrics(fake_odbc, tmp_path)
+
+    names = os.listdir(tmp_path / METRICS_FOLDER)
+    assert len(names) == 1
+    assert names[0].startswith("metricas_") and names[0].endswith(".json")
+    path = tmp_path / METRICS_FOLDER / names[0]
+    assert any(str(path) in text for text in logs)
+
+    metrics = json.loads(path.read_text(encoding="utf-8"))
+    assert metrics["version"] == METRICS_VERSION
+    assert metrics["database"] == "Farmacia"
+    assert metrics["options"]["batch_size"] == 50
+    assert metrics["rows"] == result["total_records"] == 120 * len(TABLES)
+    assert set(metrics["seconds"]) == set(SCAN_STAGES)
+    assert metrics["bytes"] == sum(scan["bytes"] for scan in metrics["scans"])
+
+    scans = {tuple(scan["tables"]): scan for scan in metrics["scans"]}
+    assert sorted(scans) == sorted((table,) for table in TABLES)
+    for scan in scans.values():
+        assert scan["rows"] == 120
+        assert scan["batches"] >= 1
+        assert scan["error"] is None
+        assert set(scan["seconds"]) == set(SCAN_STAGES)
+
+
+def test_failed_scan_is_recorded_in_metrics(fake_odbc, tmp_path):
+    result, _ = run_with_metrics(fake_odbc, tmp_path, fail=["Bancos"])
+
+    assert list(result["failed"]) == ["Bancos"]
+    (name,) = os.listdir(tmp_path / METRICS_FOLDER)
+    metrics = json.loads((tmp_path / METRICS_FOLDER / name).read_text(encoding="utf-8"))
+    scans = {tuple(scan["tables"]): scan for scan in metrics["scans"]}
+    assert scans[("Bancos",)]["error"]
+    assert scans[("Marcas",)]["error"] is None
+    assert metrics["rows"] == 120 * (len(TABLES) - 1)
+
+
+def test_no_metrics_file_when_disabled(fake_odbc, tmp_path):
+    fake_odbc(table_results(TABLES, 10))
+    ExportEngine("cadena", "Farmacia", {"save_metrics": False}).run(TABLES, str(tmp_path))
+
+    assert not os.path.exists(tmp_path / METRICS_FOLDER)
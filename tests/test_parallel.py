@@ -0,0 +1,77 @@
+"""Exportación en paralelo: pool de conexiones y tablas con error que no detienen a las demás"""
+
+import os
+import threading
+
+from export_engine import ConnectionPool, ExportEngine, export_filename, get_query_for_table
+
+TABLES = ["Categoría", "Marcas", "Usos", "Bancos", "Control Sanitario"]
+
+
+def table_results(tables, rows=300):
+    return {
+        get_query_for_table(table): (
+            [("Codigo", str), ("Descripcion", str)],
+            [(f"{table[:3].upper()}{index:04d}", f"Descripción {index}") for index in range(rows)],
+        )
+        for table in tables
+    }
+
+
+def test_pool_reuses_and_returns_connections(fake_odbc):
+    database = fake_odbc({})
+    pool = ConnectionPool("cadena", "Farmacia", 2)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+
+    # Con las dos conexiones en uso la tercera espera a que se devuelva una
+    third = []
+    waiter = threading.Thread(target=lambda: third.append(pool.acquire()))
+    waiter.start()
+    waiter.join(0.2)
+    assert third == []
+    pool.release(second)
+    waiter.join(2)
+    assert third == [second]
+
+    # Una conexión rota no vuelve al pool: se cierra y la siguiente es nueva
+    pool.release(first, broken=True)
+    assert first.closed
+    fresh = pool.acquire()
+    assert fresh not in (first, second)
+    assert len(database.connections) == 3
+
+    pool.release(fresh)
+    pool.release(third[0])
+    pool.close_all()
+    assert all(connection.closed for connection in database.connections)
+
+
+def test_failed_table_does_not_stop_the_others(fake_odbc, tmp_path):
+    database = fake_odbc(table_results(TABLES), fail={get_query_for_table("Marcas")})
+    progress = []
+    texts = []
+    engine = ExportEngine(
+        "cadena",
+        "Farmacia",
+        {"parallel_tables": 3, "save_metrics": False, "batch_size": 100},
+        on_progress=progress.append,
+        on_progress_text=texts.append,
+    )
+    result = engine.run(TABLES, str(tmp_path))
+
+    assert list(result["failed"]) == ["Marcas"]
+    assert len(result["exported_files"]) == len(TABLES) - 1
+    assert result["total_records"] == 300 * (len(TABLES) - 1)
+    for table in TABLES:
+        exists = os.path.exists(tmp_path / export_filename(table))
+        assert exists == (table != "Marcas")
+
+    # El progreso cuenta la tabla fallida como terminada y llega al total
+    assert progress[-1] == 100
+    assert f"({len(TABLES)}/{len(TABLES)} tablas completadas)" in texts[-1]
+
+    # Como mucho una conexión por hilo (más la de una tabla que falló), y todas quedan cerradas
+    assert len(database.connections) <= 4
+    assert all(connection.closed for connection in database.connections)
@@ -0,0 +1,42 @@
+"""Texto de progreso de ExportProgress"""
+
+from export_engine import ExportProgress
+
+
+def make_progress(tables, estimates):
+    percents = []
+    texts = []
+    # interval=0: cada update avisa, sin esperar al próximo intervalo
+    progress = ExportProgress(tables, estimates, percents.append, texts.append, interval=0)
+    return progress, percents, texts
+
+
+def test_progress_text_keeps_label_commas():
+    progress, _, texts = make_progress(["Bancos", "Marcas"], {"Bancos": 5000, "Marcas": 5000})
+    progress.set_label("Bancos, Marcas, Usos")
+    progress.update("Bancos", 1234567)
+
+    label, rows, rate = texts[-1].split(" · ")[:3]
+    assert label == "Bancos, Marcas, Usos"
+    assert rows == "1.234.567 filas"
+    assert rate.endswith(" filas/s") and "," not in rate
+
+
+def test_progress_is_weighted_by_estimates_and_finishes_at_100():
+    progress, percents, texts = make_progress(["Bancos", "Marcas"], {"Bancos": 1000, "Marcas": 3000})
+    progress.set_label("Bancos")
+    assert texts[-1] == "Bancos"
+
+    progress.update("Bancos", 500)
+    assert percents[-1] == 12
+    assert "restan ~" in texts[-1]
+
+    # Una tabla terminada cuenta con toda su estimación aunque haya escrito menos filas
+    progress.finish(["Bancos"], label="Marcas")
+    assert percents[-1] == 25
+    assert texts[-1].startswith("Marcas · 500 filas")
+
+    progress.update("Marcas", 3000)
+    progress.finish(["Marcas"])
+    assert percents[-1] == 100
+    assert "restan" not in texts[-1]
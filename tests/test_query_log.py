@@ -0,0 +1,107 @@
+"""Registro de consultas: búfer circular, agrupado de repeticiones, archivo rotativo y vista incremental"""
+
+import os
+import random
+
+import pytest
+
+
+@pytest.fixture
+def document(gui, monkeypatch):
+    """Documento de texto como el de la vista, con una QApplication sin pantalla"""
+    monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QTextDocument
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    yield QTextDocument()
+    app.processEvents()
+
+
+def test_capacity_keeps_the_newest_entries(gui):
+    log = gui.QueryLog(capacity=3)
+    for number in range(5):
+        log.append("T", f"SELECT {number}")
+
+    assert [text for _, text, _ in log.entries] == ["SELECT 2", "SELECT 3", "SELECT 4"]
+
+
+def test_only_consecutive_repeats_are_collapsed(gui):
+    log = gui.QueryLog()
+    for table, text in [("A", "q1"), ("A", "q1"), ("B", "q1"), ("A", "q1"), ("A", "q1"), ("A", "q1")]:
+        log.append(table, text)
+
+    assert [list(entry) for entry in log.entries] == [["A", "q1", 2], ["B", "q1", 1], ["A", "q1", 3]]
+    assert log.render() == "[A] q1  (×2)\n\n[B] q1\n\n[A] q1  (×3)"
+
+
+def test_long_entries_are_truncated_in_the_view(gui):
+    log = gui.QueryLog(entry_chars=10)
+    log.append("T", "x" * 25)
+
+    assert log.entries[0][1] == "x" * 10 + "… (+15 caracteres)"
+
+
+def test_rotating_file_keeps_full_text_and_bounded_backups(gui, monkeypatch, tmp_path):
+    monkeypatch.setattr(gui, "QUERY_LOG_FILE_BYTES", 300)
+    monkeypatch.setattr(gui, "QUERY_LOG_FILE_BACKUPS", 2)
+    path = tmp_path / "logs" / "consultas.log"
+    log = gui.QueryLog(entry_chars=10)
+    log.set_file(str(path))
+    try:
+        for number in range(40):
+            log.append("T", f"SELECT {number} " + "y" * 40)
+    finally:
+        log.set_file(None)
+
+    names = sorted(os.listdir(path.parent))
+    assert names == ["consultas.log", "consultas.log.1", "consultas.log.2"]
+    assert all(os.path.getsize(path.parent / name) <= 300 for name in names)
+    # El archivo guarda la consulta entera, sin el recorte de la vista
+    assert f"[T] SELECT 39 {'y' * 40}" in path.read_text(encoding="utf-8")
+
+    log.append("T", "después de cerrar")
+    assert "después de cerrar" not in path.read_text(encoding="utf-8")
+
+
+def test_render_changes_only_sends_the_new_text(gui):
+    log = gui.QueryLog(capacity=3)
+    assert log.render_changes() is None
+    log.append("A", "q1")
+    assert log.render() == "[A] q1"
+
+    log.append("A", "q1")
+    log.append("B", "q2")
+    assert log.render_changes() == (0, len("[A] q1"), "[A] q1  (×2)\n\n[B] q2")
+
+    log.append("C", "q3")
+    log.append("D", "q4")
+    assert log.render_changes() == (len("[A] q1  (×2)") + 2, 0, "\n\n[C] q3\n\n[D] q4")
+
+    log.clear()
+    assert log.render_changes() is None
+
+
+def test_incremental_view_matches_full_render(gui, document):
+    rng = random.Random(7)
+    log = gui.QueryLog(capacity=5, entry_chars=30)
+    texts = ["SELECT 1", "SELECT 2\nFROM t", "línea 😀 ñ", "x" * 50, "a\r\nb"]
+    incremental = 0
+    for _ in range(300):
+        action = rng.random()
+        if action < 0.02:
+            log.clear()
+        else:
+            for _ in range(rng.randint(0, 4)):
+                log.append(rng.choice("AB"), rng.choice(texts))
+
+        changes = log.render_changes()
+        if changes is None:
+            document.setPlainText(log.render())
+        else:
+            gui.apply_query_log_changes(document, changes)
+            incremental += 1
+        # render() vuelve a anotar lo mismo que ya muestra la vista
+        assert document.toPlainText() == log.render()
+
+    assert incremental > 250
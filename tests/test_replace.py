@@ -0,0 +1,86 @@
+"""Reemplazo del .txt solo si cambió el contenido, y temporales que no quedan tras un fallo"""
+
+import hashlib
+import os
+
+from export_engine import ExportEngine, export_filename, get_query_for_table, replace_if_changed
+from fakes import FakeCursor, FakeOdbcError
+
+OLD_TIME = 1_600_000_000
+
+
+def write_temp(path, data):
+    path.write_bytes(data)
+    return hashlib.blake2b(data).digest(), len(data)
+
+
+def test_same_content_leaves_the_file_untouched(tmp_path):
+    target = tmp_path / "Marcas.txt"
+    target.write_bytes(b"A;1\nB;2\n")
+    os.utime(target, (OLD_TIME, OLD_TIME))
+    temp = tmp_path / "Marcas.txt.tmp"
+    digest, size = write_temp(temp, b"A;1\nB;2\n")
+
+    assert replace_if_changed(str(temp), str(target), digest, size) is False
+    assert not temp.exists()
+    assert os.path.getmtime(target) == OLD_TIME
+
+
+def test_changed_or_missing_file_is_replaced(tmp_path):
+    target = tmp_path / "Marcas.txt"
+    target.write_bytes(b"A;1\nB;2\n")
+    temp = tmp_path / "Marcas.txt.tmp"
+    # Mismo tamaño, distinto contenido: decide el hash
+    digest, size = write_temp(temp, b"A;1\nB;3\n")
+    assert replace_if_changed(str(temp), str(target), digest, size) is True
+    assert target.read_bytes() == b"A;1\nB;3\n"
+    assert not temp.exists()
+
+    missing = tmp_path / "Bancos.txt"
+    digest, size = write_temp(temp, b"X;1\n")
+    assert replace_if_changed(str(temp), str(missing), digest, size) is True
+    assert missing.read_bytes() == b"X;1\n"
+
+
+def marcas_results(rows):
+    columns = [("Codigo", str), ("Descripcion", str)]
+    return {get_query_for_table("Marcas"): (columns, [(f"M{index:04d}", f"Marca {index}") for index in range(rows)])}
+
+
+def export_marcas(folder):
+    engine = ExportEngine("cadena", "Farmacia", {"save_metrics": False, "batch_size": 500})
+    return engine.run(["Marcas"], str(folder))
+
+
+def test_second_identical_export_keeps_the_file_date(fake_odbc, tmp_path):
+    fake_odbc(marcas_results(1200))
+    export_marcas(tmp_path)
+    path = tmp_path / export_filename("Marcas")
+    os.utime(path, (OLD_TIME, OLD_TIME))
+
+    export_marcas(tmp_path)
+
+    assert os.path.getmtime(path) == OLD_TIME
+    assert os.listdir(tmp_path) == [export_filename("Marcas")]
+
+
+def test_failure_mid_stream_removes_the_temp_and_keeps_the_old_file(fake_odbc, tmp_path, monkeypatch):
+    fake_odbc(marcas_results(1200))
+    path = tmp_path / export_filename("Marcas")
+    path.write_bytes(b"anterior\n")
+
+    fetchmany = FakeCursor.fetchmany
+    calls = []
+
+    def failing_fetchmany(self, size):
+        calls.append(size)
+        if len(calls) > 1:
+            raise FakeOdbcError("Communication link failure")
+        return fetchmany(self, size)
+
+    monkeypatch.setattr(FakeCursor, "fetchmany", failing_fetchmany)
+    result = export_marcas(tmp_path)
+
+    assert list(result["failed"]) == ["Marcas"]
+    assert path.read_bytes() == b"anterior\n"
+    assert os.listdir(tmp_path) == [export_filename("Marcas")]
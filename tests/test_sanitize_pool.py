@@ -0,0 +1,70 @@
+"""Sanitizado en un pool de procesos: mismo archivo, byte a byte y en el mismo orden, que en un solo hilo"""
+
+import datetime
+import decimal
+
+import pytest
+
+import export_engine
+from export_engine import ExportEngine, export_filename, get_query_for_table
+
+TABLES = ["Marcas", "Bancos"]
+
+
+def table_results(tables, rows):
+    columns = [("Codigo", str), ("Descripcion", str), ("Precio", decimal.Decimal), ("Alta", datetime.date)]
+    texts = ["Ácido  fólico", "Crema; 50 g", "  niño\tpequeño ", None, "PRODUCTO ñandú", "x" * 300]
+    return {
+        get_query_for_table(table): (
+            columns,
+            [
+                (
+                    f"{table[:3].upper()}{index:05d}",
+                    texts[index % len(texts)],
+                    decimal.Decimal(index) / 100,
+                    datetime.date(2024, 1, 1) + datetime.timedelta(days=index % 365),
+                )
+                for index in range(rows)
+            ],
+        )
+        for table in tables
+    }
+
+
+def export(tables, folder, options):
+    engine = ExportEngine("cadena", "Farmacia", {"save_metrics": False, "batch_size": 500, **options})
+    result = engine.run(tables, str(folder))
+    assert not result["failed"]
+    return {table: (folder / export_filename(table)).read_bytes() for table in tables}
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_pooled_output_matches_single_process(fake_odbc, tmp_path, monkeypatch, columnar):
+    fake_odbc(table_results(TABLES, 6000))
+    single = export(TABLES, tmp_path / "uno", {"sanitize_processes": 0, "columnar": columnar})
+
+    pooled_scans = []
+    stream_rows_pooled = ExportEngine._stream_rows_pooled
+
+    def spy(self, cursor, scan, *args, **kwargs):
+        pooled_scans.append(scan.tables)
+        return stream_rows_pooled(self, cursor, scan, *args, **kwargs)
+
+    monkeypatch.setattr(ExportEngine, "_stream_rows_pooled", spy)
+    monkeypatch.setattr(export_engine, "SANITIZE_PROCESS_MIN_ROWS", 0)
+    pooled = export(TABLES, tmp_path / "pool", {"sanitize_processes": 2, "columnar": columnar})
+
+    assert sorted(map(tuple, pooled_scans)) == sorted((table,) for table in TABLES)
+    for table in TABLES:
+        assert pooled[table] == single[table]
+        assert pooled[table].count(b"\n") == 6000
+
+
+def test_small_tables_stay_in_process(fake_odbc, tmp_path, monkeypatch):
+    fake_odbc(table_results(TABLES, 10))
+    called = []
+    monkeypatch.setattr(ExportEngine, "_stream_rows_pooled", lambda *args, **kwargs: called.append(args))
+
+    export(TABLES, tmp_path, {"sanitize_processes": 2})
+
+    assert called == []
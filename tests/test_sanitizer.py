@@ -0,0 +1,242 @@
+"""TextSanitizer y los formateadores deben dar exactamente lo mismo que clean_special_characters(normalize_text())"""
+
+import datetime
+import decimal
+import random
+
+import pytest
+
+from export_engine import (
+    PROBLEMATIC_CHARS,
+    SanitizerCache,
+    _format_block,
+    build_batch_formatter,
+    build_row_formatter,
+    clean_special_characters,
+    encode_lines,
+    get_text_sanitizer,
+    normalize_text,
+)
+
+# Casos límite: marcas combinantes, U+037E (su NFD es ';'), controles, fin de línea y planos astrales
+EDGE_CASES = [
+    "",
+    " ",
+    "   ",
+    "0",
+    "-1.50",
+    "+1,234.00",
+    "1.2.3",
+    "Acetaminofén 500mg",
+    "NIÑO'S",
+    "niño’s ‘x’ ´a` b",
+    "e\u0301",
+    "a\u0327\u0301",
+    "\u0301",
+    "\u0301\u0327",
+    "q\u0307\u0323",
+    "\u037e",
+    "a\u037eb",
+    "a;b",
+    "\x00\x01\x02texto\x7f",
+    "\x00",
+    "línea\r\nsiguiente\n",
+    "\r",
+    "\t tab",
+    "\ufffe\uffff",
+    "𝔘nicode",
+    "😀 emoji",
+    "\U0001d15e",
+    "a\U0001d165\U0001d16d",
+    "\U0001d15f\u0301",
+    "한국어",
+    "ｆｕｌｌ",
+    "Ωμέγα",
+    "क\u094dषि",
+    "क\u093c",
+    "ש\u05b8\u05c1לו\u05b9ם",
+    "Å Ǻ ǻ",
+    "Ⅻ",
+    "ß ẞ",
+    "\u00a0espacio",
+    "\ud800",
+]
+
+ALPHABET = (
+    list("abcxyzABCXYZ0123456789 .,-+;'`´‘’")
+    + list("áéíóúñÑüÜçÇàèÅåøØ")
+    + ["\u0301", "\u0327", "\u0308", "\u0323", "\u0307", "\u037e", "\u0387", "\u1fee", "\u212b", "\u2126"]
+    + ["\x00", "\x01", "\x1f", "\x7f", "\r", "\n", "\t", "\ufffe", "\uffff", "\u00a0"]
+    + ["한", "क", "\u093c", "\u094d", "ש", "\u05bc", "\u05b8", "Ω", "ά"]
+    + ["𝔘", "😀", "\U0001d15e", "\U0001d165", "\U0001d16d", "\U00020000", "\U0002f800"]
+) + list(PROBLEMATIC_CHARS)
+
+
+def reference(value):
+    return clean_special_characters(normalize_text(value))
+
+
+def generated_corpus(seed, count=20000, max_length=24):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_length))) for _ in range(count)]
+
+
+@pytest.fixture(scope="module")
+def sanitizer():
+    return get_text_sanitizer()
+
+
+@pytest.mark.parametrize("value", EDGE_CASES)
+def test_sanitize_edge_cases(sanitizer, value):
+    assert sanitizer.sanitize(value) == reference(value)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_sanitize_generated_corpus(sanitizer, seed):
+    mismatches = [value for value in generated_corpus(seed) if sanitizer.sanitize(value) != reference(value)]
+    assert mismatches[:5] == []
+
+
+@pytest.mark.parametrize(
+    "value",
+    [None, 0, 15, -3, 1.5, decimal.Decimal("10.20"), True, datetime.date(2024, 1, 31), b"bytes"],
+)
+def test_sanitize_non_text(sanitizer, value):
+    assert sanitizer.sanitize(value) == reference(value)
+
+
+def test_sanitize_column_matches_cells(sanitizer):
+    rng = random.Random(7)
+    corpus = generated_corpus(4, count=5000) + EDGE_CASES
+    for _ in range(300):
+        column = [rng.choice(corpus) if rng.random() > 0.1 else None for _ in range(rng.randint(1, 60))]
+        assert sanitizer.sanitize_column(column) == [sanitizer.sanitize(value) for value in column]
+
+
+def test_sanitize_column_ascii(sanitizer):
+    column = ["abc", "it's", "x\x01y", "", None, "a\nb", "plain"]
+    assert sanitizer.sanitize_column(column) == [reference(value) for value in column]
+
+
+def _random_rows(rng, corpus, count):
+    rows = []
+    for _ in range(count):
+        rows.append((
+            rng.choice(corpus),
+            rng.choice(corpus) if rng.random() > 0.2 else None,
+            rng.randint(-5, 5000) if rng.random() > 0.1 else None,
+            decimal.Decimal(rng.randint(0, 10000)) / 100,
+            rng.choice(corpus),
+        ))
+    return rows
+
+
+DESCRIPTION = (("Codigo", str), ("Descripcion", str), ("Cantidad", int), ("Precio", decimal.Decimal), ("Nota", None))
+
+
+@pytest.mark.parametrize("escape", [(), (1, 4)])
+def test_columnar_block_matches_row_formatter(sanitizer, escape):
+    rng = random.Random(11)
+    # Un sustituto suelto no se puede escribir en UTF-8 por ningún camino: solo se prueba en sanitize
+    corpus = generated_corpus(5, count=3000) + [value for value in EDGE_CASES if value != "\ud800"]
+    format_row = build_row_formatter(DESCRIPTION, sanitizer, None, escape)
+    for _ in range(50):
+        rows = _random_rows(rng, corpus, rng.randint(1, 200))
+        expected = encode_lines(list(map(format_row, rows)))
+        assert _format_block(DESCRIPTION, rows, 0, True, escape) == (expected, len(rows))
+        assert _format_block(DESCRIPTION, rows, 1024 * 1024, False, escape) == (expected, len(rows))
+        assert build_batch_formatter(DESCRIPTION, sanitizer, escape)(rows) == list(map(format_row, rows))
+
+
+def test_row_formatter_matches_reference(sanitizer):
+    rng = random.Random(13)
+    corpus = generated_corpus(6, count=3000) + EDGE_CASES
+    format_row = build_row_formatter(DESCRIPTION, sanitizer)
+    for row in _random_rows(rng, corpus, 2000):
+        expected = ";".join(
+            "" if value is None else str(value) if isinstance(value, (int, decimal.Decimal)) else reference(value)
+            for value in row
+        )
+        assert format_row(row) == expected
+
+
+def _server_replace(rows, escape):
+    # REPLACE(col,';',' ') en la consulta: el cliente recibe el valor ya reemplazado y luego lo sanitiza
+    return [
+        tuple(value.replace(";", " ") if index in escape and isinstance(value, str) else value
+              for index, value in enumerate(row))
+        for row in rows
+    ]
+
+
+def test_client_escape_matches_server_replace(sanitizer):
+    escape = (1, 4)
+    rows = [
+        ("A;1", "a;b", 1, decimal.Decimal("1.00"), "\u037e"),
+        ("\u037e", "x\u037ey;z", None, decimal.Decimal("2.50"), ";\u037e;"),
+        ("c", None, 3, decimal.Decimal("0"), "NULL"),
+        ("d", "sin separador", 4, decimal.Decimal("4.10"), "e\u0301;\u037e"),
+    ]
+    server = list(map(build_row_formatter(DESCRIPTION, sanitizer), _server_replace(rows, escape)))
+    # En un texto con letras U+037E se vuelve ';' al sanitizar, después del REPLACE de la consulta
+    assert server[1].startswith("\u037e;x;y z;")
+    client = list(map(build_row_formatter(DESCRIPTION, sanitizer, None, escape), rows))
+    assert client == server
+    assert build_batch_formatter(DESCRIPTION, sanitizer, escape)(rows) == server
+    assert _format_block(DESCRIPTION, rows, 0, True, escape) == (encode_lines(server), len(rows))
+    assert _format_block(DESCRIPTION, rows, 1024 * 1024, False, escape) == (encode_lines(server), len(rows))
+
+
+class CountingSanitizer:
+    def __init__(self, sanitizer):
+        self.calls = []
+        self._sanitize = sanitizer.sanitize
+
+    def sanitize(self, value):
+        self.calls.append(value)
+        return self._sanitize(value)
+
+
+def test_cache_evicts_least_recently_used_at_the_memory_limit(sanitizer):
+    counting = CountingSanitizer(sanitizer)
+    values = [f"Artículo {index:03d} ñandú" for index in range(200)]
+    cache = SanitizerCache(counting, max_bytes=20 * 1024)
+    sanitize = cache.column("Descripcion")
+
+    for value in values:
+        assert sanitize(value) == reference(value)
+        # El primero se sigue usando: queda al final del orden LRU y no se expulsa
+        assert sanitize(values[0]) == reference(values[0])
+        assert cache.size_bytes <= cache.max_bytes
+
+    assert cache.evictions > 0
+    counting.calls.clear()
+    sanitize(values[0])
+    sanitize(values[-1])
+    assert counting.calls == []
+    # Uno de los primeros ya se expulsó: se vuelve a sanitizar
+    assert sanitize(values[1]) == reference(values[1])
+    assert counting.calls == [values[1]]
+    assert cache.column_stats["Descripcion"][1] == len(values) + 1
+
+
+def test_cache_skips_non_text_values(sanitizer):
+    counting = CountingSanitizer(sanitizer)
+    cache = SanitizerCache(counting, max_bytes=1024 * 1024)
+    sanitize = cache.column("Mixta")
+
+    # 1, 1.0 y True tienen el mismo hash: memoizarlos daría el texto equivocado
+    assert [sanitize(value) for value in (1, 1.0, True, None)] == [reference(v) for v in (1, 1.0, True, None)]
+    assert cache.size_bytes == 0
+    assert len(counting.calls) == 4
+
+
+def test_typed_columns_skip_the_sanitizer(sanitizer):
+    counting = CountingSanitizer(sanitizer)
+    description = (("Cantidad", int), ("Precio", decimal.Decimal), ("Alta", datetime.date), ("Activo", bool))
+    row = (12, decimal.Decimal("3.50"), datetime.date(2024, 1, 31), True)
+
+    assert build_row_formatter(description, counting)(row) == "12;3.50;2024-01-31;True"
+    assert build_row_formatter(description + (("Nombre", str),), counting)(row + ("Niño",)).endswith(";Nino")
+    # Solo la columna de texto pasó por el sanitizador
+    assert counting.calls == ["Niño"]
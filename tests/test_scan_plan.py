@@ -0,0 +1,103 @@
+"""plan_export_scans: consultas iguales se leen una vez y las que solo cambian el filtro se unen con IN"""
+
+import pytest
+
+import export_engine
+from export_engine import ExportEngine, export_filename, get_query_for_table, plan_export_scans
+
+MEDICINA = "Artículos - Atributos (Medicina)"
+GENERICO = "Artículos - Atributos (Genérico)"
+
+
+def plan(tables, **kwargs):
+    return [(scan.tables, scan.query, scan.routes) for scan in plan_export_scans(tables, **kwargs)]
+
+
+def test_identical_queries_are_grouped():
+    scans = plan(["Artículos - Componentes", "Marcas", "Artículos - Principio Activo"])
+    assert scans == [
+        (["Artículos - Componentes", "Artículos - Principio Activo"], get_query_for_table("Artículos - Componentes"), None),
+        (["Marcas"], get_query_for_table("Marcas"), None),
+    ]
+
+
+def test_filtered_queries_merge_into_one_in():
+    [(tables, query, routes)] = plan([MEDICINA, GENERICO])
+    assert tables == [MEDICINA, GENERICO]
+    assert query == (
+        "SELECT InvArticulo.CodigoArticulo, InvAtributo.Descripcion FROM InvArticulo "
+        "JOIN InvArticuloAtributo ON InvArticuloAtributo.InvArticuloId = InvArticulo.Id "
+        "JOIN InvAtributo ON InvAtributo.Id = InvArticuloAtributo.InvAtributoId "
+        "WHERE InvAtributo.Descripcion IN ('Medicina', 'Genérico') ORDER BY InvArticulo.CodigoArticulo ASC"
+    )
+    assert routes == {"medicina": MEDICINA, "genérico": GENERICO}
+
+
+def test_single_filtered_query_and_share_off_are_left_alone():
+    assert plan([MEDICINA, "Bancos"]) == [
+        ([MEDICINA], get_query_for_table(MEDICINA), None),
+        (["Bancos"], get_query_for_table("Bancos"), None),
+    ]
+    assert plan([MEDICINA, GENERICO], share=False) == [
+        ([MEDICINA], get_query_for_table(MEDICINA), None),
+        ([GENERICO], get_query_for_table(GENERICO), None),
+    ]
+
+
+@pytest.mark.parametrize(
+    "queries",
+    [
+        # Filtros sobre columnas distintas
+        {"A": "SELECT Codigo FROM T WHERE Tipo = 'a'", "B": "SELECT Codigo FROM T WHERE Clase = 'b'"},
+        # Otro orden
+        {"A": "SELECT Codigo FROM T WHERE Tipo = 'a' ORDER BY Codigo", "B": "SELECT Codigo FROM T WHERE Tipo = 'b'"},
+        # Más de una condición o un valor con comilla escapada: no es un filtro de igualdad simple
+        {"A": "SELECT Codigo FROM T WHERE Tipo = 'a' AND Activo = '1'", "B": "SELECT Codigo FROM T WHERE Tipo = 'b'"},
+        {"A": "SELECT Codigo FROM T WHERE Tipo = 'O''Brien'", "B": "SELECT Codigo FROM T WHERE Tipo = 'b'"},
+        # Otra tabla
+        {"A": "SELECT Codigo FROM T WHERE Tipo = 'a'", "B": "SELECT Codigo FROM U WHERE Tipo = 'b'"},
+    ],
+)
+def test_non_matching_queries_are_not_merged(monkeypatch, queries):
+    monkeypatch.setattr(export_engine, "get_query_for_table", queries.get)
+    assert plan(list(queries)) == [([table], query, None) for table, query in queries.items()]
+
+
+def test_whitespace_and_case_do_not_prevent_merging(monkeypatch):
+    queries = {
+        "A": "SELECT Codigo, Nombre FROM T WHERE Tipo = 'a'",
+        "B": "select  Codigo,\n  Nombre from T   where Tipo = 'b'",
+    }
+    monkeypatch.setattr(export_engine, "get_query_for_table", queries.get)
+    [(tables, query, routes)] = plan(["A", "B"])
+    assert tables == ["A", "B"]
+    assert query == "SELECT Codigo, Nombre, Tipo FROM T WHERE Tipo IN ('a', 'b')"
+    assert routes == {"a": "A", "b": "B"}
+
+
+def test_merged_scan_writes_the_same_bytes(fake_odbc, tmp_path):
+    articles = [(f"A{index:04d}", "Medicina" if index % 3 else "Genérico") for index in range(500)]
+    # El servidor compara sin mayúsculas y sin espacios finales: la columna del filtro puede venir distinta
+    spelled = {"Medicina": ["Medicina", "MEDICINA ", "medicina"], "Genérico": ["Genérico", "GENÉRICO"]}
+    merged_rows = [
+        (code, spelled[kind][index % len(spelled[kind])]) for index, (code, kind) in enumerate(articles)
+    ]
+    [(_, merged_query, _)] = plan([MEDICINA, GENERICO])
+    results = {
+        get_query_for_table(MEDICINA): ([("CodigoArticulo", str)], [(code,) for code, kind in articles if kind == "Medicina"]),
+        get_query_for_table(GENERICO): ([("CodigoArticulo", str)], [(code,) for code, kind in articles if kind == "Genérico"]),
+        merged_query: ([("CodigoArticulo", str), ("Descripcion", str)], merged_rows),
+    }
+
+    outputs = {}
+    for share in (True, False):
+        database = fake_odbc(results)
+        folder = tmp_path / str(share)
+        options = {"share_scans": share, "save_metrics": False, "batch_size": 64}
+        result = ExportEngine("cadena", options=options, connection=database.connect("")).run([MEDICINA, GENERICO], str(folder))
+        assert result["failed"] == {}
+        assert (merged_query in database.queries) == share
+        outputs[share] = [(folder / export_filename(table)).read_bytes() for table in (MEDICINA, GENERICO)]
+
+    assert outputs[True] == outputs[False]
+    assert all(outputs[True])
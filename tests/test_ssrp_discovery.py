@@ -0,0 +1,117 @@
+"""Descubrimiento SSRP contra un Browser de prueba en 127.0.0.1 (sin difusión)"""
+
+import asyncio
+
+from ssrp_discovery import (
+    CLNT_UCAST_EX,
+    SVR_RESP,
+    discover_instances,
+    discover_instances_async,
+    parse_ssrp_response,
+)
+
+INSTANCES = (
+    "ServerName;FARMACIA01;InstanceName;MSSQLSERVER;IsClustered;No;Version;15.0.2000.5;tcp;1433;;"
+    "ServerName;FARMACIA01;InstanceName;SQLEXPRESS;IsClustered;No;Version;16.0.1000.6;tcp;49170;np;"
+    "\\\\FARMACIA01\\pipe\\MSSQL$SQLEXPRESS\\sql\\query;;"
+    "ServerName;FARMACIA01;InstanceName;SINTCP;IsClustered;Yes;Version;14.0.1000.169;;"
+)
+
+
+def svr_resp(text):
+    payload = text.encode("utf-8")
+    return bytes([SVR_RESP]) + len(payload).to_bytes(2, "little") + payload
+
+
+class _BrowserStandIn(asyncio.DatagramProtocol):
+    """Responde como SQL Server Browser solo a CLNT_UCAST_EX; anota lo que recibe"""
+
+    def __init__(self, response):
+        self.response = response
+        self.received = []
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.received.append(data)
+        if data == CLNT_UCAST_EX:
+            self.transport.sendto(self.response, addr)
+            # Respuesta repetida: el cliente no debe duplicar instancias
+            self.transport.sendto(self.response, addr)
+
+
+async def _discover_with_stand_in(response, hosts=("127.0.0.1",), on_instance=None):
+    loop = asyncio.get_running_loop()
+    transport, browser = await loop.create_datagram_endpoint(
+        lambda: _BrowserStandIn(response), local_addr=("127.0.0.1", 0)
+    )
+    port = transport.get_extra_info("sockname")[1]
+    try:
+        instances = await discover_instances_async(
+            hosts, broadcast=False, timeout=0.3, port=port, on_instance=on_instance
+        )
+    finally:
+        transport.close()
+    return instances, browser
+
+
+def test_discovers_instances_from_local_browser():
+    found = []
+    instances, browser = asyncio.run(_discover_with_stand_in(svr_resp(INSTANCES), on_instance=found.append))
+
+    assert browser.received == [CLNT_UCAST_EX]
+    by_name = {info["name"]: info for info in instances}
+    assert sorted(by_name) == ["FARMACIA01", "FARMACIA01\\SINTCP", "FARMACIA01\\SQLEXPRESS"]
+    assert by_name["FARMACIA01"]["tcp_port"] == 1433
+    assert by_name["FARMACIA01\\SQLEXPRESS"]["tcp_port"] == 49170
+    assert by_name["FARMACIA01\\SINTCP"]["tcp_port"] is None
+    assert by_name["FARMACIA01\\SINTCP"]["clustered"] is True
+    assert by_name["FARMACIA01\\SQLEXPRESS"]["version"] == "16.0.1000.6"
+    assert all(info["address"] == "127.0.0.1" for info in instances)
+    assert len(found) == 3
+
+
+def test_local_alias_resolves_to_loopback():
+    instances, browser = asyncio.run(_discover_with_stand_in(svr_resp(INSTANCES), hosts=("(local)", "localhost")))
+    # Los dos alias apuntan a la misma dirección: un solo pedido
+    assert browser.received == [CLNT_UCAST_EX]
+    assert len(instances) == 3
+
+
+def test_ignores_malformed_response():
+    instances, _ = asyncio.run(_discover_with_stand_in(b"\x04garbage"))
+    assert instances == []
+
+
+def test_blocking_wrapper_without_browser_returns_empty():
+    # Nadie escucha en ese puerto: sin respuestas ni excepciones
+    assert discover_instances(("127.0.0.1",), broadcast=False, timeout=0.1, port=9) == []
+
+
+def test_parse_ssrp_response_edge_cases():
+    assert parse_ssrp_response(b"") == []
+    assert parse_ssrp_response(svr_resp("ServerName;SOLO;;")) == []
+    # Respuestas de servidores antiguos en latin-1 en lugar de UTF-8
+    payload = "ServerName;FARMACÍA;InstanceName;A;tcp;1;;".encode("latin-1")
+    latin = bytes([SVR_RESP]) + len(payload).to_bytes(2, "little") + payload
+    assert parse_ssrp_response(latin)[0]["server"] == "FARMACÍA"
+
+
+def test_parse_ssrp_response_empty_values():
+    # Version vacía (Version;;) en medio de la instancia: no corta el registro ni corre los pares
+    text = (
+        "ServerName;SRV;InstanceName;VACIA;IsClustered;No;Version;;tcp;1433;;"
+        "ServerName;SRV;InstanceName;OTRA;IsClustered;Yes;Version;16.0.1000.6;tcp;;;"
+        "ServerName;SRV;InstanceName;ULTIMA;Version;;;"
+    )
+    instances = parse_ssrp_response(svr_resp(text))
+
+    assert [info["name"] for info in instances] == ["SRV\\VACIA", "SRV\\OTRA", "SRV\\ULTIMA"]
+    assert instances[0]["version"] == ""
+    assert instances[0]["tcp_port"] == 1433
+    assert instances[1]["version"] == "16.0.1000.6"
+    assert instances[1]["clustered"] is True
+    assert instances[1]["tcp_port"] is None
+    assert instances[2]["version"] == ""
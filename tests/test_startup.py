@@ -0,0 +1,75 @@
+"""Presupuesto de importación de los módulos de arranque, medido con -X importtime en un proceso limpio"""
+
+import ast
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUI_PATH = os.path.join(ROOT, "master-MRv6.py")
+
+
+def _gui_constant(name):
+    # El módulo de la ventana necesita PyQt6 para importarse: la constante se lee del código fuente
+    with open(GUI_PATH, encoding="utf-8") as source:
+        tree = ast.parse(source.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == name for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise LookupError(name)
+
+
+IMPORT_BUDGET_MS = _gui_constant("IMPORT_BUDGET_MS")
+FIRST_PAINT_BUDGET_MS = _gui_constant("FIRST_PAINT_BUDGET_MS")
+STARTUP_CHECK_ARG = _gui_constant("STARTUP_CHECK_ARG")
+
+
+def import_times(code):
+    """Ejecuta `code` con -X importtime; devuelve {paquete: acumulado en ms}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    # Formato: "import time: propio [us] | acumulado [us] | paquete", con sangría según la profundidad
+    times = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            times[parts[2][1:].rstrip()] = int(parts[1]) / 1000
+    return times
+
+
+@pytest.mark.parametrize("module", ["export_engine", "export_cli"])
+def test_module_import_within_budget(module):
+    times = import_times(f"import {module}")
+    slowest = sorted(((ms, name) for name, ms in times.items()), reverse=True)[:8]
+    assert times[module] <= IMPORT_BUDGET_MS, slowest
+
+
+def test_gui_import_within_budget():
+    pytest.importorskip("PyQt6")
+    code = (
+        "import importlib.util\n"
+        f"spec = importlib.util.spec_from_file_location('conector_sql', {GUI_PATH!r})\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+    )
+    times = import_times(code)
+    # El módulo se carga desde su ruta: -X importtime solo anota sus dependencias, se suman las de primer nivel
+    total_ms = sum(ms for name, ms in times.items() if not name.startswith(" "))
+    slowest = sorted(((ms, name) for name, ms in times.items()), reverse=True)[:8]
+    assert total_ms <= IMPORT_BUDGET_MS, slowest
+
+
+def test_gui_first_paint_within_budget():
+    pytest.importorskip("PyQt6")
+    # Sin pantalla: la plataforma offscreen de Qt pinta la ventana igual, en memoria
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run(
+        [sys.executable, GUI_PATH, STARTUP_CHECK_ARG], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    first_paint = re.search(r"Primer pintado: (\d+) ms", result.stdout)
+    assert first_paint, result.stdout + result.stderr
+    assert int(first_paint.group(1)) <= FIRST_PAINT_BUDGET_MS, result.stdout
+    assert result.returncode == 0, result.stdout